@@ -0,0 +1,78 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections
+import time
+
+
+class LRUCache(object):
+    '''
+    A bounded mapping dropping the least recently used entries first.
+
+    Entries are dropped as well once they are older than `ttl` seconds, if
+    given, so that changes made elsewhere are seen after that time at the
+    latest. Lookups are counted as hits or misses.
+    '''
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> (value, expiry time)
+        self._data = collections.OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            value, expiry = self._data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if expiry is not None and expiry <= time.time():
+            self.misses += 1
+            return default
+
+        # Move the entry to the most recently used end
+        self._data[key] = (value, expiry)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        expiry = None
+        if self.ttl:
+            expiry = time.time() + self.ttl
+        self._data.pop(key, None)
+        self._data[key] = (value, expiry)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        value, expiry = self._data.pop(key, (default, None))
+        return value
+
+    def clear(self):
+        self._data.clear()
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
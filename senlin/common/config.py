@@ -81,6 +81,30 @@ engine_opts = [
     cfg.IntOpt('default_action_timeout',
                default=3600,
                help=_('Timeout in seconds for actions.')),
+    cfg.IntOpt('action_max_retries',
+               default=3,
+               help=_('Default number of times an action is retried when it '
+                      'asks for a retry.')),
+    cfg.IntOpt('action_retry_base_delay',
+               default=2,
+               help=_('Delay in seconds before the first retry of an action. '
+                      'The delay doubles for each further retry.')),
+    cfg.IntOpt('action_retry_max_delay',
+               default=60,
+               help=_('Upper bound in seconds of the delay between two '
+                      'retries of an action.')),
+    cfg.IntOpt('max_update_retries',
+               default=5,
+               help=_('Number of times an update of a cluster is retried when '
+                      'the cluster was changed by another party meanwhile.')),
+    cfg.IntOpt('max_parallel_actions',
+               default=10,
+               help=_('Maximum number of dependent actions run in parallel '
+                      'on behalf of one composite action.')),
+    cfg.IntOpt('max_parallel_node_operations',
+               default=10,
+               help=_('Maximum number of nodes created, deleted or moved at '
+                      'the same time when resizing a cluster.')),
     cfg.IntOpt('error_wait_time',
                default=240,
                help=_('Error wait time in seconds for cluster action (ie. create'
@@ -88,7 +112,87 @@ engine_opts = [
     cfg.IntOpt('engine_life_check_timeout',
                default=2,
                help=_('RPC timeout for the engine liveness check that is used'
-                      ' for cluster locking.'))]
+                      ' for cluster locking.')),
+    cfg.IntOpt('engine_heartbeat_interval',
+               default=10,
+               help=_('Seconds between heartbeats an engine writes to the '
+                      'database to prove it is alive.')),
+    cfg.IntOpt('engine_lease_timeout',
+               default=30,
+               help=_('Seconds after its last heartbeat an engine is treated '
+                      'as dead and its running actions are reclaimed.')),
+    cfg.IntOpt('num_shards',
+               default=64,
+               help=_('Number of shards the clusters and nodes are split into '
+                      'for their actions to be spread over engines.')),
+    cfg.IntOpt('object_cache_size',
+               default=256,
+               help=_('Maximum number of profiles, and of policies, kept in '
+                      'memory by each engine.')),
+    cfg.IntOpt('object_cache_ttl',
+               default=60,
+               help=_('Seconds a profile or a policy is kept in memory before '
+                      'being read again, which bounds how long an engine may '
+                      'use one changed by another engine.')),
+    cfg.IntOpt('client_cache_ttl',
+               default=600,
+               help=_('Seconds a client of an OpenStack service is reused '
+                      'for the same credentials before being rebuilt.')),
+    cfg.IntOpt('stack_poll_interval',
+               default=2,
+               help=_('Seconds between two checks of the Heat stacks being '
+                      'waited for, when they are making progress.')),
+    cfg.IntOpt('stack_poll_max_interval',
+               default=30,
+               help=_('Upper bound in seconds of the interval between two '
+                      'checks of the Heat stacks, which grows while none of '
+                      'them changes.')),
+    cfg.IntOpt('stack_poll_batch_size',
+               default=100,
+               help=_('Maximum number of Heat stacks checked with one API '
+                      'request.')),
+    cfg.IntOpt('template_validation_cache_size',
+               default=128,
+               help=_('Maximum number of successfully validated stack '
+                      'templates remembered by each engine.')),
+    cfg.IntOpt('composite_stack_batch_window',
+               default=1,
+               help=_('Seconds changes to the nodes of a cluster sharing one '
+                      'Heat stack are collected before the stack is '
+                      'changed.')),
+    cfg.FloatOpt('health_check_tick',
+                 default=1.0,
+                 help=_('Seconds between two turns of the timer wheel '
+                        'scheduling node health checks.')),
+    cfg.IntOpt('health_check_wheel_size',
+               default=512,
+               help=_('Number of slots of the timer wheel scheduling node '
+                      'health checks.')),
+    cfg.FloatOpt('health_check_jitter',
+                 default=0.1,
+                 help=_('Fraction of its interval by which the next health '
+                        'check of a node is randomly moved, so that checks '
+                        'spread over time.')),
+    cfg.IntOpt('health_check_batch_size',
+               default=100,
+               help=_('Maximum number of nodes checked with one backend '
+                      'request.')),
+    cfg.IntOpt('health_check_cluster_budget',
+               default=50,
+               help=_('Maximum number of nodes of one cluster checked per '
+                      'turn of the timer wheel, further checks are delayed '
+                      'to the next turns.')),
+    cfg.StrOpt('cloud_backend',
+               choices=['openstack', 'fake'],
+               default='openstack',
+               help=_('Backend the drivers talk to, "fake" simulates a cloud '
+                      'in memory.')),
+    cfg.StrOpt('orphaned_action_recovery',
+               choices=['reset', 'fail'],
+               default='reset',
+               help=_('What to do with running actions owned by a dead '
+                      'engine, either reset them for re-execution or mark '
+                      'them as failed.'))]
 
 rpc_opts = [
     cfg.StrOpt('host',
@@ -148,6 +252,19 @@ client_http_log_debug_opts = [
                 default=False,
                 help=_("Allow client's debug log output."))]
 
+fake_driver_group = cfg.OptGroup('fake_driver')
+fake_driver_opts = [
+    cfg.FloatOpt('latency',
+                 default=1.0,
+                 help=_('Seconds a simulated stack operation takes.')),
+    cfg.FloatOpt('api_latency',
+                 default=0.0,
+                 help=_('Seconds a call to the simulated cloud takes.')),
+    cfg.FloatOpt('failure_rate',
+                 default=0.0,
+                 help=_('Probability, between 0 and 1, that a simulated '
+                        'stack operation fails.'))]
+
 revision_group = cfg.OptGroup('revision')
 revision_opts = [
     cfg.StrOpt('senlin_revision',
@@ -163,6 +280,7 @@ def list_opts():
     yield None, service_opts
     yield paste_deploy_group.name, paste_deploy_opts
     yield revision_group.name, revision_opts
+    yield fake_driver_group.name, fake_driver_opts
     yield 'clients', default_clients_opts
 
     for client in ('nova', 'swift', 'neutron', 'cinder',
@@ -177,6 +295,7 @@ def list_opts():
 
 cfg.CONF.register_group(paste_deploy_group)
 cfg.CONF.register_group(revision_group)
+cfg.CONF.register_group(fake_driver_group)
 
 for group, opts in list_opts():
     cfg.CONF.register_opts(opts, group=group)
@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+
 from oslo.middleware import request_id as oslo_request_id
 from oslo.utils import importutils
 from oslo_context import context
@@ -66,6 +68,19 @@ class RequestContext(context.RequestContext):
             self._session = db_api.get_session()
         return self._session
 
+    def __deepcopy__(self, memo):
+        # A copy gets a DB session of its own when it needs one, sessions
+        # are not to be shared by green threads
+        result = self.__class__.__new__(self.__class__)
+        memo[id(self)] = result
+        for key, value in self.__dict__.items():
+            if key == '_session':
+                value = None
+            elif key != 'policy':
+                value = copy.deepcopy(value, memo)
+            setattr(result, key, value)
+        return result
+
     def to_dict(self):
         return {'auth_token': self.auth_token,
                 'username': self.username,
@@ -282,6 +282,13 @@ class NotFound(SenlinException):
         super(NotFound, self).__init__()
 
 
+class ConcurrentUpdate(SenlinException):
+    # Raised by versioned updates, reading the object again and retrying
+    # the update is expected to succeed
+    msg_fmt = _("The %(object)s (%(id)s) has been changed since version "
+                "%(version)s was read.")
+
+
 class InvalidContentType(SenlinException):
     msg_fmt = _("Invalid content type %(content_type)s")
 
@@ -302,6 +309,10 @@ class ActionNotSupported(SenlinException):
     msg_fmt = _('Action "%(action)s" not supported by %(object)s')
 
 
+class CircularDependency(SenlinException):
+    msg_fmt = _("Circular dependency detected among %(cycle)s.")
+
+
 class ActionInProgress(SenlinException):
     msg_fmt = _("Cluster %(cluster_name)s already has an action (%(action)s) "
                 "in progress.")
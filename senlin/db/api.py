@@ -31,8 +31,16 @@ def get_engine():
     return IMPL.get_engine()
 
 
-def get_session():
-    return IMPL.get_session()
+def get_session(use_slave=False):
+    return IMPL.get_session(use_slave=use_slave)
+
+
+def transaction(context):
+    '''
+    Scope of a transaction joined by all the calls made with the context,
+    to be used as `with db_api.transaction(context):`.
+    '''
+    return IMPL.transaction(context)
 
 
 # Clusters
@@ -40,9 +48,10 @@ def cluster_create(context, values):
     return IMPL.cluster_create(context, values)
 
 
-def cluster_get(context, cluster_id, show_deleted=False, tenant_safe=True):
+def cluster_get(context, cluster_id, show_deleted=False, tenant_safe=True,
+                stale_ok=False):
     return IMPL.cluster_get(context, cluster_id, show_deleted=show_deleted,
-                            tenant_safe=tenant_safe)
+                            tenant_safe=tenant_safe, stale_ok=stale_ok)
 
 
 def cluster_get_by_name(context, cluster_name):
@@ -55,10 +64,10 @@ def cluster_get_by_name_and_parent(context, cluster_name, parent):
 
 def cluster_get_all(context, limit=None, sort_keys=None, marker=None,
                     sort_dir=None, filters=None, tenant_safe=True,
-                    show_deleted=False, show_nested=False):
+                    show_deleted=False, show_nested=False, stale_ok=False):
     return IMPL.cluster_get_all(context, limit, sort_keys,
                                 marker, sort_dir, filters, tenant_safe,
-                                show_deleted, show_nested)
+                                show_deleted, show_nested, stale_ok=stale_ok)
 
 
 def cluster_get_all_by_parent(context, parent):
@@ -66,15 +75,25 @@ def cluster_get_all_by_parent(context, parent):
 
 
 def cluster_count_all(context, filters=None, tenant_safe=True,
-                      show_deleted=False, show_nested=False):
+                      show_deleted=False, show_nested=False, stale_ok=False):
     return IMPL.cluster_count_all(context, filters=filters,
                                   tenant_safe=tenant_safe,
                                   show_deleted=show_deleted,
-                                  show_nested=show_nested)
+                                  show_nested=show_nested,
+                                  stale_ok=stale_ok)
+
+
+def cluster_update(context, cluster_id, values, version=None):
+    return IMPL.cluster_update(context, cluster_id, values, version=version)
+
+
+def cluster_update_data(context, cluster_id, update):
+    return IMPL.cluster_update_data(context, cluster_id, update)
 
 
-def cluster_update(context, cluster_id, values):
-    return IMPL.cluster_update(context, cluster_id, values)
+def cluster_increment(context, cluster_id, size=0, next_index=0):
+    return IMPL.cluster_increment(context, cluster_id, size=size,
+                                  next_index=next_index)
 
 
 def cluster_delete(context, cluster_id):
@@ -107,16 +126,36 @@ def node_get_by_physical_id(context, physical_id):
     return IMPL.node_get_by_physical_id(context, physical_id)
 
 
-def node_set_status(context, node_id, status):
+def node_get_victims(context, cluster_id, count=None, criteria=None,
+                     statuses=None, filters=None):
+    return IMPL.node_get_victims(context, cluster_id, count=count,
+                                 criteria=criteria, statuses=statuses,
+                                 filters=filters)
+
+
+def node_get_zones(context, cluster_id=None, node_ids=None):
+    return IMPL.node_get_zones(context, cluster_id=cluster_id,
+                               node_ids=node_ids)
+
+
+def node_update(context, node_id, values, version=None):
+    return IMPL.node_update(context, node_id, values, version=version)
+
+
+def node_set_status(context, node_id, status, reason=None):
     # TODO(Qiming): Update nodes in cluster table; set status to
     #               ACTIVE if all created.
-    return IMPL.node_set_status(context, node_id, status)
+    return IMPL.node_set_status(context, node_id, status, reason=reason)
 
 
 def node_migrate(context, node_id, from_cluster, to_cluster):
     return IMPL.node_migrate(context, node_id, from_cluster, to_cluster)
 
 
+def node_delete(context, node_id):
+    return IMPL.node_delete(context, node_id)
+
+
 # Locks
 def cluster_lock_create(cluster_id, worker_id):
     return IMPL.cluster_lock_create(cluster_id, worker_id)
@@ -172,6 +211,20 @@ def cluster_get_policies(context, cluster_id):
     return IMPL.cluster_get_policies(context, cluster_id)
 
 
+def cluster_get_policy(context, cluster_id, policy_id):
+    return IMPL.cluster_get_policy(context, cluster_id, policy_id)
+
+
+def cluster_policy_get_all_by_type(context, policy_type):
+    return IMPL.cluster_policy_get_all_by_type(context, policy_type)
+
+
+def cluster_mark_policy_triggered(context, cluster_id, policy_id, timestamp,
+                                  since=None):
+    return IMPL.cluster_mark_policy_triggered(context, cluster_id, policy_id,
+                                              timestamp, since=since)
+
+
 def cluster_detach_policy(context, cluster_id, policy_id):
     return IMPL.cluster_detach_policy(context, cluster_id, policy_id)
 
@@ -201,17 +254,21 @@ def profile_update(context, profile_id, values):
     return IMPL.profile_update(context, profile_id, values)
 
 
+def profile_delete(context, profile_id):
+    return IMPL.profile_delete(context, profile_id)
+
+
 # Events
 def event_create(context, values):
     return IMPL.event_create(context, values)
 
 
-def event_get(context, event_id):
-    return IMPL.event_get(context, event_id)
+def event_get(context, event_id, stale_ok=False):
+    return IMPL.event_get(context, event_id, stale_ok=stale_ok)
 
 
-def event_get_all(context):
-    return IMPL.event_get_all(context)
+def event_get_all(context, stale_ok=False):
+    return IMPL.event_get_all(context, stale_ok=stale_ok)
 
 
 def event_count_by_cluster(context, cluster_id):
@@ -219,12 +276,14 @@ def event_count_by_cluster(context, cluster_id):
 
 
 def event_get_all_by_cluster(context, cluster_id, limit=None, marker=None,
-                             sort_keys=None, sort_dir=None, filters=None):
+                             sort_keys=None, sort_dir=None, filters=None,
+                             stale_ok=False):
     return IMPL.event_get_all_by_cluster(context, cluster_id,
                                          limit=limit, marker=marker,
                                          sort_keys=sort_keys,
                                          sort_dir=sort_dir,
-                                         filters=filters)
+                                         filters=filters,
+                                         stale_ok=stale_ok)
 
 
 # Actions
@@ -269,9 +328,15 @@ def action_mark_failed(context, action_id):
 
 
 def action_mark_cancelled(context, action_id):
+    """Cancel an action and the actions linked to it, in one transaction"""
     return IMPL.action_mark_cancelled(context, action_id)
 
 
+def action_mark_retrying(context, action_id, reason=None):
+    """Count one more retry of an action and return the updated count"""
+    return IMPL.action_mark_retrying(context, action_id, reason)
+
+
 def action_start_work_on(context, action_id, owner):
     return IMPL.action_start_work_on(context, action_id, owner)
 
@@ -300,6 +365,51 @@ def action_delete(context, action_id, force=False):
     return IMPL.action_delete(context, action_id, force)
 
 
+def action_reclaim_orphans(context, engine_ids, status):
+    """Release running actions owned by the given (dead) engines"""
+    return IMPL.action_reclaim_orphans(context, engine_ids, status)
+
+
+# Services
+def service_create(context, service_id, host=None, binary=None, topic=None):
+    return IMPL.service_create(context, service_id, host=host, binary=binary,
+                               topic=topic)
+
+
+def service_update(context, service_id, values=None):
+    return IMPL.service_update(context, service_id, values=values)
+
+
+def service_delete(context, service_id):
+    return IMPL.service_delete(context, service_id)
+
+
+def service_get(context, service_id):
+    return IMPL.service_get(context, service_id)
+
+
+def service_get_all(context):
+    return IMPL.service_get_all(context)
+
+
+def service_get_all_expired(context, lease):
+    """Get services whose last heartbeat is older than `lease` seconds"""
+    return IMPL.service_get_all_expired(context, lease)
+
+
+def shard_get(context, shard_id):
+    return IMPL.shard_get(context, shard_id)
+
+
+def shard_get_all(context):
+    return IMPL.shard_get_all(context)
+
+
+def shard_rebalance(context, engine_ids, num_shards):
+    """Spread shards evenly over engines, moving as few as possible"""
+    return IMPL.shard_rebalance(context, engine_ids, num_shards)
+
+
 def db_sync(engine, version=None):
     """Migrate the database to `version` or the most recent version."""
     return IMPL.db_sync(engine, version=version)
@@ -14,12 +14,18 @@
 Implementation of SQLAlchemy backend.
 '''
 
+import contextlib
+import datetime
+import random
 import six
 import sys
 
 from oslo.config import cfg
+from oslo.db import exception as db_exc
 from oslo.db.sqlalchemy import session as db_session
 from oslo.db.sqlalchemy import utils
+from oslo.utils import timeutils
+import sqlalchemy
 from sqlalchemy.orm import session as orm_session
 
 from senlin.common import exception
@@ -35,6 +41,7 @@ LOG = logging.getLogger(__name__)
 
 CONF = cfg.CONF
 CONF.import_opt('max_events_per_cluster', 'senlin.common.config')
+CONF.import_opt('max_update_retries', 'senlin.common.config')
 
 # Action status definitions:
 #  ACTION_INIT:      Not ready to be executed because fields are being
@@ -64,7 +71,15 @@ def get_facade():
     return _facade
 
 get_engine = lambda: get_facade().get_engine()
-get_session = lambda: get_facade().get_session()
+
+
+def get_session(use_slave=False):
+    '''
+    :param use_slave: if True, the session reads from the replica set with
+                      the slave_connection option of the database section,
+                      or from the primary database when there is none.
+    '''
+    return get_facade().get_session(use_slave=use_slave)
 
 
 def get_backend():
@@ -72,8 +87,15 @@ def get_backend():
     return sys.modules[__name__]
 
 
-def model_query(context, *args):
-    session = _session(context)
+def model_query(context, *args, **kwargs):
+    '''
+    :param stale_ok: if True, the query may be run on the database replica
+                     and miss the latest changes.
+    '''
+    if kwargs.get('stale_ok'):
+        session = _reader_session(context)
+    else:
+        session = _session(context)
     query = session.query(*args)
     return query
 
@@ -97,7 +119,7 @@ def soft_delete_aware_query(context, *args, **kwargs):
     :param show_deleted: if True, overrides context's show_deleted field.
     """
 
-    query = model_query(context, *args)
+    query = model_query(context, *args, stale_ok=kwargs.get('stale_ok'))
     show_deleted = kwargs.get('show_deleted') or context.show_deleted
 
     if not show_deleted:
@@ -109,6 +131,67 @@ def _session(context):
     return (context and context.session) or get_session()
 
 
+# Key of the flag set in the info of sessions which have written something
+_WRITTEN = 'senlin_written'
+
+
+@sqlalchemy.event.listens_for(orm_session.Session, 'after_flush')
+@sqlalchemy.event.listens_for(orm_session.Session, 'after_bulk_update')
+@sqlalchemy.event.listens_for(orm_session.Session, 'after_bulk_delete')
+def _mark_written(session, *args):
+    session.info[_WRITTEN] = True
+
+
+def _reader_session(context):
+    '''
+    Session for a query accepting stale data.
+
+    It reads from the replica, unless something has already been written
+    with the session of the context: a request always reads its own writes.
+    '''
+    session = getattr(context, '_session', None)
+    if session is not None and session.info.get(_WRITTEN):
+        return session
+    return get_session(use_slave=True)
+
+
+@contextlib.contextmanager
+def transaction(context):
+    '''
+    Run the DB API calls made with the given context in one transaction,
+    committed when the outermost scope exits and rolled back if it raises.
+    Scopes can be nested.
+    '''
+    session = _session(context)
+    with session.begin(subtransactions=True):
+        yield session
+
+
+def _update_versioned(session, model, obj_id, values, version=None):
+    '''
+    Update a row with a single UPDATE statement, bumping its version.
+
+    :param version: if given, the row is only updated if it still has this
+                    version, otherwise ConcurrentUpdate is raised.
+    '''
+    current = sqlalchemy.func.coalesce(model.version, 0)
+    values = dict(values)
+    values['version'] = current + 1
+
+    query = session.query(model).filter_by(id=obj_id)
+    if version is not None:
+        query = query.filter(current == version)
+    if query.update(values, synchronize_session='fetch'):
+        return
+
+    if version is not None:
+        raise exception.ConcurrentUpdate(object=model.__tablename__,
+                                         id=obj_id, version=version)
+    raise exception.NotFound(
+        _('%(object)s with id "%(id)s" not found') % {
+            'object': model.__tablename__, 'id': obj_id})
+
+
 # Clusters
 def cluster_create(context, values):
     cluster_ref = models.Cluster()
@@ -119,8 +202,9 @@ def cluster_create(context, values):
     return cluster_ref
 
 
-def cluster_get(context, cluster_id, show_deleted=False, tenant_safe=True):
-    query = model_query(context, models.Cluster)
+def cluster_get(context, cluster_id, show_deleted=False, tenant_safe=True,
+                stale_ok=False):
+    query = model_query(context, models.Cluster, stale_ok=stale_ok)
     cluster = query.get(cluster_id)
 
     deleted_ok = show_deleted or context.show_deleted
@@ -154,9 +238,10 @@ def cluster_get_by_name(context, cluster_name):
 
 
 def _query_cluster_get_all(context, tenant_safe=True, show_deleted=False,
-                           show_nested=False):
+                           show_nested=False, stale_ok=False):
     query = soft_delete_aware_query(context, models.Cluster,
-                                    show_deleted=show_deleted)
+                                    show_deleted=show_deleted,
+                                    stale_ok=stale_ok)
 
     if not show_nested:
         query = query.filter_by(parent=None)
@@ -209,24 +294,26 @@ def _filter_and_page_query(context, query, limit=None, sort_keys=None,
 
 def cluster_get_all(context, limit=None, sort_keys=None, marker=None,
                     sort_dir=None, filters=None, tenant_safe=True,
-                    show_deleted=False, show_nested=False):
+                    show_deleted=False, show_nested=False, stale_ok=False):
     query = _query_cluster_get_all(context, tenant_safe=tenant_safe,
                                    show_deleted=show_deleted,
-                                   show_nested=show_nested)
+                                   show_nested=show_nested,
+                                   stale_ok=stale_ok)
     return _filter_and_page_query(context, query, limit, sort_keys,
                                   marker, sort_dir, filters).all()
 
 
 def cluster_count_all(context, filters=None, tenant_safe=True,
-                      show_deleted=False, show_nested=False):
+                      show_deleted=False, show_nested=False, stale_ok=False):
     query = _query_cluster_get_all(context, tenant_safe=tenant_safe,
                                    show_deleted=show_deleted,
-                                   show_nested=show_nested)
+                                   show_nested=show_nested,
+                                   stale_ok=stale_ok)
     query = db_filters.exact_filter(query, models.Cluster, filters)
     return query.count()
 
 
-def cluster_update(context, cluster_id, values):
+def cluster_update(context, cluster_id, values, version=None):
     cluster = cluster_get(context, cluster_id)
 
     if not cluster:
@@ -234,8 +321,78 @@ def cluster_update(context, cluster_id, values):
             _('Attempt to update a cluster with id "%s" that does '
               ' exist failed') % cluster_id)
 
-    cluster.update(values)
-    cluster.save(_session(context))
+    with transaction(context) as session:
+        _update_versioned(session, models.Cluster, cluster_id, values,
+                          version)
+        cluster = session.query(models.Cluster).get(cluster_id)
+    return cluster
+
+
+def cluster_update_data(context, cluster_id, update):
+    '''
+    Change the data of a cluster without holding any lock on it.
+
+    :param update: a callable changing a copy of the data in place, it may
+                   return False when there is nothing to change;
+    :returns: the data stored.
+
+    The change is made against the version of the cluster read, so the
+    update is called again on fresh data when another party changed the
+    cluster meanwhile. Data and version are queried as columns on every
+    attempt rather than through the session's identity map, whose cluster
+    instance may be stale.
+    '''
+    attempt = 0
+    while True:
+        query = model_query(context, models.Cluster.data,
+                            models.Cluster.version)
+        row = query.filter_by(id=cluster_id, deleted_time=None).first()
+        if row is None:
+            raise exception.NotFound(
+                _('Cluster with id "%s" not found') % cluster_id)
+
+        version = row.version or 0
+        data = dict(row.data or {})
+        if update(data) is False:
+            return data
+        try:
+            cluster_update(context, cluster_id, {'data': data},
+                           version=version)
+            return data
+        except exception.ConcurrentUpdate:
+            attempt += 1
+            if attempt > CONF.max_update_retries:
+                raise
+
+
+def _cluster_increment(session, cluster_id, size=0, next_index=0):
+    values = {}
+    if size:
+        values['size'] = sqlalchemy.func.coalesce(models.Cluster.size, 0) + \
+            size
+    if next_index:
+        values['next_index'] = \
+            sqlalchemy.func.coalesce(models.Cluster.next_index, 0) + next_index
+    if not values:
+        return
+
+    _update_versioned(session, models.Cluster, cluster_id, values)
+
+
+def cluster_increment(context, cluster_id, size=0, next_index=0):
+    '''
+    Add to the size and the next node index of a cluster in the database,
+    so that concurrent changes are never lost.
+
+    :returns: the updated cluster; the indexes allocated are the
+              `next_index` ones before its new value.
+    '''
+    with transaction(context) as session:
+        _cluster_increment(session, cluster_id, size, next_index)
+        # The row stays locked by the update until the commit, so this
+        # reads our own change
+        cluster = session.query(models.Cluster).get(cluster_id)
+    return cluster
 
 
 def cluster_delete(context, cluster_id):
@@ -245,14 +402,25 @@ def cluster_delete(context, cluster_id):
             _('Attempt to delete a cluster with id "%s" that does '
               'not exist failed') % cluster_id)
 
-    session = orm_session.Session.object_session(cluster)
+    # A fixed number of statements whatever the size of the cluster, the
+    # locks and the policy bindings go with the cluster
+    with transaction(context) as session:
+        node_ids = session.query(models.Node.id).\
+            filter_by(cluster_id=cluster_id).subquery()
+        session.query(models.NodeLock).\
+            filter(models.NodeLock.node_id.in_(node_ids)).\
+            delete(synchronize_session=False)
+        session.query(models.Node).filter_by(cluster_id=cluster_id).\
+            delete(synchronize_session='fetch')
 
-    nodes = node_get_all_by_cluster(context, cluster_id)
-    for node in nodes.values():
-        session.delete(node)
+        session.query(models.ClusterPolicies).\
+            filter_by(cluster_id=cluster_id).\
+            delete(synchronize_session='fetch')
+        session.query(models.ClusterLock).filter_by(cluster_id=cluster_id).\
+            delete(synchronize_session=False)
 
-    cluster.soft_delete(session=session)
-    session.flush()
+        _update_versioned(session, models.Cluster, cluster_id,
+                          {'deleted_time': timeutils.utcnow()})
 
 
 # Nodes
@@ -297,19 +465,124 @@ def node_get_by_physical_id(context, phy_id):
     return query.first()
 
 
+def node_get_victims(context, cluster_id, count=None, criteria=None,
+                     statuses=None, filters=None):
+    '''
+    Choose the IDs of nodes to remove from a cluster.
+
+    Nodes whose status is in `statuses` come first, the others are then
+    ordered by creation time (oldest first unless `criteria` is
+    'youngest_first') using a single query limited to `count` rows.
+    A 'random' criteria samples the node IDs instead.
+    '''
+    query = model_query(context, models.Node.id, models.Node.status).\
+        filter_by(cluster_id=cluster_id)
+    query = db_filters.exact_filter(query, models.Node, filters)
+
+    if criteria == 'random':
+        rows = query.all()
+        if statuses:
+            first = [r.id for r in rows if r.status in statuses]
+            others = [r.id for r in rows if r.status not in statuses]
+        else:
+            first, others = [], [r.id for r in rows]
+        if count is None:
+            count = len(rows)
+        victims = random.sample(first, min(count, len(first)))
+        count -= len(victims)
+        return victims + random.sample(others, min(count, len(others)))
+
+    order = []
+    if statuses:
+        order.append(sqlalchemy.case(
+            [(models.Node.status.in_(statuses), 0)], else_=1))
+    if criteria == 'youngest_first':
+        order.extend([models.Node.created_time.desc(),
+                      models.Node.name.desc()])
+    else:
+        order.extend([models.Node.created_time.asc(),
+                      models.Node.name.asc()])
+
+    query = query.order_by(*order)
+    if count is not None:
+        query = query.limit(count)
+    return [r.id for r in query.all()]
+
+
+def node_get_zones(context, cluster_id=None, node_ids=None):
+    '''
+    Get the availability zone, or else the region, of the nodes of a
+    cluster or of the given nodes, as recorded in the node's placement
+    data, in a dict keyed by node ID.
+    '''
+    query = model_query(context, models.Node.id, models.Node.data)
+    if cluster_id is not None:
+        query = query.filter_by(cluster_id=cluster_id)
+    if node_ids is not None:
+        query = query.filter(models.Node.id.in_(node_ids))
+
+    zones = {}
+    for r in query.all():
+        placement = (r.data or {}).get('placement') or {}
+        zones[r.id] = placement.get('zone') or placement.get('region')
+    return zones
+
+
+def node_update(context, node_id, values, version=None):
+    node = model_query(context, models.Node).get(node_id)
+    if not node:
+        msg = _('Node with id "%s" not found') % node_id
+        raise exception.NotFound(msg)
+
+    values = dict(values)
+    if values.get('status_reason'):
+        values['status_reason'] = values['status_reason'][:255]
+    with transaction(context) as session:
+        _update_versioned(session, models.Node, node_id, values, version)
+        node = session.query(models.Node).get(node_id)
+    return node
+
+
+def node_set_status(context, node_id, status, reason=None):
+    values = {
+        'status': status,
+        'updated_time': datetime.datetime.utcnow(),
+    }
+    if reason is not None:
+        values['status_reason'] = reason[:255]
+
+    # A blind write, the status is not computed from the previous one
+    with transaction(context) as session:
+        _update_versioned(session, models.Node, node_id, values)
+        node = session.query(models.Node).get(node_id)
+    return node
+
+
 def node_migrate(context, node_id, from_cluster, to_cluster):
-    query = model_query(context, models.Node)
-    node = query.get(node_id)
-    session = query.session
-    session.begin()
-    if from_cluster:
-        cluster1 = session.query(models.Cluster).get(from_cluster)
-        cluster1.size -= 1
-    if to_cluster:
-        cluster2 = session.query(models.Cluster).get(to_cluster)
-        cluster2.size += 1
-    node.cluster_id = to_cluster
-    session.commit()
+    with transaction(context) as session:
+        _update_versioned(session, models.Node, node_id,
+                          {'cluster_id': to_cluster})
+        if from_cluster:
+            _cluster_increment(session, from_cluster, size=-1)
+        if to_cluster:
+            _cluster_increment(session, to_cluster, size=1)
+
+
+def node_delete(context, node_id):
+    '''
+    Delete a node together with its lock. The size of its cluster is left
+    to the caller, which counts the nodes deleted.
+    '''
+    with transaction(context) as session:
+        session.query(models.NodeLock).filter_by(node_id=node_id).\
+            delete(synchronize_session=False)
+        deleted = session.query(models.Node).filter_by(id=node_id).\
+            delete(synchronize_session='fetch')
+
+    if not deleted:
+        raise exception.NotFound(
+            _('Attempt to delete a node with id "%s" that does not '
+              'exist failed') % node_id)
 
 
 # Locks
@@ -449,6 +722,45 @@ def cluster_get_policies(context, cluster_id):
     return policies
 
 
+def cluster_policy_get_all_by_type(context, policy_type):
+    '''
+    Get the bindings of the policies of the given type to any cluster.
+    '''
+    query = model_query(context, models.ClusterPolicies).\
+        join(models.Policy,
+             models.Policy.id == models.ClusterPolicies.policy_id).\
+        filter(models.Policy.type == policy_type).\
+        filter(models.Policy.deleted_time.is_(None))
+    return query.all()
+
+
+def cluster_get_policy(context, cluster_id, policy_id):
+    binding = model_query(context, models.ClusterPolicies).\
+        filter_by(cluster_id=cluster_id, policy_id=policy_id).first()
+    return binding
+
+
+def cluster_mark_policy_triggered(context, cluster_id, policy_id, timestamp,
+                                  since=None):
+    '''
+    Record that a policy triggered an action on a cluster at `timestamp`.
+
+    :param since: if given, the record is only made when the policy has not
+                  triggered anything after this time, which lets only one of
+                  several concurrent callers through.
+    :returns: True if the record was made.
+    '''
+    query = model_query(context, models.ClusterPolicies).\
+        filter_by(cluster_id=cluster_id, policy_id=policy_id)
+    if since is not None:
+        query = query.filter(sqlalchemy.or_(
+            models.ClusterPolicies.last_op.is_(None),
+            models.ClusterPolicies.last_op <= since))
+
+    rows = query.update({'last_op': timestamp}, synchronize_session='fetch')
+    return rows == 1
+
+
 def cluster_detach_policy(context, cluster_id, policy_id):
     binding = model_query(context, models.ClusterPolicies).\
         filter_by(cluster_id=cluster_id, policy_id=policy_id).first()
@@ -530,6 +842,16 @@ def profile_update(context, profile_id, values):
     return profile
 
 
+def profile_delete(context, profile_id):
+    profile = profile_get(context, profile_id)
+    session = orm_session.Session.object_session(profile)
+
+    # TODO(Qiming): Check if a profile is still in use, raise an exception
+    # if so
+    profile.soft_delete(session=session)
+    session.flush()
+
+
 # Events
 def _delete_event_rows(context, cluster_id, limit):
     # MySQL does not support LIMIT in subqueries,
@@ -562,13 +884,14 @@ def event_create(context, values):
     return event
 
 
-def event_get(context, event_id):
-    event = model_query(context, models.Event).get(event_id)
+def event_get(context, event_id, stale_ok=False):
+    event = model_query(context, models.Event, stale_ok=stale_ok).\
+        get(event_id)
     return event
 
 
-def event_get_all(context):
-    events = model_query(context, models.Event).all()
+def event_get_all(context, stale_ok=False):
+    events = model_query(context, models.Event, stale_ok=stale_ok).all()
     return events
 
 
@@ -621,15 +944,16 @@ def event_count_by_cluster(context, cid):
     return count
 
 
-def _events_by_cluster(context, cid):
-    query = model_query(context, models.Event).\
+def _events_by_cluster(context, cid, stale_ok=False):
+    query = model_query(context, models.Event, stale_ok=stale_ok).\
         filter_by(obj_id=cid, obj_type='CLUSTER')
     return query
 
 
 def event_get_all_by_cluster(context, cluster_id, limit=None, marker=None,
-                             sort_keys=None, sort_dir=None, filters=None):
-    query = _events_by_cluster(context, cluster_id)
+                             sort_keys=None, sort_dir=None, filters=None,
+                             stale_ok=False):
+    query = _events_by_cluster(context, cluster_id, stale_ok=stale_ok)
     return _events_filter_and_page_query(context, query, limit, marker,
                                          sort_keys, sort_dir, filters).all()
 
@@ -779,8 +1103,7 @@ def action_add_dependency(context, depended, dependent):
             _('Multiple dependencies between lists not support'))
 
     if isinstance(depended, list):   # e.g. D depends on A,B,C
-        session = get_session()
-        with session.begin():
+        with transaction(context):
             for d in depended:
                 _action_dependency_add(context, d, "depended_by", dependent)
 
@@ -794,8 +1117,7 @@ def action_add_dependency(context, depended, dependent):
     else:
         dependents = dependent
 
-    session = get_session()
-    with session.begin():
+    with transaction(context):
         _action_dependency_add(context, depended, "depended_by", dependent)
 
         for d in dependents:
@@ -809,8 +1131,7 @@ def action_del_dependency(context, depended, dependent):
             _('Multiple dependencies between lists not support'))
 
     if isinstance(depended, list):   # e.g. D depends on A,B,C
-        session = get_session()
-        with session.begin():
+        with transaction(context):
             for d in depended:
                 _action_dependency_del(context, d, "depended_by", dependent)
 
@@ -824,8 +1145,7 @@ def action_del_dependency(context, depended, dependent):
     else:
         dependents = dependent
 
-    session = get_session()
-    with session.begin():
+    with transaction(context):
         _action_dependency_del(context, depended, "depended_by", dependent)
 
         for d in dependents:
@@ -834,19 +1154,28 @@ def action_del_dependency(context, depended, dependent):
 
 
 def action_mark_succeeded(context, action_id):
-    query = model_query(context, models.Action)
-    action = query.get(action_id)
-    if not action:
-        raise exception.NotFound(
-            _('Action with id "%s" not found') % action_id)
+    '''
+    Mark an action succeeded and release the actions depending on it.
 
-    session = get_session()
-    with session.begin():
-        action.status = ACTION_SUCCEEDED
+    Raises ConcurrentUpdate if the action is changed by another party, e.g.
+    cancelled, while this is done.
+    '''
+    with transaction(context) as session:
+        action = model_query(context, models.Action).get(action_id)
+        if not action:
+            raise exception.NotFound(
+                _('Action with id "%s" not found') % action_id)
 
-        for a in action.depended_by['l']:
+        for a in _action_dependency_ids(action, 'depended_by'):
             _action_dependency_del(context, a, 'depends_on', action_id)
-        action.depended_by = {'l': []}
+
+        values = {
+            'status': ACTION_SUCCEEDED,
+            'depended_by': {'l': []},
+        }
+        _update_versioned(session, models.Action, action_id, values,
+                          action.version or 0)
+        action = session.query(models.Action).get(action_id)
 
     return action
 
@@ -857,22 +1186,119 @@ def action_mark_failed(context, action_id):
     pass
 
 
+def _action_dependency_ids(action, field):
+    if action[field] is None:
+        return []
+    return action[field].get('l', [])
+
+
+def _action_closure(session, action, field):
+    '''
+    Collect the IDs of all actions reachable from the given action by
+    following the given dependency field, one IN query per level.
+    '''
+    found = set()
+    todo = set(_action_dependency_ids(action, field))
+    while todo:
+        found.update(todo)
+        rows = session.query(models.Action).\
+            filter(models.Action.id.in_(todo)).all()
+        todo = set()
+        for row in rows:
+            todo.update(_action_dependency_ids(row, field))
+        todo -= found
+    return found
+
+
 def action_mark_cancelled(context, action_id):
-    # TODO(liuh): Cancel processing to be added
-    # TODO(liuh): Need mark all actions depending on it being cancelled
-    pass
+    '''
+    Mark an action cancelled, together with the actions it depends on (the
+    child actions created for it) and the actions depending on it, all
+    transitively and in one transaction.
+
+    Actions already completed are left untouched. The control flag of the
+    cancelled actions is set so that workers running them can stop.
+    Returns the IDs of the actions cancelled.
+    '''
+    with transaction(context) as session:
+        action = session.query(models.Action).get(action_id)
+        if not action:
+            raise exception.NotFound(
+                _('Action with id "%s" not found') % action_id)
+
+        action_ids = set([action_id])
+        action_ids.update(_action_closure(session, action, 'depends_on'))
+        action_ids.update(_action_closure(session, action, 'depended_by'))
+
+        query = session.query(models.Action).\
+            filter(models.Action.id.in_(action_ids)).\
+            filter(~models.Action.status.in_([ACTION_SUCCEEDED,
+                                              ACTION_FAILED,
+                                              ACTION_CANCELED]))
+        cancelled = [r.id for r in query.with_entities(models.Action.id)]
+        if cancelled:
+            values = {
+                'status': ACTION_CANCELED,
+                'status_reason': _('The action was cancelled.'),
+                'control': 'cancel',
+                'version': sqlalchemy.func.coalesce(models.Action.version,
+                                                    0) + 1,
+            }
+            session.query(models.Action).\
+                filter(models.Action.id.in_(cancelled)).\
+                update(values, synchronize_session=False)
+
+    return cancelled
+
+
+def action_mark_retrying(context, action_id, reason=None):
+    values = {
+        'retries': sqlalchemy.func.coalesce(models.Action.retries, 0) + 1,
+        'status_reason': reason or _('The action is waiting to be retried.'),
+        'version': sqlalchemy.func.coalesce(models.Action.version, 0) + 1,
+    }
+
+    with transaction(context) as session:
+        rows_affected = session.query(models.Action).\
+            filter_by(id=action_id).\
+            update(values, synchronize_session=False)
+        if not rows_affected:
+            raise exception.NotFound(
+                _('Action with id "%s" not found') % action_id)
+
+        action = session.query(models.Action).get(action_id)
+        session.refresh(action)
+
+    return action.retries
 
 
 def action_start_work_on(context, action_id, owner):
+    '''
+    Let an engine claim an action. Returns None if the action has been
+    claimed by another engine already.
+    '''
     action = model_query(context, models.Action).get(action_id)
     if not action:
         raise exception.NotFound(
             _('Action with id "%s" not found') % action_id)
 
-    action.owner = owner
-    action.status = ACTION_RUNNING
-    action.status_reason = _('The action is being processed.')
-    action.save(_session(context))
+    values = {
+        'owner': owner,
+        'status': ACTION_RUNNING,
+        'status_reason': _('The action is being processed.'),
+        'version': sqlalchemy.func.coalesce(models.Action.version, 0) + 1,
+    }
+    with transaction(context) as session:
+        count = session.query(models.Action).\
+            filter_by(id=action_id).\
+            filter(sqlalchemy.or_(models.Action.owner == None,  # noqa
+                                  models.Action.owner == owner)).\
+            update(values, synchronize_session=False)
+    if not count:
+        return None
+
+    action = session.query(models.Action).get(action_id)
+    session.refresh(action)
     return action
 
 
@@ -895,13 +1321,9 @@ def action_lock_check(context, action_id, owner=None):
 
 
 def action_control(context, action_id, value):
-    action = model_query(context, models.Action).get(action_id)
-    if not action:
-        raise exception.NotFound(
-            _('Action with id "%s" not found') % action_id)
-
-    action.control = value
-    action.save(_session(context))
+    with transaction(context) as session:
+        _update_versioned(session, models.Action, action_id,
+                          {'control': value})
 
 
 def action_control_check(context, action_id):
@@ -926,6 +1348,168 @@ def action_delete(context, action_id, force=False):
     action.delete()
 
 
+def action_reclaim_orphans(context, engine_ids, status):
+    '''
+    Release all running actions owned by the given engines.
+
+    The actions are set to the given status with their owner cleared and the
+    service records of the engines are removed, all in one transaction.
+    Returns the IDs of the actions reclaimed.
+    '''
+    if not engine_ids:
+        return []
+
+    with transaction(context) as session:
+        query = session.query(models.Action.id).\
+            filter(models.Action.owner.in_(engine_ids)).\
+            filter_by(status=ACTION_RUNNING)
+        action_ids = [r.id for r in query.all()]
+
+        if action_ids:
+            values = {
+                'owner': None,
+                'status': status,
+                'status_reason': _('The action was reclaimed from an engine '
+                                   'that has stopped responding.'),
+            }
+            session.query(models.Action).\
+                filter(models.Action.id.in_(action_ids)).\
+                update(values, synchronize_session=False)
+
+        session.query(models.Service).\
+            filter(models.Service.id.in_(engine_ids)).\
+            delete(synchronize_session=False)
+
+    return action_ids
+
+
+# Services
+def service_create(context, service_id, host=None, binary=None, topic=None):
+    time_now = timeutils.utcnow()
+    service = models.Service(id=service_id, host=host, binary=binary,
+                             topic=topic, created_time=time_now,
+                             updated_time=time_now)
+    service.save(_session(context))
+    return service
+
+
+def service_update(context, service_id, values=None):
+    service = model_query(context, models.Service).get(service_id)
+    if not service:
+        raise exception.NotFound(
+            _('Service with id "%s" not found') % service_id)
+
+    if values is None:
+        values = {}
+
+    values.update({'updated_time': timeutils.utcnow()})
+    service.update(values)
+    service.save(_session(context))
+    return service
+
+
+def service_delete(context, service_id):
+    session = _session(context)
+    session.query(models.Service).filter_by(id=service_id).\
+        delete(synchronize_session='fetch')
+
+
+def service_get(context, service_id):
+    return model_query(context, models.Service).get(service_id)
+
+
+def service_get_all(context):
+    return model_query(context, models.Service).all()
+
+
+def service_get_all_expired(context, lease):
+    deadline = timeutils.utcnow() - datetime.timedelta(seconds=lease)
+    query = model_query(context, models.Service).\
+        filter(models.Service.updated_time < deadline)
+    return query.all()
+
+
+# Shards
+def shard_get(context, shard_id):
+    return model_query(context, models.Shard).get(shard_id)
+
+
+def shard_get_all(context):
+    return model_query(context, models.Shard).\
+        order_by(models.Shard.id).all()
+
+
+def _shard_seed(num_shards):
+    '''
+    Create the shard rows not created yet. Engines starting at the same
+    time may do so concurrently, a shard created by another engine is
+    simply skipped.
+    '''
+    session = get_session()
+    existing = set(r.id for r in session.query(models.Shard.id))
+    for shard_id in range(num_shards):
+        if shard_id in existing:
+            continue
+        try:
+            with session.begin():
+                session.add(models.Shard(id=shard_id))
+        except db_exc.DBDuplicateEntry:
+            pass
+
+
+def shard_rebalance(context, engine_ids, num_shards):
+    '''
+    Spread `num_shards` shards evenly over the given engines, moving as
+    few shards as possible. Shards of engines not in the list are taken
+    over by the others.
+
+    The shard rows are locked while they are reassigned, so concurrent
+    rebalances are applied one after another.
+
+    Returns a dict mapping each engine ID to the list of its shard IDs.
+    '''
+    _shard_seed(num_shards)
+    with transaction(context) as session:
+        shards = session.query(models.Shard).with_for_update().\
+            populate_existing().\
+            order_by(models.Shard.id).all()
+        for shard in shards[num_shards:]:
+            session.delete(shard)
+        shards = shards[:num_shards]
+
+        owned = dict((e, []) for e in engine_ids)
+        free = []
+        for shard in shards:
+            if shard.engine_id in owned:
+                owned[shard.engine_id].append(shard)
+            else:
+                free.append(shard)
+
+        if not owned:
+            for shard in free:
+                shard.engine_id = None
+            return {}
+
+        # Engines owning most shards keep the extra ones, if any, so that
+        # fewer shards have to move
+        engines = sorted(owned, key=lambda e: (-len(owned[e]), e))
+        quota, extra = divmod(num_shards, len(engines))
+        quotas = dict((e, quota + (1 if i < extra else 0))
+                      for i, e in enumerate(engines))
+
+        for engine in engines:
+            while len(owned[engine]) > quotas[engine]:
+                free.append(owned[engine].pop())
+        for engine in engines:
+            while len(owned[engine]) < quotas[engine]:
+                shard = free.pop()
+                shard.engine_id = engine
+                owned[engine].append(shard)
+
+    return dict((e, sorted(s.id for s in shards))
+                for e, shards in owned.items())
+
+
 # Utils
 def db_sync(engine, version=None):
     """Migrate the database to `version` or the most recent version."""
@@ -56,6 +56,7 @@ def upgrade(migrate_engine):
         sqlalchemy.Column('status_reason', sqlalchemy.String(255)),
         sqlalchemy.Column('tags', types.Json),
         sqlalchemy.Column('data', types.Json),
+        sqlalchemy.Column('version', sqlalchemy.Integer, default=0),
         mysql_engine='InnoDB',
         mysql_charset='utf8'
     )
@@ -80,6 +81,7 @@ def upgrade(migrate_engine):
         sqlalchemy.Column('status_reason', sqlalchemy.String(255)),
         sqlalchemy.Column('tags', types.Json),
         sqlalchemy.Column('data', types.Json),
+        sqlalchemy.Column('version', sqlalchemy.Integer, default=0),
         mysql_engine='InnoDB',
         mysql_charset='utf8'
     )
@@ -132,6 +134,7 @@ def upgrade(migrate_engine):
         sqlalchemy.Column('cooldown', sqlalchemy.Integer),
         sqlalchemy.Column('level', sqlalchemy.Integer),
         sqlalchemy.Column('enabled', sqlalchemy.Boolean),
+        sqlalchemy.Column('last_op', sqlalchemy.DateTime),
         mysql_engine='InnoDB',
         mysql_charset='utf8'
     )
@@ -157,7 +160,10 @@ def upgrade(migrate_engine):
         sqlalchemy.Column('outputs', types.Json),
         sqlalchemy.Column('depends_on', types.Json),
         sqlalchemy.Column('depended_by', types.Json),
+        sqlalchemy.Column('retries', sqlalchemy.Integer, default=0),
+        sqlalchemy.Column('max_retries', sqlalchemy.Integer),
         sqlalchemy.Column('deleted_time', sqlalchemy.DateTime),
+        sqlalchemy.Column('version', sqlalchemy.Integer, default=0),
         mysql_engine='InnoDB',
         mysql_charset='utf8'
     )
@@ -181,6 +187,28 @@ def upgrade(migrate_engine):
         mysql_charset='utf8'
     )
 
+    service = sqlalchemy.Table(
+        'service', meta,
+        sqlalchemy.Column('id', sqlalchemy.String(36),
+                          primary_key=True, nullable=False),
+        sqlalchemy.Column('host', sqlalchemy.String(255)),
+        sqlalchemy.Column('binary', sqlalchemy.String(255)),
+        sqlalchemy.Column('topic', sqlalchemy.String(255)),
+        sqlalchemy.Column('created_time', sqlalchemy.DateTime),
+        sqlalchemy.Column('updated_time', sqlalchemy.DateTime),
+        mysql_engine='InnoDB',
+        mysql_charset='utf8'
+    )
+
+    shard = sqlalchemy.Table(
+        'shard', meta,
+        sqlalchemy.Column('id', sqlalchemy.Integer,
+                          primary_key=True, autoincrement=False),
+        sqlalchemy.Column('engine_id', sqlalchemy.String(36)),
+        mysql_engine='InnoDB',
+        mysql_charset='utf8'
+    )
+
     tables = (
         profile,
         cluster,
@@ -191,6 +219,8 @@ def upgrade(migrate_engine):
         cluster_policy,
         action,
         event,
+        service,
+        shard,
     )
 
     for index, table in enumerate(tables):
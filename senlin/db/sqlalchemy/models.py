@@ -105,6 +105,7 @@ class Cluster(BASE, SenlinBase, SoftDelete):
     status_reason = sqlalchemy.Column(sqlalchemy.String(255))
     tags = sqlalchemy.Column(types.Json)
     data = sqlalchemy.Column(types.Json)
+    version = sqlalchemy.Column(sqlalchemy.Integer, default=0)
 
 
 class Node(BASE, SenlinBase, SoftDelete):
@@ -131,6 +132,7 @@ class Node(BASE, SenlinBase, SoftDelete):
     status_reason = sqlalchemy.Column(sqlalchemy.String(255))
     tags = sqlalchemy.Column(types.Json)
     data = sqlalchemy.Column(types.Json)
+    version = sqlalchemy.Column(sqlalchemy.Integer, default=0)
 
 
 class ClusterLock(BASE, SenlinBase):
@@ -196,6 +198,8 @@ class ClusterPolicies(BASE, SenlinBase):
     cooldown = sqlalchemy.Column(sqlalchemy.Integer)
     level = sqlalchemy.Column(sqlalchemy.Integer)
     enabled = sqlalchemy.Column(sqlalchemy.Boolean)
+    # When the policy last triggered an action on the cluster
+    last_op = sqlalchemy.Column(sqlalchemy.DateTime)
 
 
 class Profile(BASE, SenlinBase, SoftDelete):
@@ -237,7 +241,34 @@ class Action(BASE, SenlinBase, SoftDelete):
     outputs = sqlalchemy.Column(types.Json)
     depends_on = sqlalchemy.Column(types.Json)
     depended_by = sqlalchemy.Column(types.Json)
+    retries = sqlalchemy.Column(sqlalchemy.Integer, default=0)
+    max_retries = sqlalchemy.Column(sqlalchemy.Integer)
     deleted_time = sqlalchemy.Column(sqlalchemy.DateTime)
+    version = sqlalchemy.Column(sqlalchemy.Integer, default=0)
+
+
+class Service(BASE, SenlinBase):
+    '''An engine service registered in the Senlin database.'''
+
+    __tablename__ = 'service'
+
+    id = sqlalchemy.Column('id', sqlalchemy.String(36), primary_key=True,
+                           nullable=False)
+    host = sqlalchemy.Column(sqlalchemy.String(255))
+    binary = sqlalchemy.Column(sqlalchemy.String(255))
+    topic = sqlalchemy.Column(sqlalchemy.String(255))
+    created_time = sqlalchemy.Column(sqlalchemy.DateTime)
+    updated_time = sqlalchemy.Column(sqlalchemy.DateTime)
+
+
+class Shard(BASE, SenlinBase):
+    '''A partition of the objects managed by engines, with its owner.'''
+
+    __tablename__ = 'shard'
+
+    id = sqlalchemy.Column('id', sqlalchemy.Integer, primary_key=True,
+                           autoincrement=False)
+    engine_id = sqlalchemy.Column(sqlalchemy.String(36))
 
 
 class Event(BASE, SenlinBase, SoftDelete):
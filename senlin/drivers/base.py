@@ -10,10 +10,43 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from oslo.config import cfg
+from oslo.utils import importutils
+
+# Driver classes of each backend, keyed by the service they talk to
+BACKENDS = {
+    'openstack': {
+        'heat': 'senlin.drivers.heat_v1.DriverHeatV1',
+        'lbaas': 'senlin.drivers.lbaas_v1.DriverLBaaSV1',
+    },
+    'fake': {
+        'heat': 'senlin.drivers.fake.FakeHeatV1',
+        'lbaas': 'senlin.drivers.fake.FakeLBaaSV1',
+    },
+}
+
 
 class DriverBase(object):
     '''
     Base class for all drivers.
     '''
-    def __init__(self):
-        pass
+    def __init__(self, context):
+        self.context = context
+
+
+def load(context, service):
+    '''
+    Get the driver of a service for the backend chosen by the
+    'cloud_backend' option.
+    '''
+    driver_class = importutils.import_class(
+        BACKENDS[cfg.CONF.cloud_backend][service])
+    return driver_class(context)
+
+
+def heat(context):
+    return load(context, 'heat')
+
+
+def lbaas(context):
+    return load(context, 'lbaas')
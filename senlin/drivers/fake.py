@@ -0,0 +1,203 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+'''
+Simulated cloud backend, for running the engine without any cloud, e.g.
+to measure its throughput.
+
+Operations take 'latency' seconds to complete and fail with the
+probability 'failure_rate', both set in the [fake_driver] section of the
+configuration. Each API call takes 'api_latency' seconds.
+'''
+
+import copy
+import random
+import time
+import uuid
+
+import eventlet
+from oslo.config import cfg
+
+from senlin.common import exception
+from senlin.common.i18n import _
+from senlin.drivers import base
+
+
+class FakeStack(object):
+    '''
+    A stack going through the Heat stack states.
+
+    The status of the last operation is derived from the time it started,
+    so no thread is needed to move stacks along.
+    '''
+
+    def __init__(self, stack_name, template, parameters):
+        self.id = str(uuid.uuid4())
+        self.stack_name = stack_name
+        self.template = template
+        self.parameters = parameters or {}
+        self.start('CREATE')
+
+    def start(self, action):
+        self.action = action
+        self.started = time.time()
+        self.fails = random.random() < cfg.CONF.fake_driver.failure_rate
+
+    @property
+    def status(self):
+        if time.time() < self.started + cfg.CONF.fake_driver.latency:
+            return 'IN_PROGRESS'
+        return 'FAILED' if self.fails else 'COMPLETE'
+
+    @property
+    def stack_status(self):
+        return '%s_%s' % (self.action, self.status)
+
+    @property
+    def stack_status_reason(self):
+        if self.status == 'FAILED':
+            return _('Simulated failure')
+        return _('Stack %s') % self.stack_status
+
+    @property
+    def deleted(self):
+        return self.action == 'DELETE' and self.status == 'COMPLETE'
+
+    @property
+    def outputs(self):
+        # A made-up address, stable for the stack
+        number = uuid.UUID(self.id).int
+        address = '10.%s.%s.%s' % ((number >> 16) % 256, (number >> 8) % 256,
+                                   number % 254 + 1)
+        return [{'output_key': 'address', 'output_value': address}]
+
+
+class FakeStackManager(object):
+    '''
+    In-memory stand-in for the stack manager of python-heatclient.
+    '''
+
+    def __init__(self):
+        self.stacks = {}
+
+    def _call(self):
+        if cfg.CONF.fake_driver.api_latency:
+            eventlet.sleep(cfg.CONF.fake_driver.api_latency)
+
+    def _get(self, stack_id, show_deleted=False):
+        stack = self.stacks.get(stack_id)
+        if stack is None or (stack.deleted and not show_deleted):
+            raise exception.NotFound(_('Stack %s not found') % stack_id)
+        return stack
+
+    def create(self, stack_name=None, template=None, parameters=None,
+               **kwargs):
+        self._call()
+        stack = FakeStack(stack_name, template, parameters)
+        self.stacks[stack.id] = stack
+        return {'stack': {'id': stack.id}}
+
+    def get(self, stack_id):
+        self._call()
+        return self._get(stack_id)
+
+    def list(self, filters=None, show_deleted=False, **kwargs):
+        self._call()
+        stack_ids = (filters or {}).get('id', list(self.stacks))
+        if not isinstance(stack_ids, list):
+            stack_ids = [stack_ids]
+        return [self.stacks[i] for i in stack_ids
+                if i in self.stacks and
+                (show_deleted or not self.stacks[i].deleted)]
+
+    def update(self, stack_id, template=None, parameters=None,
+               existing=False, clear_parameters=None, **kwargs):
+        self._call()
+        stack = self._get(stack_id)
+        if template is not None:
+            stack.template = template
+        if parameters is not None:
+            if not existing:
+                stack.parameters = {}
+            stack.parameters.update(parameters)
+        for name in clear_parameters or []:
+            stack.parameters.pop(name, None)
+        stack.start('UPDATE')
+
+    def delete(self, stack_id):
+        self._call()
+        self._get(stack_id).start('DELETE')
+
+    def template(self, stack_id):
+        self._call()
+        return copy.deepcopy(self._get(stack_id).template)
+
+    def validate(self, template=None, **kwargs):
+        self._call()
+        if not template:
+            raise exception.Error(_('The template is empty'))
+        return {'Parameters': template.get('parameters', {})}
+
+
+class FakePoolManager(object):
+    '''
+    In-memory load-balancer pools.
+
+    The number of reconfigurations of each pool is counted in `updates`.
+    '''
+
+    def __init__(self):
+        # pool_id -> {member_id: (address, protocol_port)}
+        self.pools = {}
+        self.updates = {}
+
+    def update_members(self, pool_id, add=None, remove=None):
+        if cfg.CONF.fake_driver.api_latency:
+            eventlet.sleep(cfg.CONF.fake_driver.api_latency)
+
+        members = self.pools.setdefault(pool_id, {})
+        added = {}
+        for m in add or []:
+            member_id = str(uuid.uuid4())
+            members[member_id] = (m['address'], m['protocol_port'])
+            added[m['node_id']] = member_id
+        for member_id in remove or []:
+            members.pop(member_id, None)
+
+        self.updates[pool_id] = self.updates.get(pool_id, 0) + 1
+        return added
+
+
+# The simulated cloud, shared by all the drivers of the process
+_stack_manager = FakeStackManager()
+_pool_manager = FakePoolManager()
+
+
+class FakeHeatV1(base.DriverBase):
+    '''
+    Heat V1 driver backed by the simulated cloud.
+    '''
+    def __init__(self, context):
+        super(FakeHeatV1, self).__init__(context)
+        self.stacks = _stack_manager
+
+
+class FakeLBaaSV1(base.DriverBase):
+    '''
+    LBaaS V1 driver backed by the simulated cloud.
+    '''
+    def __init__(self, context):
+        super(FakeLBaaSV1, self).__init__(context)
+        self.pools = _pool_manager
+
+    def update_members(self, pool_id, add=None, remove=None):
+        return self.pools.update_members(pool_id, add=add, remove=remove)
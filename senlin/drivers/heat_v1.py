@@ -11,11 +11,22 @@
 # under the License.
 
 from senlin.drivers import base
+from senlin.engine import clients
+
 
 class DriverHeatV1(base.DriverBase):
     '''
-    Base class for Heat V1 drivers.
+    Driver for the Heat V1 API.
+
+    Stacks are managed through the `stacks` attribute, which provides the
+    create, get, list, update, delete, template and validate calls of the
+    python-heatclient stack manager. Other Heat V1 drivers must provide
+    the same calls.
     '''
-    def __init__(self):
-        super(DriverHeatV1, self).__init()
-        pass
+    def __init__(self, context):
+        super(DriverHeatV1, self).__init__(context)
+        self.hc = clients.heat(context)
+
+    @property
+    def stacks(self):
+        return self.hc.stacks
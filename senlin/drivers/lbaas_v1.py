@@ -0,0 +1,60 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from neutronclient.common import exceptions as neutron_exc
+
+from senlin.drivers import base
+from senlin.engine import clients
+from senlin.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class DriverLBaaSV1(base.DriverBase):
+    '''
+    Driver for the members of Neutron LBaaS V1 pools.
+
+    Other LBaaS drivers must provide the same update_members call.
+    '''
+    def __init__(self, context):
+        super(DriverLBaaSV1, self).__init__(context)
+        self.nc = clients.neutron(context)
+
+    def update_members(self, pool_id, add=None, remove=None):
+        '''
+        Change the members of a pool at once.
+
+        :param add: a list of dicts with the 'node_id', 'address' and
+                    'protocol_port' of each member to add;
+        :param remove: a list of IDs of members to remove.
+        :returns: a dict mapping the node IDs of the added members to their
+                  member IDs.
+        '''
+        added = {}
+        if add:
+            # All new members are created with one bulk request
+            body = {'members': [{'pool_id': pool_id,
+                                 'address': m['address'],
+                                 'protocol_port': m['protocol_port']}
+                                for m in add]}
+            res = self.nc.create_member(body)
+            for m, member in zip(add, res['members']):
+                added[m['node_id']] = member['id']
+
+        for member_id in remove or []:
+            try:
+                self.nc.delete_member(member_id)
+            except neutron_exc.NotFound:
+                LOG.debug('Member %s of pool %s is already gone' % (
+                          member_id, pool_id))
+
+        return added
@@ -17,12 +17,22 @@ from oslo.config import cfg
 
 from senlin.common import exception
 from senlin.common.i18n import _
+from senlin.common.i18n import _LI
 from senlin.db import api as db_api
+from senlin.engine import cooldown
+from senlin.engine import dag
 from senlin.engine import dispatcher
+from senlin.engine import event as events
 from senlin.engine import node as nodes
+from senlin.engine import policy_chain
 from senlin.engine import scheduler
 from senlin.openstack.common import log as logging
 from senlin.policies import base as policies
+from senlin.policies import deletion_policy
+from senlin.policies import placement_policy
+from senlin.policies import scaling_policy
+from senlin.policies import update_policy
+from senlin.profiles.os.heat import composite
 
 LOG = logging.getLogger(__name__)
 
@@ -78,6 +88,8 @@ class Action(object):
 
         self.context = copy.deepcopy(context)
 
+        self.id = kwargs.get('id', None)
+        self.name = kwargs.get('name', '')
         self.description = kwargs.get('description', '')
 
         # Target is the ID of a cluster, a node, a profile
@@ -124,13 +136,25 @@ class Action(object):
         self.depends_on = kwargs.get('depends_on', [])
         self.depended_by = kwargs.get('depended_by', [])
 
-    def store(self):
+        # Number of retries done so far and the retry budget of the action
+        self.retries = kwargs.get('retries') or 0
+        self.max_retries = kwargs.get('max_retries', None)
+        if self.max_retries is None:
+            self.max_retries = cfg.CONF.action_max_retries
+
+        self.deleted_time = kwargs.get('deleted_time', None)
+
+    def store(self, context=None):
         '''
         Store the action record into database table.
+
+        :param context: the context whose DB session is used, e.g. to
+                        store the action in a transaction of the caller;
+                        the context of the action by default.
         '''
         values = {
             'name': self.name,
-            'context': self.context,
+            'context': self.context.to_dict(),
             'target': self.target,
             'action': self.action,
             'cause': self.cause,
@@ -145,10 +169,14 @@ class Action(object):
             'outputs': self.outputs,
             'depends_on': self.depends_on,
             'depended_by': self.depended_by,
+            'retries': self.retries,
+            'max_retries': self.max_retries,
             'deleted_time': self.deleted_time,
         }
 
-        action = db_api.action_create(self.context, self.id, values)
+        if self.id:
+            values['id'] = self.id
+        action = db_api.action_create(context or self.context, values)
         self.id = action.id
         return self.id
 
@@ -176,6 +204,8 @@ class Action(object):
             'outputs': record.outputs,
             'depends_on': record.depends_on,
             'depended_by': record.depended_by,
+            'retries': record.retries,
+            'max_retries': record.max_retries,
             'deleted_time': record.deleted_time,
         }
 
@@ -206,16 +236,48 @@ class Action(object):
     def cancel(self):
         return NotImplemented
 
+    def policy_check(self, cluster_id, phase):
+        '''
+        Run the pre_op (phase 'BEFORE') or post_op (phase 'AFTER') checks
+        of the policies attached to the cluster which target this action.
+        Returns False if any of the policies rejects the action.
+        '''
+        chain = policy_chain.get_chain(self.context, cluster_id)
+        for policy in chain.get(self.context, phase, self.action):
+            if phase == chain.BEFORE:
+                res = policy.pre_op(cluster_id, self.action,
+                                    inputs=self.inputs)
+            else:
+                res = policy.post_op(cluster_id, self.action,
+                                     inputs=self.inputs)
+
+            if res is False:
+                LOG.info(_('Action %(action)s rejected by policy %(policy)s '
+                           'in phase %(phase)s') % {
+                               'action': self.action,
+                               'policy': policy.id,
+                               'phase': phase})
+                return False
+
+        return True
+
     def set_status(self, status):
         '''
         Set action status.
         This is not merely about a db record update.
         '''
         if status == self.SUCCEEDED:
-            db_api.action_mark_succeeded(self.context, self.id)
+            try:
+                db_api.action_mark_succeeded(self.context, self.id)
+            except exception.ConcurrentUpdate:
+                # Changed meanwhile, e.g. cancelled, which takes precedence
+                LOG.info(_LI('Action %s was changed before it could be '
+                             'marked succeeded'), self.id)
+                self.get_status()
+                return
         elif status == self.FAILED:
             db_api.action_mark_failed(self.context, self.id)
-        elif status == self.CANCELLED:
+        elif status == self.CANCELED:
             db_api.action_mark_cancelled(self.context, self.id)
 
         self.status = status
@@ -263,31 +325,35 @@ class ClusterAction(Action):
             db_api.cluster_lock_release(cluster.id, self.id)
             return self.RES_ERROR
 
+        # All nodes and their actions are recorded in one transaction
         action_list = []
-        for m in range(cluster.size):
-            name = 'node-%003d' % m
-            node = nodes.Node(name, cluster.profile_id, cluster.id)
-            node.store()
-            kwargs = {
-                'name': 'node-create-%003d' % m,
-                'context': self.context,
-                'target': node.id,
-                'cause': 'Cluster creation',
-            }
+        with db_api.transaction(self.context):
+            for m in range(cluster.size):
+                name = 'node-%003d' % m
+                node = nodes.Node(self.context, name, cluster.profile_id,
+                                  cluster_id=cluster.id, index=m)
+                node.store()
+                kwargs = {
+                    'name': 'node-create-%003d' % m,
+                    'context': self.context,
+                    'target': node.id,
+                    'cause': 'Cluster creation',
+                    'status': self.READY,
+                }
 
-            action = Action(self.context, 'NODE_CREATE', **kwargs)
-            action_list.append(action)
-            action.set_status(self.READY)
+                action = Action(self.context, 'NODE_CREATE', **kwargs)
+                action.store(self.context)
+                action_list.append(action)
 
-            # add new action to waiting/dependency list
-            db_api.action_add_dependency(action, self)
+            # This action waits for all the node actions
+            if action_list:
+                db_api.action_add_dependency(self.context,
+                                             [a.id for a in action_list],
+                                             self.id)
 
         # Notify dispatcher
         for action in action_list:
-            dispatcher.notify(self.context,
-                              dispatcher.Dispatcher.NEW_ACTION,
-                              None,
-                              action_id=action.id)
+            dispatcher.start_action(self.context, action.id, self.target)
 
         # Wait for cluster creating complete
         # TODO: need db support
@@ -332,43 +398,111 @@ class ClusterAction(Action):
         # gradually each time a node update action finished. This helps
         # us to track the progress of cluster updating. 
         # (TODO) update this comment
-        res = cluster.do_update(self.context, profile_id=new_profile_id)
+        res = cluster.do_update(self.context, new_profile_id)
         if not res:
             cluster.set_status(cluster.ACTIVE,
                                'Cluster updating was not executed')
             db_api.cluster_lock_release(cluster.id, self.id)
             return self.RES_ERROR
 
-        # Create NodeActions for all nodes
-        action_list = []
         node_list = cluster.get_nodes()
-        for node_id in node_list:
-            kwargs = {
-                'name': 'node-update-%s' % node_id,
-                'context': self.context,
-                'target': node_id,
-                'cause': 'Cluster update',
-                'inputs': {
-                    'new_profile_id': new_profile_id,
+        batches, pause_time = self._get_update_plan(cluster, node_list)
+
+        # The NodeActions of a batch are created while the previous batch is
+        # running, so that a batch can start as soon as the previous one is
+        # done.
+        next_actions = self._prepare_update_batch(batches[0], new_profile_id)
+        for index in range(len(batches)):
+            action_list = next_actions
+            self._start_update_batch(action_list)
+
+            next_actions = []
+            if index + 1 < len(batches):
+                next_actions = self._prepare_update_batch(batches[index + 1],
+                                                          new_profile_id)
+
+            if action_list:
+                res = self._wait_update_batch(cluster, old_profile_id)
+            else:
+                # An empty batch adds no dependency, this action would
+                # never become READY again
+                res = self.RES_OK
+            if res != self.RES_OK:
+                # Drop the actions of the batch not started yet
+                for action in next_actions:
+                    db_api.action_delete(self.context, action.id)
+                return res
+
+            events.info(self.context, cluster, self.action,
+                        cluster.UPDATING,
+                        reason=_('Batch %(index)s of %(total)s updated '
+                                 '(%(count)s nodes)') % {
+                                     'index': index + 1,
+                                     'total': len(batches),
+                                     'count': len(action_list)})
+
+            if next_actions and pause_time:
+                scheduler.reschedule(self, sleep_time=pause_time)
+
+        # Cluster updating finished, set its status
+        # to active and release lock
+        cluster.set_status(cluster.ACTIVE, 'Cluster updating completed')
+        db_api.cluster_lock_release(cluster.id, self.id)
+
+        return self.RES_OK
+
+    def _get_update_plan(self, cluster, node_list):
+        '''
+        Get the batches of nodes to update and the seconds to pause between
+        two batches from the update policy of the cluster. Without such a
+        policy, all nodes are updated at once.
+        '''
+        policy = self._get_policy(cluster, update_policy.UpdatePolicy)
+        if policy is None:
+            return [node_list], 0
+
+        batches = policy.enforce(cluster.id, self, nodes=node_list)
+        return batches or [[]], policy.pause_time
+
+    def _prepare_update_batch(self, node_list, new_profile_id):
+        '''
+        Create the NodeActions updating a batch of nodes, READY but not
+        started yet.
+        '''
+        action_list = []
+        with db_api.transaction(self.context):
+            for node_id in node_list:
+                kwargs = {
+                    'name': 'node-update-%s' % node_id,
+                    'context': self.context,
+                    'target': node_id,
+                    'cause': 'Cluster update',
+                    'status': self.READY,
+                    'inputs': {
+                        'new_profile_id': new_profile_id,
+                    }
                 }
-            }
-            action = Action(self.context, 'NODE_UPDATE', **kwargs)
-            action_list.append(action)
-            action.set_status(self.READY)
+                action = Action(self.context, 'NODE_UPDATE', **kwargs)
+                action.store(self.context)
+                action_list.append(action)
 
-            # add new action to waiting/dependency list
-            # TODO: need db_api support
-            db_api.action_add_dependency(action, self)
+        return action_list
+
+    def _start_update_batch(self, action_list):
+        if not action_list:
+            return
+
+        # This action waits for all actions of the batch
+        db_api.action_add_dependency(self.context,
+                                     [a.id for a in action_list],
+                                     self.id)
 
         # Notify dispatcher
         for action in action_list:
-            dispatcher.notify(self.context,
-                              dispatcher.Dispatcher.NEW_ACTION,
-                              None,
-                              action_id=action.id)
+            dispatcher.start_action(self.context, action.id, self.target)
 
-        # Wait for cluster updating complete
-        # TODO: need db support
+    def _wait_update_batch(self, cluster, old_profile_id):
+        # Wait for the actions of current batch to complete
         while self.get_status() != self.READY:
             if scheduler.action_cancelled(self):
                 # During this period, if cancel request come,
@@ -385,54 +519,27 @@ class ClusterAction(Action):
                 return self.RES_TIMEOUT
 
             # Continue waiting (with sleep)
-            scheduler.reschedule(self, sleep=0)
-
-        # Cluster updating finished, set its status
-        # to active and release lock
-        cluster.set_status(cluster.ACTIVE, 'Cluster updating completed')
-        db_api.cluster_lock_release(cluster.id, self.id)
+            scheduler.reschedule(self, sleep_time=0)
 
         return self.RES_OK
 
     def _cancel_update(self, cluster, old_profile_id):
+        # Cancel this action together with all the node actions created for
+        # it in one DB transaction, then notify all dispatchers with one
+        # message. Node actions already completed are not affected.
+        dispatcher.cancel(self.context, self.id)
+
+        # Restore nodes already updated to the old profile
         node_list = cluster.get_nodes()
         for node_id in node_list:
-            # We try to search node related action in DB
-            # TODO: we need a new db_api interface here
-            node_action = db_api.action_get_by_target(node_id)
-            if not node_action:
-                # Node action doesn't exist which means this
-                # action has been executed successfully, we
-                # don't do anything to it
-                continue
-            elif db_api.action_lock_check(self.context, node_action.id):
-                # If node action exist and is now in progress,
-                # try to cancel it.
-                scheduler.cancel_action(self.context, node_action.id)
-            else:
-                # Node action exist and not been locked,
-                # try to lock it and remove it from DB.
-
-                # Just use action_id as the owner_id when lock action
-                action = db_api.action_start_work_on(self.context,
-                                                     node_action.id,
-                                                     node_action.id)
-                if action:
-                    # Get lock successfully, delete this action
-                    db_api.action_delete(action.id)
-                else:
-                    # Action is locked by other worker, cancel it
-                    scheduler.cancel_action(self.context, action.id)
-
-            # Restore node obj
-            node = db_api.node_get(self.context, node_id)
-            node.do_update(self.context, profile_id=old_profile_id)
+            node = nodes.Node.load(self.context, node_id)
+            node.do_update(old_profile_id)
 
         # We don't wait for node action cancel finishing
         # TODO: may need more discussion
 
         # Restore cluster based on old profile
-        res = cluster.do_update(self.context, profile_id=old_profile_id)
+        res = cluster.do_update(self.context, old_profile_id)
 
         cluster.set_status(cluster.UPDATE_CANCELLED)
         db_api.cluster_lock_release(cluster.id, self.id)
@@ -447,7 +554,7 @@ class ClusterAction(Action):
         if worker_id != self.id:
             # Lock cluster failed, other action of this cluster
             # is in progress, try to cancel it.
-            scheduler.cancel_action(self.context, worker_id)
+            dispatcher.cancel(self.context, worker_id)
 
             # Sleep until this action get the lock or timeout
             while db_api.cluster_lock_create(cluster.id, self.id) != self.id:
@@ -478,10 +585,7 @@ class ClusterAction(Action):
 
         # Notify dispatcher
         for action in action_list:
-            dispatcher.notify(self.context,
-                              dispatcher.Dispatcher.NEW_ACTION,
-                              None,
-                              action_id=action.id)
+            dispatcher.start_action(self.context, action.id, self.target)
 
         # Wait for cluster creating complete
         # TODO: need db supportting dependency based status management
@@ -506,6 +610,10 @@ class ClusterAction(Action):
             # Continue waiting (with sleep)
             scheduler.reschedule(self, sleep=0)
 
+        # The stack shared by the members of resource-style profiles, if
+        # any, holds nothing but the resources of nodes not deleted now
+        composite.delete_cluster_stack(self.context, cluster.id)
+
         # Cluster is deleted successfully, set its
         # status to DELETE and release the lock.
         cluster.do_delete(self.context)
@@ -513,17 +621,196 @@ class ClusterAction(Action):
 
         return self.RES_OK
 
+    def _get_policy(self, cluster, policy_class):
+        '''
+        Get the enabled policy of the given class attached to the cluster,
+        or None if there isn't one.
+        '''
+        chain = policy_chain.get_chain(self.context, cluster.id)
+        return chain.find(self.context, self.action, policy_class)
+
+    def _run_node_actions(self, action, node_list, **inputs):
+        '''
+        Run a NodeAction on each of the given nodes, at most
+        max_parallel_node_operations of them at the same time.
+
+        :returns: the IDs of the nodes on which the action succeeded.
+        '''
+        graph = dag.Graph()
+        for node_id in node_list:
+            graph.add_node(node_id)
+
+        def run(node_id):
+            kwargs = {
+                'name': '%s-%s' % (action.lower(), node_id),
+                'context': self.context,
+                'target': node_id,
+                'cause': self.action,
+                'inputs': inputs,
+            }
+            return Action(self.context, action, **kwargs).execute()
+
+        statuses = dag.execute(
+            graph, run,
+            max_workers=cfg.CONF.max_parallel_node_operations,
+            cancelled=lambda: scheduler.action_cancelled(self))
+        return [n for n in node_list
+                if statuses[n] == dag.DAGExecutor.SUCCEEDED]
+
+    def _resize(self, cluster, action, get_nodes, **inputs):
+        '''
+        Lock the cluster and run a node action on all the nodes returned by
+        get_nodes in parallel, then update the size of the cluster once, by
+        the number of nodes added or removed.
+
+        The nodes are chosen, or stored, only once the cluster is locked, so
+        that concurrent resizings never work on the same nodes.
+        '''
+        # Try to lock cluster first
+        worker_id = db_api.cluster_lock_create(cluster.id, self.id)
+        if worker_id != self.id:
+            LOG.debug('Cluster has been locked by action %s' % worker_id)
+            return self.RES_CANCEL
+
+        try:
+            node_list = get_nodes()
+            done = self._run_node_actions(action, node_list, **inputs)
+            if action in (NodeAction.NODE_CREATE,
+                          NodeAction.NODE_JOIN_CLUSTER):
+                delta = 1
+            else:
+                delta = -1
+
+            # Nodes joining or leaving have already been counted when they
+            # moved, created and deleted nodes are counted all at once. The
+            # nodes keep the counts of their zones themselves.
+            if done and action in (NodeAction.NODE_CREATE,
+                                   NodeAction.NODE_DELETE):
+                db_api.cluster_increment(self.context, cluster.id,
+                                         size=delta * len(done))
+
+            if action == NodeAction.NODE_CREATE:
+                self._drop_nodes_not_created(set(node_list) - set(done))
+
+            if len(done) == len(node_list):
+                res = self.RES_OK
+                cluster.set_status(cluster.ACTIVE,
+                                   'Cluster resizing completed')
+            elif scheduler.action_cancelled(self):
+                res = self.RES_CANCEL
+                cluster.set_status(cluster.ACTIVE,
+                                   'Cluster resizing cancelled')
+            else:
+                res = self.RES_ERROR
+                cluster.set_status(cluster.ERROR,
+                                   '%s failed on %s of %s nodes' % (
+                                       action, len(node_list) - len(done),
+                                       len(node_list)))
+            return res
+        finally:
+            db_api.cluster_lock_release(cluster.id, self.id)
+
+    def _drop_nodes_not_created(self, node_ids):
+        '''
+        Delete the records of new nodes whose creation failed or was
+        cancelled before they got a physical object, so that no member is
+        left out of the size of the cluster.
+        '''
+        for node_id in node_ids:
+            if not db_api.node_get(self.context, node_id).physical_id:
+                db_api.node_delete(self.context, node_id)
+
     def do_add_nodes(self, cluster):
-        return self.RES_OK
+        node_list = self.inputs.get('nodes', [])
+        return self._resize(cluster, NodeAction.NODE_JOIN_CLUSTER,
+                            lambda: node_list, cluster_id=cluster.id)
+
+    def _get_victims(self, cluster):
+        '''
+        Get the nodes removed by a node deletion or a scale-down: those
+        given in the inputs, or else those chosen by the deletion policy
+        of the cluster.
+
+        The victims are kept in the inputs, so that they are chosen once,
+        before the policies are checked, and the policies know which nodes
+        are going away.
+        '''
+        node_list = self.inputs.get('nodes', None)
+        if node_list is not None:
+            return node_list
+
+        if self.action == self.CLUSTER_SCALE_DOWN:
+            count = self._get_scaling_count(cluster)
+        else:
+            count = self.inputs.get('count', 1)
+
+        # Choose all the victims at once
+        policy = self._get_policy(cluster, deletion_policy.DeletionPolicy)
+        if policy is not None:
+            node_list = policy.enforce(cluster.id, self, count=count)
+        else:
+            node_list = cluster.get_nodes()[-count:] if count else []
+
+        self.inputs['nodes'] = node_list
+        return node_list
+
+    def _get_members(self, cluster, node_list):
+        '''
+        Get the given nodes which are still members of the cluster, victims
+        being chosen before the cluster is locked.
+        '''
+        members = set(cluster.get_nodes())
+        return [n for n in node_list if n in members]
 
     def do_del_nodes(self, cluster):
-        return self.RES_OK
+        node_list = self._get_victims(cluster)
+        return self._resize(cluster, NodeAction.NODE_LEAVE_CLUSTER,
+                            lambda: self._get_members(cluster, node_list))
+
+    def _get_scaling_count(self, cluster):
+        count = self.inputs.get('count', None)
+        if count is None:
+            policy = self._get_policy(cluster, scaling_policy.ScalingPolicy)
+            if policy is not None:
+                count = policy.enforce(cluster.id, self, size=cluster.size)
+            else:
+                count = 1
+        return count
 
     def do_scale_up(self, cluster):
-        return self.RES_OK
+        count = self._get_scaling_count(cluster)
+
+        def get_nodes():
+            placements = [{}] * count
+            policy = self._get_policy(cluster,
+                                      placement_policy.PlacementPolicy)
+            if policy is not None:
+                placements = policy.enforce(cluster.id, self, count=count)
+
+            # Indexes are allocated at once, so concurrent scalings don't
+            # give the same index twice
+            record = db_api.cluster_increment(self.context, cluster.id,
+                                              next_index=len(placements))
+            first = record.next_index - len(placements)
+
+            node_list = []
+            with db_api.transaction(self.context):
+                for m, placement in enumerate(placements):
+                    index = first + m
+                    data = {'placement': placement} if placement else {}
+                    node = nodes.Node(self.context, 'node-%003d' % index,
+                                      cluster.profile_id,
+                                      cluster_id=cluster.id, index=index,
+                                      data=data)
+                    node_list.append(node.store())
+            return node_list
+
+        return self._resize(cluster, NodeAction.NODE_CREATE, get_nodes)
 
     def do_scale_down(self, cluster):
-        return self.RES_OK
+        node_list = self._get_victims(cluster)
+        return self._resize(cluster, NodeAction.NODE_DELETE,
+                            lambda: self._get_members(cluster, node_list))
 
     def do_attach_policy(self, cluster):
         policy_id = self.inputs.get('policy_id', None)
@@ -549,11 +836,22 @@ class ClusterAction(Action):
 
         db_api.cluster_attach_policy(self.context, cluster.id, policy_id,
                                      values)
-
-        cluster.rt.policies.append(policy)
+        policy_chain.invalidate(cluster.id)
+        cooldown.forget(cluster.id, policy_id)
+        if values['enabled']:
+            policy.attach(cluster.id)
         return self.RES_OK
 
     def do_detach_policy(self, cluster):
+        policy_id = self.inputs.get('policy_id', None)
+        if policy_id is None:
+            raise exception.PolicyNotSpecified()
+
+        policy = policies.load(self.context, policy_id)
+        db_api.cluster_detach_policy(self.context, cluster.id, policy_id)
+        policy_chain.invalidate(cluster.id)
+        cooldown.forget(cluster.id, policy_id)
+        policy.detach(cluster.id)
         return self.RES_OK
 
     def execute(self, **kwargs):
@@ -562,6 +860,12 @@ class ClusterAction(Action):
         if not cluster:
             return self.RES_ERROR
 
+        if self.action in (self.CLUSTER_DEL_NODES, self.CLUSTER_SCALE_DOWN):
+            self._get_victims(cluster)
+
+        if not self.policy_check(cluster.id, policy_chain.PolicyChain.BEFORE):
+            return self.RES_ERROR
+
         if self.action == self.CLUSTER_CREATE:
             res = self.do_create(cluster)
         elif self.action == self.CLUSTER_UPDATE:
@@ -582,6 +886,10 @@ class ClusterAction(Action):
         elif self.action == self.CLUSTER_DETACH_POLICY:
             res = self.do_detach_policy(cluster)
 
+        if res == self.RES_OK and not self.policy_check(
+                cluster.id, policy_chain.PolicyChain.AFTER):
+            return self.RES_ERROR
+
         return res
 
     def cancel(self):
@@ -594,10 +902,10 @@ class NodeAction(Action):
     '''
     ACTIONS = (
         NODE_CREATE, NODE_DELETE, NODE_UPDATE,
-        NODE_JOIN_CLUSTER, NODE_LEAVE_CLUSTER,
+        NODE_JOIN_CLUSTER, NODE_LEAVE_CLUSTER, NODE_RECOVER,
     ) = (
         'NODE_CREATE', 'NODE_DELETE', 'NODE_UPDATE',
-        'NODE_JOIN_CLUSTER', 'NODE_LEAVE_CLUSTER',
+        'NODE_JOIN_CLUSTER', 'NODE_LEAVE_CLUSTER', 'NODE_RECOVER',
     )
 
     def __init__(self, context, action, **kwargs):
@@ -625,6 +933,8 @@ class NodeAction(Action):
             res = node.do_join(new_cluster_id)
         elif self.action == self.NODE_LEAVE_CLUSTER:
             res = node.do_leave()
+        elif self.action == self.NODE_RECOVER:
+            res = node.do_recover()
 
         return self.RES_OK if res else self.RES_ERROR
 
@@ -665,14 +975,16 @@ class PolicyAction(Action):
         self.store(start_time=datetime.datetime.utcnow(),
                    status=self.RUNNING)
 
-        cluster_id = kwargs.get('cluster_id')
-        policy_id = kwargs.get('policy_id')
+        cluster_id = kwargs.get('cluster_id', self.cluster_id)
+        policy_id = kwargs.get('policy_id', self.policy_id)
 
         # an ENABLE/DISABLE action only changes the database table
         if self.action == self.POLICY_ENABLE:
-            db_api.cluster_enable_policy(cluster_id, policy_id)
+            db_api.cluster_enable_policy(self.context, cluster_id, policy_id)
+            policy_chain.invalidate(cluster_id)
         elif self.action == self.POLICY_DISABLE:
-            db_api.cluster_disable_policy(cluster_id, policy_id)
+            db_api.cluster_disable_policy(self.context, cluster_id, policy_id)
+            policy_chain.invalidate(cluster_id)
         else:  # self.action == self.UPDATE:
             # There is not direct way to update a policy because the policy
             # might be shared with another cluster, instead, we clone a new
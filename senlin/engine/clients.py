@@ -0,0 +1,188 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+'''
+Process wide cache of OpenStack service clients.
+
+Clients are keyed by the credentials they are built from, so that all the
+profiles working on behalf of the same user share one client, and the
+HTTP connections kept by its session.
+'''
+
+import calendar
+import hashlib
+import time
+
+from heatclient import client as heat_client
+from keystoneclient.auth.identity import v2 as identity_v2
+from keystoneclient import session as keystone_session
+from neutronclient.v2_0 import client as neutron_client
+from oslo.config import cfg
+import six
+
+from senlin.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+_cache = None
+
+# Seconds before its expiry a token is no longer used for new requests
+_TOKEN_EXPIRY_MARGIN = 30
+
+
+class ClientCache(object):
+    '''
+    Clients keyed by credentials, each of them kept for `ttl` seconds, or
+    until shortly before the token it was built on expires if sooner.
+    '''
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        # key -> (expiry time, client)
+        self._clients = {}
+
+    def get(self, key, create):
+        '''
+        Get the client cached for a key, or a new one from `create()`.
+
+        :param create: a callable returning a new client and the time its
+                       token expires at, None if the client renews its
+                       token by itself.
+        '''
+        now = time.time()
+        entry = self._clients.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        client, token_expiry = create()
+        expiry = now + self.ttl
+        if token_expiry is not None:
+            expiry = min(expiry, token_expiry - _TOKEN_EXPIRY_MARGIN)
+        if expiry > now:
+            self._clients[key] = (expiry, client)
+        self._purge(now)
+        return client
+
+    def _purge(self, now):
+        for key, (expiry, client) in list(self._clients.items()):
+            if expiry <= now:
+                del self._clients[key]
+
+    def clear(self):
+        self._clients.clear()
+
+
+def initialise():
+    global _cache
+
+    if _cache is None:
+        _cache = ClientCache(cfg.CONF.client_cache_ttl)
+
+
+def cache_key(context):
+    '''
+    The identity a client is built from. The password, or else the token,
+    is part of it as a hash, so that a context carrying the credentials of
+    a profile never gets the client of the requester, or vice versa.
+    '''
+    secret = context.password or context.auth_token or ''
+    if isinstance(secret, six.text_type):
+        secret = secret.encode('utf-8')
+    return (context.auth_url, context.tenant_id, context.user_id,
+            context.username, context.region_name,
+            hashlib.sha256(secret).hexdigest())
+
+
+def _get_client_option(client, option):
+    # Client specific options override the options of all clients
+    value = getattr(getattr(cfg.CONF, 'clients_' + client), option)
+    if value is None:
+        value = getattr(cfg.CONF.clients, option)
+    return value
+
+
+def _session(context, client):
+    '''
+    A keystone session for the credentials in the context, with the TLS
+    options of the given client.
+
+    :returns: the session and the time its token expires at, None for
+              sessions authenticated by password, which get a new token
+              when the current one expires.
+    '''
+    if context.password:
+        auth = identity_v2.Password(auth_url=context.auth_url,
+                                    username=context.username,
+                                    password=context.password,
+                                    tenant_id=context.tenant_id)
+    else:
+        auth = identity_v2.Token(auth_url=context.auth_url,
+                                 token=context.auth_token,
+                                 tenant_id=context.tenant_id)
+
+    verify = _get_client_option(client, 'ca_file') or True
+    if _get_client_option(client, 'insecure'):
+        verify = False
+    cert = _get_client_option(client, 'cert_file')
+    if cert and _get_client_option(client, 'key_file'):
+        cert = (cert, _get_client_option(client, 'key_file'))
+    session = keystone_session.Session(auth=auth, verify=verify, cert=cert)
+
+    token_expiry = None
+    if not context.password:
+        # A token cannot be renewed, clients built on it must not outlive it
+        expires = auth.get_access(session).expires
+        token_expiry = calendar.timegm(expires.utctimetuple())
+    return session, token_expiry
+
+
+def _create_heat(context):
+    LOG.debug('Creating heat client for %s' % context.auth_url)
+
+    session, token_expiry = _session(context, 'heat')
+    client = heat_client.Client(
+        '1', session=session,
+        service_type='orchestration',
+        interface=_get_client_option('heat', 'endpoint_type'),
+        region_name=context.region_name)
+    return client, token_expiry
+
+
+def heat(context):
+    '''
+    Get a Heat client for the credentials in the context.
+    '''
+    initialise()
+    return _cache.get(('heat',) + cache_key(context),
+                      lambda: _create_heat(context))
+
+
+def _create_neutron(context):
+    LOG.debug('Creating neutron client for %s' % context.auth_url)
+
+    # The client asks the session for the current token on every request
+    session, token_expiry = _session(context, 'neutron')
+    client = neutron_client.Client(
+        session=session,
+        service_type='network',
+        endpoint_type=_get_client_option('neutron', 'endpoint_type'),
+        region_name=context.region_name)
+    return client, token_expiry
+
+
+def neutron(context):
+    '''
+    Get a Neutron client for the credentials in the context.
+    '''
+    initialise()
+    return _cache.get(('neutron',) + cache_key(context),
+                      lambda: _create_neutron(context))
@@ -70,6 +70,10 @@ class Cluster(object):
         self.data = kwargs.get('data', {})
         self.tags = kwargs.get('tags', {})
 
+        # Version of the DB record this object was read from, updates are
+        # rejected if the record has been changed by others since then
+        self.version = kwargs.get('version', 0)
+
         # rt is a dict for runtime data
         # TODO(Qiming): nodes have to be reloaded when membership changes
         self.rt = {
@@ -100,17 +104,22 @@ class Cluster(object):
             'status_reason': record.status_reason,
             'data': record.data,
             'tags': record.tags,
+            'version': record.version or 0,
         }
         return cls(context, record.name, record.profile_id, record.size,
                    **kwargs)
 
     @classmethod
-    def load(cls, context, cluster_id, show_deleted=False):
+    def load(cls, context, cluster_id, show_deleted=False, stale_ok=False):
         '''
         Retrieve a cluster from database.
+
+        :param stale_ok: if True, the cluster may be read from a database
+                         replica lagging behind.
         '''
         cluster = db_api.cluster_get(context, cluster_id,
-                                     show_deleted=show_deleted)
+                                     show_deleted=show_deleted,
+                                     stale_ok=stale_ok)
 
         if cluster is None:
             msg = _('No cluster with id "%s" exists') % cluster_id
@@ -121,13 +130,14 @@ class Cluster(object):
     @classmethod
     def load_all(cls, context, limit=None, sort_keys=None, marker=None,
                  sort_dir=None, filters=None, tenant_safe=True,
-                 show_deleted=False, show_nested=False):
+                 show_deleted=False, show_nested=False, stale_ok=False):
         '''
         Retrieve all clusters from database.
         '''
         records = db_api.cluster_get_all(context, limit, sort_keys, marker,
                                          sort_dir, filters, tenant_safe,
-                                         show_deleted, show_nested)
+                                         show_deleted, show_nested,
+                                         stale_ok=stale_ok)
 
         for record in records:
             yield cls.from_db_record(context, record)
@@ -157,7 +167,11 @@ class Cluster(object):
         }
 
         if self.id:
-            db_api.cluster_update(self.context, self.id, values)
+            # Raises ConcurrentUpdate if the cluster has been changed since
+            # it was loaded
+            record = db_api.cluster_update(self.context, self.id, values,
+                                           version=self.version)
+            self.version = record.version
             # TODO(Qiming): create event/log
         else:
             cluster = db_api.cluster_create(self.context, values)
@@ -183,7 +197,9 @@ class Cluster(object):
         values['status'] = status
         if reason:
             values['status_reason'] = reason
-        db_api.cluster_update(self.context, self.id, values)
+        record = db_api.cluster_update(self.context, self.id, values)
+        self.status = status
+        self.version = record.version
         # log status to log file
         # generate event record
 
@@ -226,11 +242,16 @@ class Cluster(object):
             return False
         return True
 
-    def get_next_index(self):
-        # TODO(Qiming): Get next_index from db and increment it in db
-        curr = self._next_index
-        self._next_index = self._next_index + 1
-        return curr
+    def get_next_index(self, count=1):
+        '''
+        Allocate the indexes of `count` new nodes in the database and
+        return the first one.
+        '''
+        record = db_api.cluster_increment(self.context, self.id,
+                                          next_index=count)
+        self.next_index = record.next_index
+        self.version = record.version
+        return self.next_index - count
 
     def get_nodes(self):
         # This method will return each node with their associated profiles.
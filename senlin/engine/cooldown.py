@@ -0,0 +1,139 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+'''
+Ledger of the cooldown of the policies attached to clusters.
+
+The time a policy last triggered an action on a cluster is kept in the
+cluster-policy binding, and each engine remembers when the cooldowns it
+has seen end. A trigger arriving during a known cooldown is turned down
+with a cache lookup, without loading the cluster or creating an action.
+'''
+
+import datetime
+
+from oslo.config import cfg
+from oslo.utils import timeutils
+
+from senlin.common import cache
+from senlin.db import api as db_api
+from senlin.openstack.common import log as logging
+from senlin.policies import base as policies
+
+LOG = logging.getLogger(__name__)
+
+# (cluster_id, policy_id) -> [cooldown seconds, end of the cooldown]. The
+# entries expire like the cached policies, so that bindings changed or
+# deleted by other engines are seen in time.
+_ledger = None
+
+
+def _get_ledger():
+    global _ledger
+
+    if _ledger is None:
+        _ledger = cache.LRUCache(cfg.CONF.object_cache_size,
+                                 ttl=cfg.CONF.object_cache_ttl)
+    return _ledger
+
+
+def _load(context, cluster_id, policy_id):
+    binding = db_api.cluster_get_policy(context, cluster_id, policy_id)
+    if binding is None:
+        return None
+
+    cooldown = binding.cooldown
+    if cooldown is None:
+        cooldown = policies.Policy.load(context, policy_id).cooldown or 0
+
+    ends = None
+    if binding.last_op is not None:
+        ends = binding.last_op + datetime.timedelta(seconds=cooldown)
+    entry = [cooldown, ends]
+    _get_ledger().put((cluster_id, policy_id), entry)
+    return entry
+
+
+def _get(context, cluster_id, policy_id):
+    entry = _get_ledger().get((cluster_id, policy_id))
+    if entry is None:
+        entry = _load(context, cluster_id, policy_id)
+    return entry
+
+
+def in_cooldown(context, cluster_id, policy_id, now=None):
+    '''
+    Tell whether a policy is known to be in cooldown on a cluster.
+    '''
+    entry = _get(context, cluster_id, policy_id)
+    if entry is None or entry[1] is None:
+        return False
+    return (now or timeutils.utcnow()) < entry[1]
+
+
+def claim(context, cluster_id, policy_id):
+    '''
+    Start the cooldown of a policy on a cluster, unless it is already in
+    cooldown or the policy isn't attached to the cluster.
+
+    :returns: True if the caller may trigger an action.
+    '''
+    entry = _get(context, cluster_id, policy_id)
+    if entry is None:
+        return False
+
+    now = timeutils.utcnow()
+    if entry[1] is not None and now < entry[1]:
+        return False
+
+    # Another engine may have started the cooldown in the meantime
+    cooldown = entry[0]
+    since = now - datetime.timedelta(seconds=cooldown)
+    if not db_api.cluster_mark_policy_triggered(context, cluster_id,
+                                                policy_id, now, since=since):
+        LOG.debug('Cooldown of policy %(policy)s on cluster %(cluster)s '
+                  'started by another engine' % {
+                      'policy': policy_id, 'cluster': cluster_id})
+        _load(context, cluster_id, policy_id)
+        return False
+
+    entry[1] = now + datetime.timedelta(seconds=cooldown)
+    return True
+
+
+def release(context, cluster_id, policy_id):
+    '''
+    End the cooldown started by a successful claim(), e.g. when the action
+    could not be started. The previous cooldown was over when the claim was
+    made, so the policy is left as if it never triggered anything.
+    '''
+    db_api.cluster_mark_policy_triggered(context, cluster_id, policy_id, None)
+    forget(cluster_id, policy_id)
+
+
+def record(context, cluster_id, policy_id):
+    '''
+    Restart the cooldown of a policy on a cluster from now, e.g. when the
+    action it triggered is done.
+    '''
+    now = timeutils.utcnow()
+    db_api.cluster_mark_policy_triggered(context, cluster_id, policy_id, now)
+    entry = _get(context, cluster_id, policy_id)
+    if entry is not None:
+        entry[1] = now + datetime.timedelta(seconds=entry[0])
+
+
+def forget(cluster_id, policy_id):
+    '''
+    Drop what is known about a binding, e.g. after it has been changed.
+    '''
+    _get_ledger().pop((cluster_id, policy_id))
@@ -0,0 +1,276 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections
+
+import eventlet
+from eventlet import queue
+from oslo.config import cfg
+
+from senlin.common import exception
+from senlin.engine import scheduler
+from senlin.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class Graph(object):
+    '''
+    A directed acyclic graph of items, e.g. actions.
+
+    An edge goes from an item (the requirer) to an item it depends on (the
+    required). Items must be hashable.
+    '''
+
+    def __init__(self):
+        self._requires = collections.OrderedDict()
+        self._required_by = {}
+
+    def add_node(self, node):
+        if node not in self._requires:
+            self._requires[node] = set()
+            self._required_by[node] = set()
+
+    def add_edge(self, requirer, required):
+        '''
+        Record that `requirer` cannot start before `required` is done.
+        '''
+        self.add_node(requirer)
+        self.add_node(required)
+        self._requires[requirer].add(required)
+        self._required_by[required].add(requirer)
+
+    def __contains__(self, node):
+        return node in self._requires
+
+    def __iter__(self):
+        return iter(self._requires)
+
+    def __len__(self):
+        return len(self._requires)
+
+    def requires(self, node):
+        return self._requires[node]
+
+    def required_by(self, node):
+        return self._required_by[node]
+
+    def roots(self):
+        '''
+        Nodes that don't depend on any other node.
+        '''
+        return [n for n, reqs in self._requires.items() if not reqs]
+
+    def descendants(self, node):
+        '''
+        All nodes depending on the given node, directly or indirectly.
+        '''
+        found = set()
+        todo = collections.deque(self._required_by[node])
+        while todo:
+            n = todo.popleft()
+            if n in found:
+                continue
+            found.add(n)
+            todo.extend(self._required_by[n])
+        return found
+
+    def toposort(self):
+        '''
+        Return the nodes in an order where each node comes after all the
+        nodes it depends on.
+        '''
+        counts = dict((n, len(reqs)) for n, reqs in self._requires.items())
+        todo = collections.deque(n for n in self._requires if not counts[n])
+        result = []
+        while todo:
+            node = todo.popleft()
+            result.append(node)
+            for n in self._required_by[node]:
+                counts[n] -= 1
+                if not counts[n]:
+                    todo.append(n)
+
+        if len(result) != len(self._requires):
+            cycle = [n for n in self._requires if counts[n]]
+            raise exception.CircularDependency(cycle=cycle)
+        return result
+
+
+class DAGExecutor(object):
+    '''
+    Run the nodes of a graph with bounded parallelism.
+
+    A node is started as soon as all nodes it depends on have succeeded.
+    When a node fails or is cancelled, all its descendants are given the
+    same status without being run.
+    '''
+
+    STATUSES = (
+        PENDING, RUNNING, SUCCEEDED, FAILED, CANCELLED,
+    ) = (
+        'PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELLED',
+    )
+
+    # Mapping from action results to node statuses, any other result is
+    # treated as a failure
+    RESULTS = {
+        'OK': SUCCEEDED,
+        'CANCEL': CANCELLED,
+    }
+
+    def __init__(self, graph, run, max_workers=None, cancelled=None,
+                 poll_interval=1):
+        '''
+        :param graph: a Graph of the nodes to run;
+        :param run: a callable taking a node and returning a result such as
+                    Action.RES_OK;
+        :param max_workers: maximum number of nodes run at the same time,
+                            defaults to cfg.CONF.max_parallel_actions;
+        :param cancelled: optional callable, returning True stops starting
+                          any new nodes;
+        :param poll_interval: seconds between checks of `cancelled` while
+                              waiting for running nodes.
+        '''
+        # Fail early on cycles
+        self.order = graph.toposort()
+        self.graph = graph
+        self.run_func = run
+        self.max_workers = max_workers or cfg.CONF.max_parallel_actions
+        self.cancelled = cancelled
+        self.poll_interval = poll_interval
+
+        self.status = dict((n, self.PENDING) for n in graph)
+        self.start_time = {}
+        self.end_time = {}
+
+    def _run_node(self, node, done):
+        try:
+            result = self.run_func(node)
+        except Exception as ex:
+            LOG.exception(ex)
+            result = None
+        done.put((node, self.RESULTS.get(result, self.FAILED)))
+
+    def _propagate(self, node, status):
+        '''
+        Give the status of a failed or cancelled node to all its descendants.
+        '''
+        for n in self.graph.descendants(node):
+            if self.status[n] == self.PENDING:
+                self.status[n] = status
+
+    def _cancel_pending(self):
+        for n, status in self.status.items():
+            if status == self.PENDING:
+                self.status[n] = self.CANCELLED
+
+    def execute(self):
+        '''
+        Run the graph to completion and return a dict mapping each node to
+        its final status.
+        '''
+        pool = eventlet.GreenPool(self.max_workers)
+        done = queue.LightQueue()
+        waiting = dict((n, len(self.graph.requires(n))) for n in self.graph)
+        ready = collections.deque(n for n in self.order if not waiting[n])
+        running = 0
+        begin = scheduler.wallclock()
+
+        while ready or running:
+            if self.cancelled is not None and self.cancelled():
+                LOG.debug('Graph execution cancelled, %s node(s) still '
+                          'running' % running)
+                ready.clear()
+                self._cancel_pending()
+
+            while ready and pool.free() > 0:
+                node = ready.popleft()
+                self.status[node] = self.RUNNING
+                self.start_time[node] = scheduler.wallclock()
+                pool.spawn_n(self._run_node, node, done)
+                running += 1
+
+            if not running:
+                break
+
+            try:
+                node, status = done.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+
+            running -= 1
+            self.end_time[node] = scheduler.wallclock()
+            self.status[node] = status
+
+            if status == self.SUCCEEDED:
+                for n in self.graph.required_by(node):
+                    waiting[n] -= 1
+                    if not waiting[n] and self.status[n] == self.PENDING:
+                        ready.append(n)
+            else:
+                self._propagate(node, status)
+
+        length, path = self.critical_path()
+        LOG.debug('Graph of %(count)s node(s) finished in %(total).2f '
+                  'seconds, critical path of %(nodes)s node(s) took '
+                  '%(length).2f seconds' % {
+                      'count': len(self.graph),
+                      'total': scheduler.wallclock() - begin,
+                      'nodes': len(path),
+                      'length': length})
+        return self.status
+
+    def duration(self, node):
+        if node not in self.end_time:
+            return 0
+        return self.end_time[node] - self.start_time[node]
+
+    def critical_path(self):
+        '''
+        Return the chain of dependent nodes with the longest total run time
+        as a tuple (seconds, [nodes]), the first node being run first.
+
+        Only nodes that have been run are counted.
+        '''
+        cost = {}
+        prev = {}
+        for node in self.order:
+            if node not in self.end_time:
+                continue
+            best = None
+            for req in self.graph.requires(node):
+                if req in cost and (best is None or cost[req] > cost[best]):
+                    best = req
+            prev[node] = best
+            cost[node] = self.duration(node) + (
+                cost[best] if best is not None else 0)
+
+        if not cost:
+            return 0, []
+
+        node = max(cost, key=lambda n: cost[n])
+        length = cost[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = prev[node]
+        path.reverse()
+        return length, path
+
+
+def execute(graph, run, max_workers=None, cancelled=None):
+    '''
+    Run all nodes in the graph and return a dict of their final statuses.
+    '''
+    return DAGExecutor(graph, run, max_workers=max_workers,
+                       cancelled=cancelled).execute()
@@ -19,6 +19,7 @@ from senlin.common import context
 from senlin.common.i18n import _LI
 from senlin.common import messaging as rpc_messaging
 from senlin.engine import scheduler
+from senlin.engine import sharding
 from senlin.openstack.common import log as logging
 from senlin.openstack.common import service
 from senlin.rpc import api as rpc_api
@@ -62,9 +63,12 @@ class Dispatcher(service.Service):
         '''New action has been ready, try to schedule it'''
         scheduler.start_action(ctxt, action_id, self.engine_id, self.TG)
 
-    def cancel_action(self, ctxt, action_id):
-        '''Cancel an action.'''
-        scheduler.cancel_action(ctxt, action_id)
+    def cancel_action(self, ctxt, action_ids):
+        '''
+        Actions have been cancelled in DB, drop any local work pending on
+        them. Running ones stop by themselves when checking control flags.
+        '''
+        self.TG.discard_retries(action_ids)
 
     def suspend_action(self, ctxt, action_id):
         '''Suspend an action.'''
@@ -84,6 +88,41 @@ class Dispatcher(service.Service):
         LOG.info(_LI("All action threads have been finished"))
 
 
+def cancel(cnxt, action_id):
+    """
+    Cancel an action and all actions linked to it, then broadcast a single
+    message to let all dispatchers know about them.
+
+    :param cnxt: rpc request context
+    :param action_id: the action to cancel
+    :returns: ids of all the actions cancelled
+    """
+    action_ids = scheduler.cancel_action(cnxt, action_id)
+    if action_ids:
+        notify(cnxt, Dispatcher.CANCEL_ACTION, None, action_ids=action_ids)
+    return action_ids
+
+
+def start_action(cnxt, action_id, target):
+    """
+    Let the engine owning the shard of the action target know that a new
+    action is ready, or all engines if that engine can't be reached.
+
+    :param cnxt: rpc request context
+    :param action_id: the action ready to run
+    :param target: ID of the object the action works on, or of the cluster
+                   of the node for actions on a node of a cluster, so that
+                   the actions on the nodes of a cluster run in the engine
+                   owning the cluster
+    """
+    engine_id = sharding.owner_of(cnxt, target)
+    if engine_id and notify(cnxt, Dispatcher.NEW_ACTION, engine_id,
+                            action_id=action_id):
+        return True
+
+    return notify(cnxt, Dispatcher.NEW_ACTION, None, action_id=action_id)
+
+
 def notify(cnxt, call, engine_id, *args, **kwargs):
     """
     Send notification to dispatcher
@@ -115,3 +154,4 @@ def notify(cnxt, call, engine_id, *args, **kwargs):
         cctxt.call(cnxt, call, *args, **kwargs)
     except messaging.MessagingTimeout:
         return False
+    return True
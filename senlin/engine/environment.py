@@ -21,7 +21,7 @@ from senlin.common import exception
 from senlin.common.i18n import _
 from senlin.common.i18n import _LE
 from senlin.common.i18n import _LI
-#from senlin.engine import clients
+from senlin.engine import clients
 from senlin.engine import parser
 from senlin.engine import registry
 from senlin.openstack.common import log
@@ -11,6 +11,7 @@
 # under the License.
 
 import datetime
+import logging
 
 from senlin.common import i18n
 from senlin.db import api as db_api
@@ -40,41 +41,64 @@ class Event(object):
                  timestamp=None, reason='', entity_type='CLUSTER'):
         self.level = level
         self.context = context
-        self.entity = entity.uuid
+        self.entity = entity.id
+        self.entity_name = getattr(entity, 'name', None)
         self.action = action
         self.status = status
         self.timestamp = timestamp or datetime.datetime.utcnow()
         self.reason = reason
         self.entity_type = entity_type
 
+    def store(self):
+        '''
+        Store the event record into database table.
+        '''
+        values = {
+            'level': self.level,
+            'timestamp': self.timestamp,
+            'obj_id': self.entity,
+            'obj_name': self.entity_name,
+            'obj_type': self.entity_type,
+            'user': getattr(self.context, 'user_id', None),
+            'action': self.action,
+            'status': self.status,
+            'status_reason': self.reason,
+        }
+        event = db_api.event_create(self.context, values)
+        self.id = event.id
+        return self.id
 
-def critical(context, entity, action, status, timestamp=None, reason=''):
-    entity_type = class_mapping[entity.__class__]
-    event = Event(log.CRITICAL, context, entity, action, status,
+
+def _dump(level, context, entity, action, status, timestamp, reason):
+    cls = entity.__class__
+    entity_type = class_mapping.get('%s.%s' % (cls.__module__, cls.__name__),
+                                    cls.__name__.upper())
+    event = Event(level, context, entity, action, status,
+                  timestamp=timestamp, reason=reason,
                   entity_type=entity_type)
-    db_api.add_event(event)
-    LOG.critical(_LC(''))
+    event.store()
+    return event
+
+
+def critical(context, entity, action, status, timestamp=None, reason=''):
+    _dump(logging.CRITICAL, context, entity, action, status, timestamp, reason)
+    LOG.critical(_LC('%(action)s %(status)s: %(reason)s'),
+                 {'action': action, 'status': status, 'reason': reason})
 
 
 def error(context, entity, action, status, timestamp=None, reason=''):
-    entity_type = class_mapping[entity.__class__]
-    event = Event(log.ERROR, context, entity, action, status,
-                  entity_type=entity_type)
-    db_api.add_event(event)
-    LOG.error(_LE(''))
+    _dump(logging.ERROR, context, entity, action, status, timestamp, reason)
+    LOG.error(_LE('%(action)s %(status)s: %(reason)s'),
+              {'action': action, 'status': status, 'reason': reason})
 
 
 def warning(context, entity, action, status, timestamp=None, reason=''):
-    entity_type = class_mapping[entity.__class__]
-    event = Event(log.WARNING, context, entity, action, status,
-                  entity_type=entity_type)
-    db_api.add_event(event)
-    LOG.warning(_LW(''))
+    _dump(logging.WARNING, context, entity, action, status, timestamp, reason)
+    LOG.warning(_LW('%(action)s %(status)s: %(reason)s'),
+                {'action': action, 'status': status, 'reason': reason})
 
 
 def info(context, entity, action, status, timestamp=None, reason=''):
-    entity_type = class_mapping[entity.__class__]
-    event = Event(log.INFO, context, entity, action, status,
-                  entity_type=entity_type)
-    db_api.add_event(event)
-    LOG.info(_LI(''))
+    _dump(logging.INFO, context, entity, action, status, timestamp, reason)
+    LOG.info(_LI('%(action)s %(status)s: %(reason)s'),
+             {'action': action, 'status': status, 'reason': reason})
@@ -0,0 +1,374 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+'''
+Health monitoring of cluster nodes.
+
+Each engine keeps the nodes it checks on a timer wheel, so that scheduling
+a check costs the same for ten nodes as for ten thousand. The next check
+of a node is moved by a random jitter to spread the checks over time.
+Due checks are grouped by check type and the backend is asked about a
+batch of nodes at a time. A cluster cannot have more than a budget of its
+nodes checked per turn of the wheel, the rest wait for the next turns.
+
+Recovery is only triggered when a node turns unhealthy, not each time it
+is found unhealthy.
+'''
+
+import collections
+import math
+import random
+
+import eventlet
+from oslo.config import cfg
+
+from senlin.common import exception
+from senlin.common.i18n import _
+from senlin.db import api as db_api
+from senlin.drivers import base as drivers
+from senlin.engine import action as actions
+from senlin.engine import clients
+from senlin.engine import dispatcher
+from senlin.engine import event as events
+from senlin.engine import scheduler
+from senlin.engine import sharding
+from senlin.openstack.common import log as logging
+from senlin.policies import base as policies
+
+LOG = logging.getLogger(__name__)
+
+STATES = (
+    HEALTHY, UNHEALTHY,
+) = (
+    'HEALTHY', 'UNHEALTHY',
+)
+
+
+class TimerWheel(object):
+    '''
+    A hashed timer wheel.
+
+    An item due in n ticks goes into the slot n steps ahead of the cursor,
+    along with the number of full turns the cursor has to make before the
+    item is due.
+    '''
+
+    def __init__(self, size, tick):
+        self.size = size
+        self.tick = tick
+        self.slots = [[] for i in range(size)]
+        self.cursor = 0
+
+    def schedule(self, item, delay):
+        ticks = max(1, int(math.ceil(delay / self.tick)))
+        slot = (self.cursor + ticks) % self.size
+        self.slots[slot].append([(ticks - 1) // self.size, item])
+
+    def advance(self):
+        '''
+        Move the cursor one slot ahead and return the items now due.
+        '''
+        self.cursor = (self.cursor + 1) % self.size
+        due = []
+        keep = []
+        for entry in self.slots[self.cursor]:
+            if entry[0] > 0:
+                entry[0] -= 1
+                keep.append(entry)
+            else:
+                due.append(entry[1])
+        self.slots[self.cursor] = keep
+        return due
+
+
+class NodeCheck(object):
+    '''
+    The health check of one node.
+    '''
+
+    def __init__(self, context, node_id, cluster_id, physical_id,
+                 check_type, interval):
+        self.context = context
+        self.node_id = node_id
+        self.cluster_id = cluster_id
+        self.physical_id = physical_id
+        self.check_type = check_type
+        self.interval = interval
+        # Unknown until the first check
+        self.state = None
+
+
+def check_stacks(checks):
+    '''
+    Tell the health of nodes backed by Heat stacks, listing the stacks of
+    a batch of nodes at once.
+
+    :returns: a dict mapping node IDs to True or False.
+    '''
+    stack_ids = dict((c.node_id, c.physical_id.split('/')[0])
+                     for c in checks if c.physical_id)
+    hc = drivers.heat(checks[0].context)
+    found = hc.stacks.list(filters={'id': list(set(stack_ids.values()))},
+                           show_deleted=True)
+    found = dict((s.id, s) for s in found)
+
+    results = {}
+    for check in checks:
+        stack = found.get(stack_ids.get(check.node_id))
+        results[check.node_id] = (stack is not None and
+                                  stack.action != 'DELETE' and
+                                  stack.status != 'FAILED')
+    return results
+
+
+# Functions polling the backend for each check type, the types missing
+# here are told about node health through notify()
+CHECKERS = {
+    'stack_status_polling': check_stacks,
+}
+
+
+class HealthManager(object):
+    '''
+    Schedule and run the health checks of the nodes of this engine.
+    '''
+
+    def __init__(self):
+        self.wheel = TimerWheel(cfg.CONF.health_check_wheel_size,
+                                cfg.CONF.health_check_tick)
+        # node_id -> NodeCheck
+        self.checks = {}
+        # cluster_id -> deque of due checks waiting for budget
+        self.backlog = collections.OrderedDict()
+        # IDs of the clusters whose checks are suspended
+        self.suspended = set()
+        self.checkers = dict(CHECKERS)
+        self.thread = None
+
+    def _jitter(self, interval):
+        spread = cfg.CONF.health_check_jitter
+        return interval * (1 + random.uniform(-spread, spread))
+
+    def register(self, context, node_id, cluster_id, physical_id,
+                 check_type, interval, grace_period=0):
+        '''
+        Start checking a node, the first check is done after the grace
+        period plus a random part of the interval.
+        '''
+        check = NodeCheck(context, node_id, cluster_id, physical_id,
+                          check_type, interval)
+        self.checks[node_id] = check
+        self.wheel.schedule(check, (grace_period or 0) +
+                            random.uniform(0, interval))
+        if self.thread is None:
+            self.thread = eventlet.spawn(self._run)
+
+    def unregister(self, node_id):
+        # Entries left on the wheel are dropped when they are due
+        self.checks.pop(node_id, None)
+
+    def sync_cluster(self, context, cluster_id, check_type, interval,
+                     grace_period=0):
+        '''
+        Check exactly the current nodes of a cluster, and resume checking
+        the cluster if it was suspended.
+        '''
+        records = db_api.node_get_all_by_cluster(context, cluster_id)
+        current = dict((r.id, r) for r in records.values())
+        for node_id, check in list(self.checks.items()):
+            if check.cluster_id == cluster_id and node_id not in current:
+                self.unregister(node_id)
+
+        for node_id, record in current.items():
+            check = self.checks.get(node_id)
+            if check is not None and check.physical_id == record.physical_id:
+                continue
+            self.register(context, node_id, cluster_id, record.physical_id,
+                          check_type, interval, grace_period)
+
+        self.suspended.discard(cluster_id)
+
+    def remove_cluster(self, cluster_id):
+        '''
+        Stop checking the nodes of a cluster, e.g. when its health policy
+        is detached.
+        '''
+        for node_id, check in list(self.checks.items()):
+            if check.cluster_id == cluster_id:
+                self.unregister(node_id)
+        self.suspended.discard(cluster_id)
+        self.backlog.pop(cluster_id, None)
+
+    def load(self, context, shards):
+        '''
+        Start checking the nodes of the clusters of the given shards which
+        have a health policy enabled, e.g. when the engine starts, since
+        the checks registered are only kept in memory.
+        '''
+        shards = set(shards)
+        bindings = db_api.cluster_policy_get_all_by_type(context,
+                                                         'HealthPolicy')
+        for binding in bindings:
+            if not binding.enabled:
+                continue
+            if sharding.shard_of(binding.cluster_id) not in shards:
+                continue
+            policy = policies.load(context, binding.policy_id)
+            self.sync_cluster(context, binding.cluster_id, policy.check_type,
+                              policy.interval, policy.grace_period)
+
+    def suspend_cluster(self, cluster_id):
+        '''
+        Stop acting on the checks of a cluster, e.g. while its nodes are
+        being removed.
+        '''
+        self.suspended.add(cluster_id)
+        self.backlog.pop(cluster_id, None)
+
+    def notify(self, node_id, healthy):
+        '''
+        Tell the health of a node found by other means than polling, e.g.
+        from a lifecycle event.
+        '''
+        check = self.checks.get(node_id)
+        if check is not None and check.cluster_id not in self.suspended:
+            self._update(check, healthy)
+
+    def _run(self):
+        last = scheduler.wallclock()
+        try:
+            while self.checks:
+                eventlet.sleep(self.wheel.tick)
+                now = scheduler.wallclock()
+                # Catch up with the ticks missed while checking
+                ticks = max(1, int((now - last) / self.wheel.tick))
+                last += ticks * self.wheel.tick
+                for i in range(ticks):
+                    self._queue(self.wheel.advance())
+                self.run_checks()
+        finally:
+            self.thread = None
+
+    def _queue(self, due):
+        for check in due:
+            if self.checks.get(check.node_id) is not check:
+                continue
+            if check.cluster_id in self.suspended:
+                self._reschedule(check)
+                continue
+            self.backlog.setdefault(check.cluster_id,
+                                    collections.deque()).append(check)
+
+    def _reschedule(self, check):
+        self.wheel.schedule(check, self._jitter(check.interval))
+
+    def run_checks(self):
+        '''
+        Run the checks queued, at most the budget of each cluster.
+        '''
+        budget = cfg.CONF.health_check_cluster_budget
+        groups = collections.defaultdict(list)
+        for cluster_id, queue in list(self.backlog.items()):
+            for i in range(min(budget, len(queue))):
+                check = queue.popleft()
+                # A node being recovered gets a new physical object
+                if check.state == UNHEALTHY and not self._refresh(check):
+                    continue
+                # Nodes are only listed together with the same credentials
+                key = (check.check_type, clients.cache_key(check.context))
+                groups[key].append(check)
+            if not queue:
+                del self.backlog[cluster_id]
+
+        size = cfg.CONF.health_check_batch_size
+        for (check_type, key), checks in groups.items():
+            checker = self.checkers.get(check_type)
+            for i in range(0, len(checks), size):
+                batch = checks[i:i + size]
+                results = {}
+                if checker is not None:
+                    try:
+                        results = checker(batch)
+                    except Exception as ex:
+                        # The backend is unreachable, which doesn't tell
+                        # anything about the nodes
+                        LOG.exception(ex)
+
+                for check in batch:
+                    healthy = results.get(check.node_id)
+                    if healthy is not None:
+                        self._update(check, healthy)
+                    if self.checks.get(check.node_id) is check:
+                        self._reschedule(check)
+
+    def _refresh(self, check):
+        try:
+            node = db_api.node_get(check.context, check.node_id)
+        except exception.NotFound:
+            self.unregister(check.node_id)
+            return False
+
+        check.physical_id = node.physical_id
+        return True
+
+    def _update(self, check, healthy):
+        state = HEALTHY if healthy else UNHEALTHY
+        if state == check.state:
+            return
+
+        previous = check.state
+        check.state = state
+        try:
+            node = db_api.node_get(check.context, check.node_id)
+        except exception.NotFound:
+            self.unregister(check.node_id)
+            return
+
+        if state == HEALTHY:
+            if previous is not None:
+                db_api.node_set_status(check.context, node.id, 'ACTIVE',
+                                       reason=_('Health check passed'))
+                events.info(check.context, node, 'HEALTH_CHECK', state)
+            return
+
+        reason = _('Health check failed')
+        db_api.node_set_status(check.context, node.id, 'ERROR',
+                               reason=reason)
+        events.warning(check.context, node, 'HEALTH_CHECK', state,
+                       reason=reason)
+        self._recover(check)
+
+    def _recover(self, check):
+        kwargs = {
+            'name': 'node-recover-%s' % check.node_id,
+            'target': check.node_id,
+            'cause': 'Health check failure',
+            'status': actions.Action.READY,
+        }
+        action = actions.Action(check.context, 'NODE_RECOVER', **kwargs)
+        action.store()
+        dispatcher.start_action(check.context, action.id,
+                                check.cluster_id or check.node_id)
+
+
+_manager = None
+
+
+def get_manager():
+    '''
+    Get the health manager of this engine.
+    '''
+    global _manager
+
+    if _manager is None:
+        _manager = HealthManager()
+    return _manager
@@ -13,7 +13,10 @@
 import datetime
 
 from senlin.common import exception
+from senlin.common.i18n import _
 from senlin.db import api as db_api
+from senlin.engine import event as events
+from senlin.policies import placement_policy
 from senlin.profiles import base as profiles
 
 
@@ -55,6 +58,7 @@ class Node(object):
         self.status_reason = kwargs.get('status_reason', 'Initializing')
         self.data = kwargs.get('data', {})
         self.tags = kwargs.get('tags', {})
+        self.version = kwargs.get('version', 0)
 
         self.rt = {
             'profile': profiles.load(context, self.profile_id),
@@ -85,7 +89,11 @@ class Node(object):
         }
 
         if self.id:
-            db_api.node_update(self.context, self.id, values)
+            # Raises ConcurrentUpdate if the node has been changed since it
+            # was loaded
+            record = db_api.node_update(self.context, self.id, values,
+                                        version=self.version)
+            self.version = record.version
             # TODO(Qiming): create event/log
         else:
             node = db_api.node_create(self.context, values)
@@ -104,6 +112,7 @@ class Node(object):
         kwargs = {
             'id': record.id,
             'physical_id': record.physical_id,
+            'cluster_id': record.cluster_id,
             'index': record.index,
             'role': record.role,
             'created_time': record.created_time,
@@ -113,6 +122,7 @@ class Node(object):
             'status_reason': record.status_reason,
             'data': record.data,
             'tags': record.tags,
+            'version': record.version or 0,
         }
         return cls(context, record.name, record.profile_id, **kwargs)
 
@@ -139,12 +149,33 @@ class Node(object):
         for record in records:
             yield cls.from_db_record(context, record)
 
+    def _count_zone(self, cluster_id, delta):
+        '''
+        Add delta to the node count of the zone of this node in the data of
+        the cluster, which the placement policy places new nodes by. A node
+        is counted while it is a member with a physical object.
+        '''
+        placement = (self.data or {}).get('placement') or {}
+        zone = placement.get('zone') or placement.get('region')
+        if not cluster_id or zone is None:
+            return
+
+        db_api.cluster_update_data(
+            self.context, cluster_id,
+            lambda data: placement_policy.update_zone_counts(data, [zone],
+                                                             delta))
+
     def do_create(self):
         # TODO(Qiming): log events?
-        self.created_time = datetime.datetime.utcnnow()
+        self.created_time = datetime.datetime.utcnow()
         res = profiles.create_object(self)
         if res:
             self.physical_id = res
+            record = db_api.node_update(self.context, self.id,
+                                        {'physical_id': self.physical_id,
+                                         'created_time': self.created_time})
+            self.version = record.version
+            self._count_zone(self.cluster_id, 1)
             return True
         else:
             return False
@@ -157,7 +188,8 @@ class Node(object):
         # TODO(Qiming): log events
         res = profiles.delete_object(self)
         if res:
-            db_api.delete_node(self.id)
+            self._count_zone(self.cluster_id, -1)
+            db_api.node_delete(self.context, self.id)
             return True
         else:
             return False
@@ -173,13 +205,14 @@ class Node(object):
             return False
 
         # Check if profile types match
-        old_profile = db_api.get_profile(context, self.profile_id)
-        new_profile = db_api.get_profile(context, new_profile_id)
+        old_profile = db_api.profile_get(self.context, self.profile_id)
+        new_profile = db_api.profile_get(self.context, new_profile_id)
         if old_profile.type != new_profile.type:
-            events.warning(_LW('Node cannot be updated to a different '
-                               'profile type (%(oldt)s->%(newt)s)'),
-                           {'oldt': old_profile.type,
-                            'newt': new_profile.type})
+            events.warning(self.context, self, 'NODE_UPDATE', self.status,
+                           reason=_('Node cannot be updated to a different '
+                                    'profile type (%(oldt)s->%(newt)s)') % {
+                                        'oldt': old_profile.type,
+                                        'newt': new_profile.type})
             return False
 
         res = profiles.update_object(self, new_profile_id)
@@ -187,22 +220,60 @@ class Node(object):
             self.rt['profile'] = profiles.load(self.context, new_profile_id)
             self.profile_id = new_profile_id
             self.updated_time = datetime.datetime.utcnow()
-            db_api.node_update(self.context, self.id,
-                               {'profile_id': self.profile_id,
-                                'updated_time': self.updated_time})
+            record = db_api.node_update(self.context, self.id,
+                                        {'profile_id': self.profile_id,
+                                         'updated_time': self.updated_time})
+            self.version = record.version
 
         return res
 
+    def do_recover(self):
+        '''
+        Replace the physical object of the node with a new one built from
+        the same profile, in the same zone.
+        '''
+        counted = bool(self.physical_id)
+        if self.physical_id:
+            profiles.delete_object(self)
+
+        res = profiles.create_object(self)
+        if not res:
+            # The node is left without a physical object
+            self.physical_id = ''
+            record = db_api.node_update(self.context, self.id,
+                                        {'physical_id': self.physical_id})
+            self.version = record.version
+            if counted:
+                self._count_zone(self.cluster_id, -1)
+            return False
+
+        self.physical_id = res
+        self.status = self.ACTIVE
+        self.updated_time = datetime.datetime.utcnow()
+        record = db_api.node_update(self.context, self.id,
+                                    {'physical_id': self.physical_id,
+                                     'status': self.status,
+                                     'updated_time': self.updated_time})
+        self.version = record.version
+        if not counted:
+            self._count_zone(self.cluster_id, 1)
+        return True
+
     def do_join(self, cluster_id):
         if self.cluster_id == cluster_id:
             return True
 
         db_api.node_migrate(self.context, self.id, self.cluster_id,
                             cluster_id)
+        if self.physical_id:
+            self._count_zone(self.cluster_id, -1)
+            self._count_zone(cluster_id, 1)
+        self.cluster_id = cluster_id
 
         self.updated_time = datetime.datetime.utcnow()
-        db_api.node_update(self.context, self.id,
-                           {'updated_time': self.updated_time})
+        record = db_api.node_update(self.context, self.id,
+                                    {'updated_time': self.updated_time})
+        self.version = record.version
         return True
 
     def do_leave(self):
@@ -210,8 +281,12 @@ class Node(object):
             return True
 
         db_api.node_migrate(self.context, self.id, self.cluster_id, None)
+        if self.physical_id:
+            self._count_zone(self.cluster_id, -1)
+        self.cluster_id = None
         self.updated_time = datetime.datetime.utcnow()
-        db_api.node_update(self.context, self.id,
-                           {'updated_time': self.updated_time})
+        record = db_api.node_update(self.context, self.id,
+                                    {'updated_time': self.updated_time})
+        self.version = record.version
 
         return True
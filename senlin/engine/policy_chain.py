@@ -0,0 +1,143 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections
+import copy
+
+from oslo.config import cfg
+import six
+
+from senlin.common import cache
+from senlin.db import api as db_api
+from senlin.openstack.common import log as logging
+from senlin.policies import base as policies
+
+LOG = logging.getLogger(__name__)
+
+# Compiled policy chains, keyed by cluster ID. They expire like the cached
+# policies, so that bindings changed by other engines are seen in time.
+_chains = None
+
+
+def _get_chains():
+    global _chains
+
+    if _chains is None:
+        _chains = cache.LRUCache(cfg.CONF.object_cache_size,
+                                 ttl=cfg.CONF.object_cache_ttl)
+    return _chains
+
+
+def _level_key(level):
+    '''
+    Sort key of a binding level, most important first.
+
+    Levels are either an enforcement level name or an integer where a
+    smaller number means a more important policy.
+    '''
+    if isinstance(level, six.string_types):
+        if level in policies.Policy.ENFORCEMENT_LEVELS:
+            return policies.Policy.ENFORCEMENT_LEVELS.index(level)
+        level = int(level) if level.isdigit() else None
+
+    if level is None:
+        return len(policies.Policy.ENFORCEMENT_LEVELS)
+    return level
+
+
+def _bind(policy, context):
+    policy = copy.copy(policy)
+    policy.context = context
+    return policy
+
+
+class PolicyChain(object):
+    '''
+    The enabled policies attached to a cluster, indexed by the
+    (phase, action) pairs they target and ordered by binding level.
+    '''
+
+    PHASES = (
+        BEFORE, WHEN, AFTER,
+    ) = (
+        'BEFORE', 'WHEN', 'AFTER',
+    )
+
+    def __init__(self, cluster_id, bound_policies):
+        '''
+        :param cluster_id: ID of the cluster the policies are attached to;
+        :param bound_policies: a list of (level, policy) tuples.
+        '''
+        self.cluster_id = cluster_id
+        ordered = sorted(bound_policies, key=lambda p: _level_key(p[0]))
+        self.policies = [policy for level, policy in ordered]
+
+        self.table = collections.defaultdict(list)
+        for policy in self.policies:
+            for phase, action in getattr(policy, 'TARGET', []):
+                self.table[(phase, action)].append(policy)
+
+    @classmethod
+    def compile(cls, context, cluster_id):
+        bound = []
+        for binding in db_api.cluster_get_policies(context, cluster_id):
+            if not binding.enabled:
+                continue
+            policy = policies.Policy.load(context, binding.policy_id)
+            bound.append((binding.level, policy))
+
+        LOG.debug('Compiled policy chain of cluster %(cluster)s with '
+                  '%(count)s enabled policies' % {'cluster': cluster_id,
+                                                  'count': len(bound)})
+        return cls(cluster_id, bound)
+
+    def get(self, context, phase, action):
+        '''
+        Get the policies to be checked in the given phase of an action,
+        bound to the caller's context.
+        '''
+        return [_bind(policy, context)
+                for policy in self.table.get((phase, action), [])]
+
+    def find(self, context, action, policy_class):
+        '''
+        Get the first policy of the given class targeting any phase of
+        the action, or None if there isn't one.
+        '''
+        for phase in self.PHASES:
+            for policy in self.table.get((phase, action), []):
+                if isinstance(policy, policy_class):
+                    return _bind(policy, context)
+        return None
+
+
+def get_chain(context, cluster_id):
+    '''
+    Get the compiled policy chain of a cluster, building it if needed.
+    '''
+    chain = _get_chains().get(cluster_id)
+    if chain is None:
+        chain = PolicyChain.compile(context, cluster_id)
+        _get_chains().put(cluster_id, chain)
+    return chain
+
+
+def invalidate(cluster_id):
+    '''
+    Drop the compiled chain of a cluster, e.g. after a policy has been
+    attached, detached, enabled or disabled.
+    '''
+    _get_chains().pop(cluster_id)
+
+
+def get_policies(context, cluster_id, phase, action):
+    return get_chain(context, cluster_id).get(context, phase, action)
@@ -10,14 +10,20 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import heapq
+import random
 import time
 
 import eventlet
 from oslo.config import cfg
 import six
 
+from senlin.common import context
+from senlin.common import exception
 from senlin.common.i18n import _LI
+from senlin.common.i18n import _LW
 from senlin.db import api as db_api
+from senlin.engine import sharding
 from senlin.openstack.common import log as logging
 from senlin.openstack.common import threadgroup
 
@@ -31,19 +37,47 @@ ACTION_CONTROL_REQUEST = (
     'cancel', 'suspend', 'resume', 'timeout',
 )
 
+# Maximum seconds the retry timer sleeps, which bounds the latency of a
+# retry queued while the timer is idle
+RETRY_CHECK_INTERVAL = 1
+
+# Status given to actions reclaimed from dead engines, indexed by the
+# value of the 'orphaned_action_recovery' option
+RECOVERY_STATUS = {
+    'reset': 'READY',
+    'fail': 'FAILED',
+}
+
 
 class ThreadGroupManager(object):
     """
     """
-    def __init__(self):
+    def __init__(self, engine_id=None):
         super(ThreadGroupManager, self).__init__()
         self.threads = {}
+        self.engine_id = engine_id
         self.group = threadgroup.ThreadGroup()
 
         # Create dummy service task, because when there is nothing queued
         # on self.tg the process exits
         self.add_timer(cfg.CONF.periodic_interval, self._service_task)
 
+        # Actions waiting to be retried, kept as a heap of tuples:
+        #   (due_time, action_id, context, action)
+        # All of them are driven by a single timer.
+        self.retries = []
+        self.group.add_dynamic_timer(
+            self._process_retries,
+            periodic_interval_max=RETRY_CHECK_INTERVAL)
+
+        # An engine registered in the database has to keep its lease alive
+        # and it helps reclaiming actions left behind by dead engines
+        if self.engine_id is not None:
+            self.add_timer(cfg.CONF.engine_heartbeat_interval,
+                           self._heartbeat)
+            self.add_timer(cfg.CONF.engine_heartbeat_interval,
+                           self._sweep_orphaned_actions)
+
     def _service_task(self):
         '''
         This is a dummy task which gets queued on the service.Service
@@ -57,6 +91,88 @@ class ThreadGroupManager(object):
         # TODO(Yanyan): have this task call dbapi purge events
         pass
 
+    def _heartbeat(self):
+        '''
+        Refresh the service record of this engine so that other engines
+        won't treat it as dead.
+        '''
+        ctx = context.get_admin_context()
+        try:
+            db_api.service_update(ctx, self.engine_id)
+        except exception.NotFound:
+            # The record was swept by a peer, e.g. after a long pause
+            LOG.warn(_LW('Service record of engine %s is gone, '
+                         'registering again.'), self.engine_id)
+            try:
+                # Peers may have reclaimed our actions meanwhile
+                self._drop_reclaimed_actions(ctx)
+                db_api.service_create(ctx, self.engine_id)
+            except Exception as ex:
+                LOG.exception(ex)
+        except Exception as ex:
+            # Never let an exception stop the timer
+            LOG.exception(ex)
+
+    def _drop_reclaimed_actions(self, ctx):
+        '''
+        Stop the local threads and forget the queued retries of actions
+        which are no longer locked by this engine.
+
+        This is needed when the service record of this engine has been
+        swept, because the actions it was running have been reclaimed and
+        may be running on other engines already.
+        '''
+        owned = set(a.id for a in
+                    db_api.action_get_all_by_owner(ctx, self.engine_id))
+
+        self.discard_retries([r[1] for r in self.retries
+                              if r[1] not in owned])
+
+        for action_id in [a for a in self.threads if a not in owned]:
+            LOG.warn(_LW('Action %s was reclaimed by other engines, '
+                         'stopping it.'), action_id)
+            # The link()ed callback removes it from self.threads
+            th = self.threads.get(action_id)
+            if th is not None:
+                th.kill()
+
+    def _sweep_orphaned_actions(self):
+        '''
+        Reclaim actions left in RUNNING status by engines whose lease has
+        expired.
+
+        All orphans are reset (or failed) with a single DB transaction. The
+        reset ones are then adopted by this engine.
+        '''
+        ctx = context.get_admin_context()
+        try:
+            services = db_api.service_get_all_expired(
+                ctx, cfg.CONF.engine_lease_timeout)
+            dead_engines = [s.id for s in services if s.id != self.engine_id]
+            if not dead_engines:
+                return
+
+            status = RECOVERY_STATUS[cfg.CONF.orphaned_action_recovery]
+            action_ids = db_api.action_reclaim_orphans(ctx, dead_engines,
+                                                       status)
+
+            # Shards of dead engines are taken over by live ones
+            sharding.rebalance(ctx)
+        except Exception as ex:
+            # Never let an exception stop the timer
+            LOG.exception(ex)
+            return
+
+        LOG.info(_LI('Reclaimed %(count)s action(s) from dead engine(s) '
+                     '%(engines)s.'), {'count': len(action_ids),
+                                       'engines': dead_engines})
+
+        if status != RECOVERY_STATUS['reset']:
+            return
+
+        for action_id in action_ids:
+            start_action(ctx, action_id, self.engine_id, self)
+
     def start(self, func, *args, **kwargs):
         """
         Run the given method in a sub-thread.
@@ -79,19 +195,59 @@ class ThreadGroupManager(object):
             # Remove action thread from thread list
             self.threads.pop(action.id)
 
-        action_proc = ActionProc(cnxt, action)
+        action_proc = ActionProc(cnxt, action, self)
         th = self.start(action_proc, *args, **kwargs)
         self.threads[action.id] = th
         th.link(release, cnxt, action)
         return th
 
+    def schedule_retry(self, cnxt, action, delay):
+        """
+        Queue the action to be run again after `delay` seconds.
+
+        :param cnxt: The context of rpc request
+        :param action: The action to retry
+        :param delay: Seconds to wait before the retry
+        """
+        heapq.heappush(self.retries, (wallclock() + delay, action.id,
+                                      cnxt, action))
+
+    def discard_retries(self, action_ids):
+        """
+        Forget queued retries of the given actions, e.g. cancelled ones.
+        """
+        action_ids = set(action_ids)
+        retries = [r for r in self.retries if r[1] not in action_ids]
+        if len(retries) != len(self.retries):
+            heapq.heapify(retries)
+            self.retries = retries
+
+    def _process_retries(self):
+        """
+        Start the queued retries that are due.
+
+        Returns the number of seconds until the next retry is due, which is
+        how long the dynamic timer driving this method sleeps.
+        """
+        now = wallclock()
+        try:
+            while self.retries and self.retries[0][0] <= now:
+                due, action_id, cnxt, action = heapq.heappop(self.retries)
+                self.start_action_thread(cnxt, action)
+        except Exception as ex:
+            # Never let an exception stop the timer
+            LOG.exception(ex)
+
+        if self.retries:
+            return max(0, self.retries[0][0] - now)
+        return RETRY_CHECK_INTERVAL
+
     def add_timer(self, interval, func, *args, **kwargs):
         """
         Define a periodic task, to be run in a separate thread, in the target
-        threadgroups.  Periodicity is cfg.CONF.periodic_interval
+        threadgroups.  Periodicity is given by `interval` in seconds.
         """
-        self.group.add_timer(cfg.CONF.periodic_interval,
-                             func, *args, **kwargs)
+        self.group.add_timer(interval, func, *args, **kwargs)
 
     def stop_timers(self):
         self.group.stop_timers()
@@ -120,9 +276,10 @@ class ActionProc(object):
     """
     Wrapper for a resumable task(co-routine) for action execution
     """
-    def __init__(self, cnxt, action):
+    def __init__(self, cnxt, action, tgm=None):
         self.cnxt = cnxt
         self.action = action
+        self.tgm = tgm
 
     def __call__(self, wait_time=1):
         """
@@ -134,12 +291,13 @@ class ActionProc(object):
         status = self.action.get_status()
         while status in (self.action.INIT, self.action.WAITING):
             # TODO(Qiming): Handle 'start_time' field of an action
-            reschedule(self.action, sleep=self.wait_time)
+            reschedule(self.action, sleep_time=wait_time)
             status = self.action.get_status()
 
         # Exit quickly if action has been taken care of or marked
-        # completed or cancelled by other activities
-        if status != self.action.READY:
+        # completed or cancelled by other activities. A RUNNING action
+        # here is one locked by this engine, e.g. one being retried.
+        if status not in (self.action.READY, self.action.RUNNING):
             return
 
         # Do the first step
@@ -153,17 +311,69 @@ class ActionProc(object):
 
         self.action.end_time = wallclock()
 
-        if result == self.action.ERROR:
+        # Don't touch an action reclaimed by other engines while running,
+        # e.g. after the service record of this engine was swept
+        if self.tgm is not None and self.tgm.engine_id is not None:
+            owner = db_api.action_lock_check(self.cnxt, self.action.id,
+                                             self.tgm.engine_id)
+            if owner != self.tgm.engine_id:
+                LOG.warn(_LW('Action %(action)s is now owned by %(owner)s, '
+                             'dropping its result.'),
+                         {'action': self.action.id, 'owner': owner})
+                return
+
+        if result == self.action.RES_ERROR:
             # Error happened during the start,
             # mark entire action as failed and return
+            LOG.info(_LI('Action %s run failed.'), self.action.id)
+            db_api.action_mark_failed(self.cnxt, self.action.id)
+        elif result == self.action.RES_OK:
             LOG.info(_LI('Successfully run action %s.'), self.action.id)
+            # The action may have been cancelled meanwhile, which is handled
+            # by set_status() rather than escaping from the action thread
+            self.action.set_status(self.action.SUCCEEDED)
+        elif result == self.action.RES_RETRY:
+            self.retry()
+
+    def retry(self):
+        """
+        Re-arm the action on the timer queue of the ThreadGroupManager,
+        or fail it if its retry budget has been used up.
+
+        The action stays locked by this engine while waiting, so it will be
+        reclaimed by other engines should this engine die in between.
+        """
+        if self.tgm is None or self.action.retries >= self.action.max_retries:
+            LOG.info(_LI('Action %(action)s failed after %(retries)s '
+                         'retries.'), {'action': self.action.id,
+                                       'retries': self.action.retries})
             db_api.action_mark_failed(self.cnxt, self.action.id)
-        elif result == self.action.OK:
-            LOG.info(_LI('Action %s run failed.'), self.action.id)
-            db_api.action_mark_succeeded(self.cnxt, self.action.id)
-        else:
-            # TODO(Yanyan): handle action retry scenario.
-            pass
+            return
+
+        delay = retry_delay(self.action.retries)
+        self.action.retries = db_api.action_mark_retrying(self.cnxt,
+                                                          self.action.id)
+        LOG.info(_LI('Action %(action)s will be retried (%(retries)s/'
+                     '%(max)s) in %(delay).1f seconds.'),
+                 {'action': self.action.id,
+                  'retries': self.action.retries,
+                  'max': self.action.max_retries,
+                  'delay': delay})
+        self.tgm.schedule_retry(self.cnxt, self.action, delay)
+
+
+def retry_delay(retries):
+    """
+    Compute the delay before retrying an action that has been retried
+    `retries` times already.
+
+    The delay grows exponentially up to cfg.CONF.action_retry_max_delay,
+    with half of it randomized so that actions failed by the same fault
+    won't be retried in lockstep.
+    """
+    delay = min(cfg.CONF.action_retry_max_delay,
+                cfg.CONF.action_retry_base_delay * (2 ** retries))
+    return delay / 2.0 + random.uniform(0, delay / 2.0)
 
 
 def start_action(cnxt, action_id, engine_id, tgm):
@@ -219,14 +429,17 @@ def resume_action(cnxt, action_id):
 
 def cancel_action(cnxt, action_id):
     """
-    Try to cancel an action execution progress
+    Try to cancel an action execution progress, together with all the
+    actions linked to it by dependencies.
+
+    The statuses and control flags of all these actions are set in one
+    DB transaction; workers running them stop when checking the flag.
 
     :param cnxt: The context of rpc request
     :param action_id: The id of action to run in thread
+    :returns: The ids of all actions cancelled
     """
-    # Set action control flag to cancel
-    # TODO: need db_api support
-    db_api.action_control(cnxt, action_id, ACTION_CANCEL)
+    return db_api.action_mark_cancelled(cnxt, action_id)
 
 
 def action_control_flag(action):
@@ -14,6 +14,7 @@
 import functools
 
 from oslo import messaging
+from oslo.utils import excutils
 from oslo.utils import uuidutils
 from osprofiler import profiler
 
@@ -22,12 +23,16 @@ from senlin.common import exception
 from senlin.common.i18n import _
 from senlin.common.i18n import _LI
 from senlin.common import messaging as rpc_messaging
+from senlin.common import senlin_consts as consts
 from senlin.db import api as db_api
 from senlin.engine import action as actions
 from senlin.engine import cluster as clusters
+from senlin.engine import cooldown
 from senlin.engine import dispatcher
+from senlin.engine import health_manager
 from senlin.engine import senlin_lock
 from senlin.engine import scheduler
+from senlin.engine import sharding
 from senlin.openstack.common import log as logging
 from senlin.openstack.common import service
 from senlin.rpc import api as rpc_api
@@ -75,7 +80,22 @@ class EngineService(service.Service):
 
     def start(self):
         self.engine_id = senlin_lock.BaseLock.generate_engine_id()
-        self.TG = scheduler.ThreadGroupManager()
+
+        # Register this engine so that its liveness can be told from its
+        # heartbeats by other engines
+        db_api.service_create(context.get_admin_context(), self.engine_id,
+                              host=self.host, binary='senlin-engine',
+                              topic=self.topic)
+        self.TG = scheduler.ThreadGroupManager(self.engine_id)
+
+        # Take over a fair share of the shards, this engine will be sent
+        # the actions on the objects of these shards
+        admin_context = context.get_admin_context()
+        owned = sharding.rebalance(admin_context)
+
+        # Resume the health checks of the clusters of these shards
+        health_manager.get_manager().load(admin_context,
+                                          owned.get(self.engine_id, []))
 
         # TODO(Yanyan): create a dispatcher for this engine thread.
         # This dispatcher will run in a greenthread and it will not
@@ -107,6 +127,15 @@ class EngineService(service.Service):
         # Notify dispatcher to stop all action threads it started.
         self.dispatcher.stop()
 
+        # Actions still waiting for a retry are left to other engines,
+        # which will reclaim them when the lease of this engine expires
+        admin_context = context.get_admin_context()
+        if not self.TG.retries:
+            db_api.service_delete(admin_context, self.engine_id)
+
+        # Hand the shards of this engine over to the other engines
+        sharding.rebalance(admin_context, leaving=self.engine_id)
+
         # Terminate the engine process
         LOG.info(_LI("All threads were gone, terminating engine"))
         super(EngineService, self).stop()
@@ -168,7 +197,8 @@ class EngineService(service.Service):
             cluster_list = clusters.Cluster.load(context, cluster=db_cluster)
         else:
             cluster_list = clusters.Cluster.load_all(context,
-                                                     show_deleted=True)
+                                                     show_deleted=True,
+                                                     stale_ok=True)
 
         # Format clusters info
         clusters_info = []
@@ -195,10 +225,13 @@ class EngineService(service.Service):
         :param show_nested: if true, show nested clusters
         :returns: a list of formatted clusters
         """
+        # Listings may lag behind a little, they are served by the database
+        # replica when there is one
         cluster_list = clusters.Cluster.load_all(context, limit, marker,
                                                  sort_keys, sort_dir,
                                                  filters, tenant_safe,
-                                                 show_deleted, show_nested)
+                                                 show_deleted, show_nested,
+                                                 stale_ok=True)
 
         # Format clusters info
         clusters_info = []
@@ -235,10 +268,7 @@ class EngineService(service.Service):
         action = actions.Action(context, cluster, 'CLUSTER_CREATE', **kwargs)
         action.store()
         # Notify Dispatchers that a new action has been ready.
-        dispatcher.notify(context,
-                          self.dispatcher.NEW_ACTION,
-                          None,
-                          action_id=action.id)
+        dispatcher.start_action(context, action.id, cluster.id)
 
         return cluster.id
 
@@ -270,10 +300,7 @@ class EngineService(service.Service):
         }
 
         action = actions.Action(context, cluster, 'CLUSTER_UPDATE', **kwargs)
-        dispatcher.notify(context,
-                          self.dispatcher.NEW_ACTION,
-                          None,
-                          action_id=action.id)
+        dispatcher.start_action(context, action.id, cluster.id)
 
         return cluster.id
 
@@ -291,9 +318,46 @@ class EngineService(service.Service):
 
         cluster = clusters.Cluster.load(context, cluster=db_cluster)
         action = actions.Action(context, cluster, 'CLUSTER_DELETE')
-        res = dispatcher.notify(context,
-                                self.dispatcher.NEW_ACTION,
-                                None,
-                                action_id=action.id)
+        res = dispatcher.start_action(context, action.id, cluster.id)
 
         return res
+
+    @request_context
+    def trigger_policy(self, context, cluster_id, policy_id,
+                       action='CLUSTER_SCALE_UP'):
+        '''
+        Handle an alarm asking a policy attached to a cluster to act.
+
+        :param context: RPC context.
+        :param cluster_id: ID of the cluster.
+        :param policy_id: ID of the policy attached to the cluster.
+        :param action: the cluster action to start.
+        :returns: the ID of the action started, or None if the policy is in
+                  cooldown.
+        '''
+        if action not in (consts.CLUSTER_SCALE_UP, consts.CLUSTER_SCALE_DOWN):
+            raise exception.ClusterActionNotSupported(action=action)
+
+        # Alarm storms are turned down here, before any object is loaded
+        if not cooldown.claim(context, cluster_id, policy_id):
+            LOG.debug('Policy %(policy)s of cluster %(cluster)s is in '
+                      'cooldown, ignoring %(action)s' % {
+                          'policy': policy_id, 'cluster': cluster_id,
+                          'action': action})
+            return None
+
+        kwargs = {
+            'target': cluster_id,
+            'cause': 'Policy %s triggered' % policy_id,
+            'status': actions.Action.READY,
+        }
+        try:
+            action = actions.Action(context, action, **kwargs)
+            action.store()
+        except Exception:
+            # Nothing was triggered, the next alarm may try again
+            with excutils.save_and_reraise_exception():
+                cooldown.release(context, cluster_id, policy_id)
+
+        dispatcher.start_action(context, action.id, cluster_id)
+        return action.id
@@ -0,0 +1,76 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+'''
+Partitioning of the objects managed by engines.
+
+Objects are hashed into a fixed number of shards, and each shard is owned
+by one live engine. The shard map is kept in the database and rebalanced
+when an engine joins or leaves, so that actions on an object are sent to
+the engine owning its shard instead of being claimed by all engines.
+'''
+
+import zlib
+
+from oslo.config import cfg
+
+from senlin.common.i18n import _LI
+from senlin.db import api as db_api
+from senlin.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+def shard_of(obj_id):
+    '''
+    Get the shard of an object, e.g. a cluster, from its ID.
+    '''
+    return (zlib.crc32(obj_id.encode('utf-8')) & 0xffffffff) % \
+        cfg.CONF.num_shards
+
+
+def owner_of(context, obj_id):
+    '''
+    Get the ID of the engine owning the shard of an object, None if the
+    shard has no owner.
+    '''
+    shard = db_api.shard_get(context, shard_of(obj_id))
+    if shard is None:
+        return None
+    return shard.engine_id
+
+
+def live_engines(context):
+    '''
+    Get the IDs of the engines whose lease hasn't expired.
+    '''
+    expired = db_api.service_get_all_expired(context,
+                                             cfg.CONF.engine_lease_timeout)
+    expired = set(s.id for s in expired)
+    return [s.id for s in db_api.service_get_all(context)
+            if s.id not in expired]
+
+
+def rebalance(context, leaving=None):
+    '''
+    Spread the shards over the live engines.
+
+    :param context: the context used for DB operations;
+    :param leaving: optional ID of an engine to leave out, e.g. one being
+                    stopped.
+    :returns: a dict mapping each engine ID to the list of its shards.
+    '''
+    engines = [e for e in live_engines(context) if e != leaving]
+    owned = db_api.shard_rebalance(context, engines, cfg.CONF.num_shards)
+    LOG.info(_LI('Rebalanced %(shards)s shards over %(count)s engine(s).'),
+             {'shards': cfg.CONF.num_shards, 'count': len(engines)})
+    return owned
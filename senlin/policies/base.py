@@ -10,10 +10,28 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+
+from oslo.config import cfg
+
+from senlin.common import cache
 from senlin.common import exception
+from senlin.common.i18n import _
 from senlin.db import api as db_api
 from senlin.engine import environment
 
+# Policies recently loaded, keyed by ID
+_cache = None
+
+
+def _get_cache():
+    global _cache
+
+    if _cache is None:
+        _cache = cache.LRUCache(cfg.CONF.object_cache_size,
+                                ttl=cfg.CONF.object_cache_ttl)
+    return _cache
+
 
 class Policy(object):
     '''
@@ -64,11 +82,17 @@ class Policy(object):
 
         if self.id:
             db_api.policy_update(self.context, self.id, values)
+            invalidate(self.id)
         else:
             policy = db_api.policy_create(self.context, values)
             self.id = policy.id
         return self.id
 
+    @classmethod
+    def delete(cls, context, policy_id):
+        db_api.policy_delete(context, policy_id)
+        invalidate(policy_id)
+
     @classmethod
     def from_db_record(cls, context, record):
         '''
@@ -91,14 +115,21 @@ class Policy(object):
     @classmethod
     def load(cls, context, policy_id):
         '''
-        Retrieve and reconstruct a policy object from DB.
+        Retrieve and reconstruct a policy object from cache or DB.
         '''
-        policy = db_api.policy_get(context, policy_id)
+        policy = _get_cache().get(policy_id)
         if policy is None:
-            msg = _('No policy with id "%s" exists') % policy_id
-            raise exception.NotFound(msg)
+            record = db_api.policy_get(context, policy_id)
+            if record is None:
+                msg = _('No policy with id "%s" exists') % policy_id
+                raise exception.NotFound(msg)
+
+            policy = cls.from_db_record(context, record)
+            _get_cache().put(policy_id, policy)
 
-        return cls.from_db_record(context, policy)
+        policy = copy.copy(policy)
+        policy.context = context
+        return policy
 
     def pre_op(self, cluster_id, action, **kwargs):
         '''
@@ -121,6 +152,20 @@ class Policy(object):
         '''
         return NotImplemented
 
+    def attach(self, cluster_id):
+        '''
+        Called when the policy has been attached to a cluster, for subclasses
+        to override.
+        '''
+        return True
+
+    def detach(self, cluster_id):
+        '''
+        Called when the policy has been detached from a cluster, for
+        subclasses to override.
+        '''
+        return True
+
     def to_dict(self):
         pb_dict = {
             'id': self.id,
@@ -138,3 +183,21 @@ class Policy(object):
         type_name = kwargs.get('type', '')
         name = kwargs.get('name', '')
         return cls(type_name, name, **kwargs)
+
+
+def load(context, policy_id):
+    return Policy.load(context, policy_id)
+
+
+def invalidate(policy_id):
+    '''
+    Drop a policy from the cache, e.g. after it has been updated or deleted.
+    '''
+    _get_cache().pop(policy_id)
+
+
+def cache_info():
+    '''
+    Get the hit and miss counters and the size of the policy cache.
+    '''
+    return _get_cache().info()
@@ -10,7 +10,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import random
+import collections
 
 from senlin.common import senlin_consts as consts
 from senlin.db import api as db_api
@@ -43,11 +43,19 @@ class DeletionPolicy(base.Policy):
     def __init__(self, type_name, name, **kwargs):
         super(DeletionPolicy, self).__init__(type_name, name, **kwargs)
 
-        self.criteria = kwargs.get('criteria', '')
-        self.grace_period = kwargs.get('grace_period', 0)
-        self.reduce_desired_capacity = kwargs.get('reduce_desired_capacity',
-                                                  False)
-        random.seed()
+        self.criteria = self.spec.get('criteria',
+                                      kwargs.get('criteria',
+                                                 self.YOUNGEST_FIRST))
+        # Node statuses to choose victims from before any other node,
+        # e.g. ['ERROR']
+        self.status_first = self.spec.get('status_first') or []
+        # Whether to take victims from the most crowded availability zones
+        self.balance_zones = self.spec.get('balance_zones', False)
+        self.grace_period = self.spec.get('grace_period',
+                                          kwargs.get('grace_period', 0))
+        self.reduce_desired_capacity = self.spec.get(
+            'reduce_desired_capacity',
+            kwargs.get('reduce_desired_capacity', False))
 
     def pre_op(self, cluster_id, action, **kwargs):
         '''
@@ -55,23 +63,62 @@ class DeletionPolicy(base.Policy):
         '''
         return True
 
+    def _balance_zones(self, cluster_id, candidates, count):
+        '''
+        Pick victims one by one from the zone which has the most nodes
+        left, keeping the order of the candidates within a zone.
+        '''
+        zones = db_api.node_get_zones(self.context, cluster_id)
+        per_zone = collections.OrderedDict()
+        for node_id in candidates:
+            zone = zones.get(node_id)
+            per_zone.setdefault(zone, collections.deque()).append(node_id)
+
+        victims = []
+        while len(victims) < count and per_zone:
+            zone = max(per_zone, key=lambda z: len(per_zone[z]))
+            victims.append(per_zone[zone].popleft())
+            if not per_zone[zone]:
+                del per_zone[zone]
+
+        return victims
+
     def enforce(self, cluster_id, action, **kwargs):
         '''
         The enforcement of a deletion policy returns the chosen victims
         that will be deleted.
+
+        :param kwargs: 'count' is the number of victims to choose, 1 by
+                       default.
+        :returns: a list of node IDs.
         '''
-        nodes = db_api.node_get_all_by_cluster_id(cluster_id)
-        if self.criteria == self.RANDOM:
-            rand = random.randrange(len(nodes))
-            return nodes[rand]
-
-        sorted_list = sorted(nodes, key=lambda r: (r.created_time, r.name))
-        if self.criteria == self.OLDEST_FIRST:
-            victim = sorted_list[0]
-        else:  # self.criteria == self.YOUNGEST_FIRST:
-            victim = sorted_list[-1]
-
-        return victim
+        count = kwargs.get('count', 1)
+        if count <= 0:
+            return []
+
+        if not self.balance_zones:
+            return db_api.node_get_victims(self.context, cluster_id,
+                                           count=count,
+                                           criteria=self.criteria,
+                                           statuses=self.status_first)
+
+        # Nodes in a preferred status are taken regardless of their zone
+        victims = []
+        if self.status_first:
+            filters = {'status': self.status_first}
+            victims = db_api.node_get_victims(self.context, cluster_id,
+                                              count=count,
+                                              criteria=self.criteria,
+                                              filters=filters)
+            if len(victims) == count:
+                return victims
+
+        chosen = set(victims)
+        candidates = db_api.node_get_victims(self.context, cluster_id,
+                                             criteria=self.criteria)
+        candidates = [c for c in candidates if c not in chosen]
+        return victims + self._balance_zones(cluster_id, candidates,
+                                             count - len(victims))
 
     def post_op(self, cluster_id, action, **kwargs):
         # TODO(Qiming): process grace period here if needed
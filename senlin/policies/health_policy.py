@@ -11,6 +11,7 @@
 # under the License.
 
 from senlin.common import senlin_consts as consts
+from senlin.engine import health_manager
 from senlin.policies import base
 
 
@@ -20,12 +21,12 @@ class HealthPolicy(base.Policy):
     '''
 
     CHECK_TYPES = (
+        STACK_STATUS_POLLING,
         VM_LIFECYCLE_EVENTS,
-        VM_STATUS_POLLING,
         LB_STATUS_POLLING,
     ) = (
+        'stack_status_polling',
         'vm_lifecycle_events',
-        'vm_status_polling',
         'lb_status_polling',
     )
 
@@ -34,19 +35,33 @@ class HealthPolicy(base.Policy):
         ('AFTER', consts.CLUSTER_ADD_NODES),
         ('BEFORE', consts.CLUSTER_SCALE_DOWN),
         ('BEFORE', consts.CLUSTER_DEL_NODES),
+        ('AFTER', consts.CLUSTER_SCALE_DOWN),
+        ('AFTER', consts.CLUSTER_DEL_NODES),
     ]
 
+    # Nodes backed by stacks of their own, whose status is polled
     PROFILE_TYPE = [
-        'os.nova.server',
-        'AWS.AutoScaling.LaunchConfiguration',
+        'os.heat.stack',
     ]
 
     def __init__(self, type_name, name, **kwargs):
-        super(HealthPolicy, self).__init__(type_name, name, kwargs)
+        super(HealthPolicy, self).__init__(type_name, name, **kwargs)
 
-        self.interval = self.spec.get('interval')
-        self.grace_period = self.spec.get('grace_period')
-        self.check_type = self.spec.get('check_type')
+        self.interval = self.spec.get('interval') or 60
+        self.grace_period = self.spec.get('grace_period') or 0
+        self.check_type = self.spec.get('check_type',
+                                        self.STACK_STATUS_POLLING)
+
+    def attach(self, cluster_id):
+        # Start checking the nodes the cluster already has
+        health_manager.get_manager().sync_cluster(
+            self.context, cluster_id, self.check_type, self.interval,
+            self.grace_period)
+        return True
+
+    def detach(self, cluster_id):
+        health_manager.get_manager().remove_cluster(cluster_id)
+        return True
 
     def pre_op(self, cluster_id, action, **args):
         # Ignore actions that are not required to be processed at this stage
@@ -54,18 +69,16 @@ class HealthPolicy(base.Policy):
                           consts.CLUSTER_DEL_NODES):
             return True
 
-        # TODO(anyone): Unsubscribe nodes from backend health monitoring
-        #               infrastructure
+        # Nodes going away must not be taken for failed ones
+        health_manager.get_manager().suspend_cluster(cluster_id)
         return True
 
     def enforce(self, cluster_id, action, **args):
         pass
 
     def post_op(self, cluster_id, action, **args):
-        # Ignore irrelevant action here
-        if action not in (consts.CLUSTER_SCALE_UP, consts.CLUSTER_ADD_NODES):
-            return True
-
-        # TODO(anyone): subscribe to vm-lifecycle-events for the specified VM
-        #                or add vm to the list of VM status polling
+        # Start checking the new nodes, stop checking the removed ones
+        health_manager.get_manager().sync_cluster(
+            self.context, cluster_id, self.check_type, self.interval,
+            self.grace_period)
         return True
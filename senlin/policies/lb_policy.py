@@ -11,8 +11,14 @@
 # under the License.
 
 from senlin.common import senlin_consts as consts
+from senlin.common.i18n import _LW
+from senlin.db import api as db_api
+from senlin.drivers import base as drivers
+from senlin.openstack.common import log as logging
 from senlin.policies import base
 
+LOG = logging.getLogger(__name__)
+
 
 class LoadBalancingPolicy(base.Policy):
     '''
@@ -28,6 +34,8 @@ class LoadBalancingPolicy(base.Policy):
         ('AFTER', consts.CLUSTER_SCALE_UP),
         ('BEFORE', consts.CLUSTER_DEL_NODES),
         ('BEFORE', consts.CLUSTER_SCALE_DOWN),
+        ('AFTER', consts.CLUSTER_DEL_NODES),
+        ('AFTER', consts.CLUSTER_SCALE_DOWN),
     ]
 
     PROFILE_TYPE = [
@@ -35,25 +43,95 @@ class LoadBalancingPolicy(base.Policy):
         'aws.autoscaling.launchconfig',
     ]
 
+    # Key of the pool members in the data of a cluster
+    MEMBERS = 'lb_members'
+
     def __init__(self, type_name, name, **kwargs):
-        super(LoadBalancingPolicy, self).__init__(type_name, name, kwargs)
+        super(LoadBalancingPolicy, self).__init__(type_name, name, **kwargs)
+
+        # IDs of the pools the nodes are members of
+        self.pools = self.spec.get('pools') or []
+        self.protocol_port = self.spec.get('protocol_port', 80)
+        # Stack output holding the address of a node
+        self.address_output = self.spec.get('address_output', 'address')
+
+    def _get_address(self, node):
+        address = (node.data or {}).get('address')
+        if address or not node.physical_id:
+            return address
+
+        hc = drivers.heat(self.context)
+        stack = hc.stacks.get(node.physical_id.split('/')[0])
+        for output in getattr(stack, 'outputs', None) or []:
+            if output.get('output_key') == self.address_output:
+                return output.get('output_value')
+        return None
+
+    def _update_members(self, cluster_id, leaving=None):
+        '''
+        Make the pools hold the nodes of the cluster, except those
+        leaving it, with one update of each pool.
+        '''
+        leaving = set(leaving or [])
+        records = db_api.node_get_all_by_cluster(self.context, cluster_id)
+        nodes = dict((r.id, r) for r in records.values()
+                     if r.id not in leaving and r.physical_id)
+
+        cluster = db_api.cluster_get(self.context, cluster_id)
+        all_members = dict((cluster.data or {}).get(self.MEMBERS) or {})
 
-        self.lb_names = kwargs.get('loadbalancer_names')
+        lb = drivers.lbaas(self.context)
+        changed = False
+        for pool_id in self.pools:
+            members = dict(all_members.get(pool_id) or {})
+            remove = [members.pop(node_id) for node_id in list(members)
+                      if node_id not in nodes]
+
+            add = []
+            for node_id, node in nodes.items():
+                if node_id in members:
+                    continue
+                address = self._get_address(node)
+                if address is None:
+                    LOG.warning(_LW('No address found for node %s, it is '
+                                    'not added to the load balancer'),
+                                node_id)
+                    continue
+                add.append({'node_id': node_id, 'address': address,
+                            'protocol_port': self.protocol_port})
+
+            if not add and not remove:
+                continue
+
+            members.update(lb.update_members(pool_id, add=add,
+                                             remove=remove))
+            all_members[pool_id] = members
+            changed = True
+
+        if changed:
+            # Only the members are written, other keys of the data may have
+            # been changed while the pools were updated
+            def update(data):
+                data[self.MEMBERS] = all_members
+
+            db_api.cluster_update_data(self.context, cluster_id, update)
 
     def pre_op(self, cluster_id, action, **args):
         if action not in (consts.CLUSTER_DEL_NODES,
                           consts.CLUSTER_SCALE_DOWN):
             return True
 
-        # TODO(anyone): remove nodes from loadbalancer
+        # Stop sending traffic to the nodes going away before they are
+        # removed, the action chooses them before checking its policies
+        leaving = (args.get('inputs') or {}).get('nodes')
+        if leaving:
+            self._update_members(cluster_id, leaving=leaving)
         return True
 
     def enforce(self, cluster_id, action, **args):
         pass
 
     def post_op(self, cluster_id, action, **args):
-        if action not in (consts.CLUSTER_ADD_NODES, consts.CLUSTER_SCALE_UP):
-            return True
-
-        # TODO(anyone): add nodes to loadbalancer
+        # All the member changes made by the action are applied at once
+        self._update_members(cluster_id)
         return True
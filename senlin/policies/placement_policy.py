@@ -10,16 +10,54 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import heapq
+
 from senlin.common import senlin_consts as consts
+from senlin.common.i18n import _LW
+from senlin.db import api as db_api
+from senlin.openstack.common import log as logging
 from senlin.policies import base
 
+LOG = logging.getLogger(__name__)
+
+# Key of the number of nodes per zone in the data of a cluster
+ZONE_COUNTS = 'zone_counts'
+
+
+def update_zone_counts(data, zones, delta):
+    '''
+    Add `delta` to the node count of the zone of each node.
+
+    :param data: the data of a cluster, updated in place;
+    :param zones: a list of zone names, None for nodes not placed.
+    :returns: True if any count was changed.
+    '''
+    counts = dict(data.get(ZONE_COUNTS) or {})
+    changed = False
+    for zone in zones:
+        if zone is None:
+            continue
+        counts[zone] = max(counts.get(zone, 0) + delta, 0)
+        changed = True
+
+    if changed:
+        data[ZONE_COUNTS] = counts
+    return changed
 
-class PlacementPolicy(base.PolicyBase):
+
+class PlacementPolicy(base.Policy):
     '''
     Policy for placing members of a cluster.
 
     This policy is expected to be enforced before new member(s) added to an
     existing cluster.
+
+    New nodes are spread over the availability zones listed in 'AZs', or
+    else over the regions listed in 'regions', in proportion to the
+    'weight' of each of them and without going over its 'max_nodes'.  The
+    number of nodes in each zone is kept in the data of the cluster and
+    maintained by the nodes as they are created, deleted, recovered or
+    moved, so the members are never counted.
     '''
 
     TARGET = [
@@ -28,24 +66,74 @@ class PlacementPolicy(base.PolicyBase):
 
     PROFILE_TYPE = [
         'os.nova.server',
+        'os.heat.stack',
+        'os.heat.resource',
         'aws.autoscaling.launchconfig',
     ]
 
     def __init__(self, type_name, name, **kwargs):
-        super(PlacementPolicy, self).__init__(type_name, name, kwargs)
+        super(PlacementPolicy, self).__init__(type_name, name, **kwargs)
 
         self.regions = self.spec.get('regions')
         self.AZs = self.spec.get('AZs')
 
+        # Nodes are placed in zones if any, in regions otherwise
+        if self.AZs:
+            self.placement_key, entries = 'zone', self.AZs
+        else:
+            self.placement_key, entries = 'region', self.regions or []
+        self.zones = [self._parse_zone(e) for e in entries]
+
+    def _parse_zone(self, entry):
+        # Either a name or a dict with 'name', 'weight' and 'max_nodes'
+        if not isinstance(entry, dict):
+            entry = {'name': entry}
+        return (entry['name'], float(entry.get('weight', 1)),
+                entry.get('max_nodes'))
+
     def pre_op(self, cluster_id, action, **args):
-        # TODO(anyone): calculate available AZs and or regions
         return True
 
     def enforce(self, cluster_id, action, **kwargs):
-        # we expect kwargs to carry node profile information before the node
-        # is created.
-        # TODO(anyone): modify node's scheduler hints and return them
-        return True
+        '''
+        Choose where to place new nodes.
+
+        Each node goes to the zone with the fewest nodes for its weight,
+        which is the top of a heap, so placing k nodes over z zones takes
+        O(z + k log z).
+
+        :param kwargs: 'count' is the number of nodes to place, 1 by
+                       default.
+        :returns: a list of placements to be kept in the data of the new
+                  nodes, shorter than count if all zones are full.
+        '''
+        count = kwargs.get('count', 1)
+        cluster = db_api.cluster_get(self.context, cluster_id)
+        counts = (cluster.data or {}).get(ZONE_COUNTS) or {}
+
+        heap = []
+        for name, weight, max_nodes in self.zones:
+            size = counts.get(name, 0)
+            if weight <= 0 or (max_nodes is not None and size >= max_nodes):
+                continue
+            heap.append(((size + 1) / weight, name, size, weight, max_nodes))
+        heapq.heapify(heap)
+
+        placements = []
+        while heap and len(placements) < count:
+            key, name, size, weight, max_nodes = heapq.heappop(heap)
+            placements.append({self.placement_key: name})
+            size += 1
+            if max_nodes is None or size < max_nodes:
+                heapq.heappush(heap, ((size + 1) / weight, name, size,
+                                      weight, max_nodes))
+
+        if len(placements) < count:
+            LOG.warning(_LW('Only %(placed)s of %(count)s nodes of cluster '
+                            '%(cluster)s could be placed, all zones are '
+                            'full'), {'placed': len(placements),
+                                      'count': count, 'cluster': cluster_id})
+        return placements
 
     def post_op(self, cluster_id, action, **kwargs):
-        pass
+        return True
@@ -11,6 +11,7 @@
 # under the License.
 
 from senlin.common import senlin_consts as consts
+from senlin.engine import cooldown
 from senlin.policies import base
 
 
@@ -41,16 +42,20 @@ class ScalingPolicy(base.Policy):
         'ANY',
     ]
 
+    ADJUSTMENT_TYPES = (
+        EXACT_CAPACITY, CHANGE_IN_CAPACITY, CHANGE_IN_PERCENTAGE,
+    ) = (
+        'EXACT_CAPACITY', 'CHANGE_IN_CAPACITY', 'CHANGE_IN_PERCENTAGE',
+    )
+
     def __init__(self, type_name, name, **kwargs):
         super(ScalingPolicy, self).__init__(type_name, name, **kwargs)
 
         self.min_size = self.spec.get('min_size')
         self.max_size = self.spec.get('max_size')
-        self.adjustment_type = self.spec.get('adjustment_type')
-        self.adjustment_number = self.spec.get('adjustment_number')
-
-        # TODO(anyone): Make sure the default cooldown can be used if
-        # not specified
+        self.adjustment_type = self.spec.get('adjustment_type',
+                                             self.CHANGE_IN_CAPACITY)
+        self.adjustment_number = self.spec.get('adjustment_number', 1)
 
     def pre_op(self, cluster_id, action, **args):
         # TODO(anyone): get cluster size, calculate new size
@@ -59,11 +64,36 @@ class ScalingPolicy(base.Policy):
         return True
 
     def enforce(self, cluster_id, action, **kwargs):
-        # if action in (consts.CLUSTER_SCALE_UP, consts.CLUSTER_SCALE_DOWN):
-        #     amount = get_adjustment(action)
+        '''
+        Return the number of nodes to add or remove by a scaling action,
+        within the min_size and max_size limits.
+
+        :param kwargs: 'size' is the current size of the cluster.
+        '''
+        size = kwargs.get('size', 0)
+        number = self.adjustment_number
+        scale_up = action.action == consts.CLUSTER_SCALE_UP
+        if self.adjustment_type == self.EXACT_CAPACITY:
+            # Only move towards the target capacity
+            if scale_up:
+                count = max(number - size, 0)
+            else:
+                count = max(size - number, 0)
+        elif self.adjustment_type == self.CHANGE_IN_PERCENTAGE:
+            count = max(int(size * number / 100.0), 1)
+        else:
+            count = number
+
+        if scale_up:
+            if self.max_size is not None:
+                count = min(count, self.max_size - size)
+        elif self.min_size is not None:
+            count = min(count, size - self.min_size)
 
-        # TODO(anyone): return new nodes to be added/removed.
-        pass
+        return max(count, 0)
 
     def post_op(self, cluster_id, action, **kwargs):
+        # The cooldown runs from the end of the scaling
+        if action in (consts.CLUSTER_SCALE_UP, consts.CLUSTER_SCALE_DOWN):
+            cooldown.record(self.context, cluster_id, self.id)
         return True
@@ -11,6 +11,7 @@
 # under the License.
 
 from senlin.common import senlin_consts as consts
+from senlin.db import api as db_api
 from senlin.policies import base
 
 
@@ -34,17 +35,45 @@ class UpdatePolicy(base.Policy):
     def __init__(self, type_name, name, **kwargs):
         super(UpdatePolicy, self).__init__(type_name, name, **kwargs)
 
-        self.min_in_service = self.spec.get('min_in_service')
-        self.max_batch_size = self.spec.get('max_batch_size')
-        self.pause_time = self.spec.get('pause_time')
+        # Minimum number of nodes kept in service during an update
+        self.min_in_service = self.spec.get('min_in_service') or 0
+        # Maximum number of nodes updated at the same time, no limit if 0
+        self.max_batch_size = self.spec.get('max_batch_size') or 0
+        # Seconds to wait between two batches
+        self.pause_time = self.spec.get('pause_time') or 0
 
     def pre_op(self, cluster_id, action, **kwargs):
         return True
 
+    def get_batch_size(self, total):
+        '''
+        Number of nodes to update at a time given the number of nodes to
+        update, which is at least 1 so that an update can always progress.
+        '''
+        size = total
+        if self.max_batch_size:
+            size = min(size, self.max_batch_size)
+        if self.min_in_service:
+            size = min(size, total - self.min_in_service)
+        return max(size, 1)
+
     def enforce(self, cluster_id, action, **kwargs):
-        candidates = []
-        # TODO(anyone): select candidates for update based on criteria
-        return candidates
+        '''
+        Split the nodes to update into batches.
+
+        :param kwargs: 'nodes' is the list of IDs of the nodes to update,
+                       all nodes of the cluster by default.
+        :returns: a list of batches, each a list of node IDs, to be updated
+                  one batch after another.
+        '''
+        candidates = kwargs.get('nodes', None)
+        if candidates is None:
+            records = db_api.node_get_all_by_cluster(self.context, cluster_id)
+            candidates = [r.id for r in records.values()]
+
+        size = self.get_batch_size(len(candidates))
+        return [candidates[i:i + size]
+                for i in range(0, len(candidates), size)]
 
     def post_op(self, cluster_id, action, **kwargs):
         return True
@@ -10,15 +10,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import uuid
-
-from senlin.drivers import heat_v1 as heat
-from senlin.profiles import base
+from senlin.profiles.os.heat import resource
 
 __type_name__ = 'aws.autoscaling.launchconfig'
 
 
-class LaunchConfigProfile(base.ProfileBase):
+class LaunchConfigProfile(resource.ResourceProfile):
     '''
     Profile for an AWS AutoScaling LaunchConfiguration.
 
@@ -26,36 +23,20 @@ class LaunchConfigProfile(base.ProfileBase):
     member is a YAML snippet that describes a
     AWS::AutoScaling::LaunchConfiguration resource.
     '''
-    def __init__(self, name, type_name=__type_name__, **kwargs):
-        super(LaunchConfigProfile, self).__init__(name, type_name, kwargs)
-
-        self.ImageId = kwargs.get('ImageId')
-        self.InstanceType = kwargs.get('InstanceType')
-        self.KeyName = kwargs.get('KeyName')
-        self.UserData = kwargs.get('UserData')
-        self.SecurityGroups = kwargs.get('SecurityGroups')
-        self.KernelId = kwargs.get('KernelId')
-        self.RamDiskId = kwargs.get('RamDiskId')
-        self.BlockDeviceMappings = kwargs.get('BlockDeviceMappings')
-        self.NovaSchedulerHings = kwargs.get('NovaSchedulerHints')
-        
-        # new properties
-        self.InstanceMonitoring = kwargs.get('InstanceMonitoring')
-        self.SpotPrice = kwargs.get('SpotPrice')
-        self.AssocatePublicIpAddress = kwargs.get('AssociatePublicIpAddress')
-        self.PlaementTenancy = kwargs.get('PlacementTenancy')
 
-    def do_create(self):
-        '''
-        This method creates a YAML format Heat resource definition.
-        '''
-        return tmpl
+    RESOURCE_TYPE = 'AWS::AutoScaling::LaunchConfiguration'
 
-    def do_delete(self):
-        return True
+    PROPERTY_NAMES = (
+        'ImageId', 'InstanceType', 'KeyName', 'UserData', 'SecurityGroups',
+        'KernelId', 'RamDiskId', 'BlockDeviceMappings', 'NovaSchedulerHints',
+        # new properties
+        'InstanceMonitoring', 'SpotPrice', 'AssociatePublicIpAddress',
+        'PlacementTenancy',
+    )
 
-    def do_update(self, ):
-        self.status = self.UPDATING
+    def __init__(self, type_name, name, **kwargs):
+        super(LaunchConfigProfile, self).__init__(type_name, name, **kwargs)
 
-        self.status = self.ACTIVE
-        return True
+        self.resource_type = self.RESOURCE_TYPE
+        self.properties = dict((k, self.spec[k]) for k in self.PROPERTY_NAMES
+                               if self.spec.get(k) is not None)
@@ -10,14 +10,31 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
 
+from oslo.config import cfg
+
+from senlin.common import cache
 from senlin.common import exception
+from senlin.common.i18n import _
 from senlin.db import api as db_api
 from senlin.engine import environment
 from senlin.openstack.common import log as logging
 
 LOG = logging.getLogger(__name__)
 
+# Profiles recently loaded, keyed by ID
+_cache = None
+
+
+def _get_cache():
+    global _cache
+
+    if _cache is None:
+        _cache = cache.LRUCache(cfg.CONF.object_cache_size,
+                                ttl=cfg.CONF.object_cache_ttl)
+    return _cache
+
 
 class Profile(object):
     '''
@@ -66,18 +83,27 @@ class Profile(object):
     @classmethod
     def load(cls, context, profile_id):
         '''
-        Retrieve a profile object from database.
+        Retrieve a profile object from cache or database.
         '''
-        profile = db_api.profile_get(context, profile_id)
+        profile = _get_cache().get(profile_id)
         if profile is None:
-            msg = _('No profile with id "%s" exists') % profile_id
-            raise exception.NotFound(msg)
+            record = db_api.profile_get(context, profile_id)
+            if record is None:
+                msg = _('No profile with id "%s" exists') % profile_id
+                raise exception.NotFound(msg)
 
-        return cls.from_db_record(context, profile)
+            profile = cls.from_db_record(context, record)
+            _get_cache().put(profile_id, profile)
+
+        # Profiles keep data about the operation in progress, every caller
+        # gets its own copy
+        return copy.copy(profile)
 
     def store(self):
         '''
         Store the profile into database and return its ID.
+        This could be a profile_create or a profile_update DB API invocation,
+        depends on whether self.id is set.
         '''
         values = {
             'name': self.name,
@@ -86,8 +112,18 @@ class Profile(object):
             'permission': self.permission,
             'tags': self.tags,
         }
-        profile = db_api.profile_create(self.context, values)
-        return profile.id
+        if self.id:
+            db_api.profile_update(self.context, self.id, values)
+            invalidate(self.id)
+        else:
+            profile = db_api.profile_create(self.context, values)
+            self.id = profile.id
+        return self.id
+
+    @classmethod
+    def delete(cls, context, profile_id):
+        db_api.profile_delete(context, profile_id)
+        invalidate(profile_id)
 
     @classmethod
     def create_object(cls, obj):
@@ -136,3 +172,21 @@ class Profile(object):
     @classmethod
     def from_dict(cls, **kwargs):
         return cls(kwargs)
+
+
+def load(context, profile_id):
+    return Profile.load(context, profile_id)
+
+
+def invalidate(profile_id):
+    '''
+    Drop a profile from the cache, e.g. after it has been updated or deleted.
+    '''
+    _get_cache().pop(profile_id)
+
+
+def cache_info():
+    '''
+    Get the hit and miss counters and the size of the profile cache.
+    '''
+    return _get_cache().info()
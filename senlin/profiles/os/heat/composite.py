@@ -0,0 +1,301 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+'''
+Composite Heat stacks.
+
+Nodes of resource-style profiles are resources of one Heat stack per
+cluster rather than stacks of their own. Changes to the resources of a
+cluster requested at about the same time are applied with a single stack
+create or update.
+'''
+
+import eventlet
+from eventlet import event
+from oslo.config import cfg
+
+from senlin.common import exception
+from senlin.common.i18n import _
+from senlin.db import api as db_api
+from senlin.drivers import base as drivers
+from senlin.engine import clients
+from senlin.openstack.common import log as logging
+from senlin.profiles.os.heat import poller
+
+LOG = logging.getLogger(__name__)
+
+TEMPLATE_VERSION = '2013-05-23'
+
+# Key of the stack ID in the data of a cluster
+STACK_ID = 'composite_stack_id'
+
+# Times the status of a stack is read again when it is still the status of
+# an earlier operation
+_STALE_STATUS_RETRIES = 3
+
+# Composite stacks being changed by this engine keyed by cluster ID, or node
+# ID for nodes not in a cluster. A stack is dropped when idle so that the
+# next change starts from the stack ID stored in the database.
+_stacks = {}
+
+
+class CompositeStack(object):
+    '''
+    The Heat stack holding the resources of all nodes of a cluster.
+    '''
+
+    def __init__(self, context, cluster_id, owner_id):
+        self.context = context
+        self.cluster_id = cluster_id
+        self.owner_id = owner_id
+        self.name = 'senlin-%s' % owner_id
+        self.stack_id = None
+        if cluster_id:
+            self.stack_id = self._load_stack_id()
+
+        # Resource name -> definition, None for resources to remove
+        self.pending = {}
+        self.waiters = []
+        self.runner = None
+
+    def apply(self, context, name, definition):
+        '''
+        Add, replace or remove (if definition is None) a resource, and wait
+        until the stack has been changed.
+
+        :returns: the ID of the stack.
+        '''
+        # The stack is changed with the context of the latest request
+        self.context = context
+        self.pending[name] = definition
+        waiter = event.Event()
+        self.waiters.append(waiter)
+        if self.runner is None:
+            self.runner = eventlet.spawn(self._run)
+
+        return waiter.wait()
+
+    def _run(self):
+        try:
+            # Let other nodes of the cluster join this round
+            eventlet.sleep(cfg.CONF.composite_stack_batch_window)
+            # Requests coming while the stack is being changed are applied
+            # in the next round
+            while self.pending:
+                self._flush()
+        finally:
+            self.runner = None
+            if not self.pending and _stacks.get(self.owner_id) is self:
+                del _stacks[self.owner_id]
+
+    def _flush(self):
+        pending, self.pending = self.pending, {}
+        waiters, self.waiters = self.waiters, []
+
+        try:
+            self._change(pending)
+        except Exception as ex:
+            LOG.exception(ex)
+            for waiter in waiters:
+                waiter.send_exception(ex)
+            return
+
+        for waiter in waiters:
+            waiter.send(self.stack_id)
+
+    def _change(self, pending):
+        hc = drivers.heat(self.context)
+        if self.stack_id is None and self.cluster_id:
+            self.stack_id = self._load_stack_id()
+        if self.stack_id is None:
+            template = {'heat_template_version': TEMPLATE_VERSION}
+        else:
+            template = hc.stacks.template(stack_id=self.stack_id)
+
+        resources = template.setdefault('resources', {})
+        for name, definition in pending.items():
+            if definition is None:
+                resources.pop(name, None)
+            else:
+                resources[name] = definition
+
+        if not resources:
+            # The last resource is gone, so is the stack
+            if self.stack_id is not None:
+                self._delete(hc)
+            return
+
+        LOG.debug('Applying %(count)s resource change(s) to stack %(name)s'
+                  % {'count': len(pending), 'name': self.name})
+        if self.stack_id is None:
+            stack = hc.stacks.create(stack_name=self.name, template=template)
+            self.stack_id = stack['stack']['id']
+            if self.cluster_id and not self._save_stack_id(hc):
+                # Another engine created the stack of the cluster first,
+                # the change is applied to that stack instead
+                return self._change(pending)
+            self._wait(hc, 'CREATE')
+        else:
+            hc.stacks.update(stack_id=self.stack_id, template=template)
+            self._wait(hc, 'UPDATE')
+
+    def _wait(self, hc, action):
+        '''
+        Wait for the given operation on the stack to complete. A status
+        left by an earlier operation, read before Heat started this one,
+        is not taken for the status of this operation.
+        '''
+        for attempt in range(_STALE_STATUS_RETRIES + 1):
+            stack = poller.wait(clients.cache_key(self.context), hc,
+                                self.stack_id)
+            if stack is None:
+                if action == 'DELETE':
+                    return
+                raise exception.NodeStatusError(
+                    status='%s_FAILED' % action,
+                    reason=_('Stack %s not found') % self.stack_id)
+
+            if stack.action == action:
+                if stack.status == 'COMPLETE':
+                    return
+                raise exception.NodeStatusError(
+                    status=stack.stack_status,
+                    reason=stack.stack_status_reason)
+
+        msg = _('Stack action mismatch detected: expected=%(expected)s '
+                'actual=%(actual)s') % {'expected': action,
+                                        'actual': stack.action}
+        raise exception.NodeStatusError(status=stack.stack_status,
+                                        reason=msg)
+
+    def _delete(self, hc):
+        '''
+        Delete the stack, and release the claim of the cluster on it.
+
+        Members join and leave clusters under the cluster lock, so no other
+        engine adds resources to the stack meanwhile.
+        '''
+        LOG.debug('Deleting stack %s, it has no resources left' % self.name)
+        try:
+            hc.stacks.delete(stack_id=self.stack_id)
+        except exception.NotFound:
+            pass
+        else:
+            self._wait(hc, 'DELETE')
+
+        if self.cluster_id:
+            _release_stack_id(self.context, self.cluster_id, self.stack_id)
+        self.stack_id = None
+
+    def _load_stack_id(self):
+        cluster = db_api.cluster_get(self.context, self.cluster_id)
+        return (cluster.data or {}).get(STACK_ID)
+
+    def _save_stack_id(self, hc):
+        '''
+        Claim the stack created as the stack of the cluster, which fails if
+        another engine claimed one first. The stack created is deleted then
+        and the stack of the other engine is used.
+
+        :returns: True if the stack created is the stack of the cluster.
+        '''
+        created = self.stack_id
+
+        def update(data):
+            if data.get(STACK_ID):
+                return False
+            data[STACK_ID] = created
+
+        data = db_api.cluster_update_data(self.context, self.cluster_id,
+                                          update)
+        self.stack_id = data[STACK_ID]
+        if self.stack_id == created:
+            return True
+
+        LOG.debug('Stack %(stack)s of cluster %(cluster)s created by '
+                  'another engine, dropping stack %(created)s'
+                  % {'stack': self.stack_id, 'cluster': self.cluster_id,
+                     'created': created})
+        hc.stacks.delete(stack_id=created)
+        return False
+
+
+def _release_stack_id(context, cluster_id, stack_id):
+    '''
+    Drop the stack ID from the data of the cluster, unless another stack
+    has been claimed since.
+    '''
+    def update(data):
+        if data.get(STACK_ID) != stack_id:
+            return False
+        del data[STACK_ID]
+
+    try:
+        db_api.cluster_update_data(context, cluster_id, update)
+    except exception.NotFound:
+        # The claim went with the cluster
+        pass
+
+
+def delete_cluster_stack(context, cluster_id):
+    '''
+    Delete the stack of a cluster being deleted, with the resources of the
+    nodes which could not be deleted, if the cluster has such a stack.
+    '''
+    cluster = db_api.cluster_get(context, cluster_id)
+    stack_id = (cluster.data or {}).get(STACK_ID)
+    if stack_id is None:
+        return
+
+    stack = CompositeStack(context, cluster_id, cluster_id)
+    stack._delete(drivers.heat(context))
+    _stacks.pop(cluster_id, None)
+
+
+def _get_stack(obj):
+    owner_id = obj.cluster_id or obj.id
+    stack = _stacks.get(owner_id)
+    if stack is None:
+        stack = CompositeStack(obj.context, obj.cluster_id, owner_id)
+        _stacks[owner_id] = stack
+
+    if stack.stack_id is None and obj.physical_id:
+        stack.stack_id = obj.physical_id.split('/')[0]
+    return stack
+
+
+def resource_name(obj):
+    return 'node-%s' % obj.id
+
+
+def create(obj, definition):
+    '''
+    Add the resource of a node to the stack of its cluster.
+
+    :returns: the physical ID of the node, i.e. '<stack ID>/<resource>'.
+    '''
+    name = resource_name(obj)
+    stack_id = _get_stack(obj).apply(obj.context, name, definition)
+    return '%s/%s' % (stack_id, name)
+
+
+def update(obj, definition):
+    _get_stack(obj).apply(obj.context, resource_name(obj), definition)
+    return True
+
+
+def delete(obj):
+    if not obj.physical_id:
+        return True
+
+    _get_stack(obj).apply(obj.context, resource_name(obj), None)
+    return True
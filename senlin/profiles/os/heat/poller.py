@@ -0,0 +1,128 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+'''
+Shared poller of Heat stack statuses.
+
+Node actions waiting for their stacks register here instead of polling
+Heat one by one. A single green thread per engine lists the outstanding
+stacks in batches and wakes up the waiters of the stacks whose operation
+is over.
+'''
+
+import eventlet
+from eventlet import event
+from oslo.config import cfg
+
+from senlin.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+IN_PROGRESS = 'IN_PROGRESS'
+
+
+class StackPoller(object):
+    '''
+    Poll the stacks waited for, grouped by the credentials used to see
+    them.
+    '''
+
+    def __init__(self):
+        # key -> (heat client, {stack_id: [events]})
+        self.groups = {}
+        self.thread = None
+        self.interval = cfg.CONF.stack_poll_interval
+
+    def wait(self, key, hc, stack_id):
+        '''
+        Wait until the current operation on a stack is over.
+
+        :param key: identifies the credentials of the client, stacks with
+                    the same key are listed together;
+        :param hc: the Heat client;
+        :param stack_id: the stack to wait for.
+        :returns: the stack as listed by Heat, or None if it is gone.
+        '''
+        waiter = event.Event()
+        client, stacks = self.groups.setdefault(key, (hc, {}))
+        stacks.setdefault(stack_id, []).append(waiter)
+
+        # Check new stacks soon
+        self.interval = cfg.CONF.stack_poll_interval
+        if self.thread is None:
+            self.thread = eventlet.spawn(self._run)
+
+        return waiter.wait()
+
+    def _run(self):
+        try:
+            while self.groups:
+                eventlet.sleep(self.interval)
+                if self.poll():
+                    self.interval = cfg.CONF.stack_poll_interval
+                else:
+                    self.interval = min(self.interval * 2,
+                                        cfg.CONF.stack_poll_max_interval)
+        finally:
+            self.thread = None
+
+    def poll(self):
+        '''
+        Check all the stacks waited for once.
+
+        :returns: the number of stacks whose waiters have been woken up.
+        '''
+        done = 0
+        for key, (hc, stacks) in list(self.groups.items()):
+            stack_ids = list(stacks)
+            size = cfg.CONF.stack_poll_batch_size
+            for i in range(0, len(stack_ids), size):
+                batch = stack_ids[i:i + size]
+                try:
+                    found = hc.stacks.list(filters={'id': batch},
+                                           show_deleted=True)
+                    found = dict((s.id, s) for s in found)
+                except Exception as ex:
+                    # Try again on next round
+                    LOG.exception(ex)
+                    continue
+
+                for stack_id in batch:
+                    stack = found.get(stack_id)
+                    if stack is not None and stack.status == IN_PROGRESS:
+                        continue
+                    for waiter in stacks.pop(stack_id):
+                        waiter.send(stack)
+                    done += 1
+
+            if not stacks:
+                del self.groups[key]
+
+        LOG.debug('Stack poller woke up waiters of %(done)s stack(s), '
+                  '%(left)s stack(s) still in progress' % {
+                      'done': done,
+                      'left': sum(len(s) for h, s in self.groups.values())})
+        return done
+
+
+_poller = None
+
+
+def wait(key, hc, stack_id):
+    '''
+    Wait for a stack using the poller of this engine.
+    '''
+    global _poller
+
+    if _poller is None:
+        _poller = StackPoller()
+    return _poller.wait(key, hc, stack_id)
@@ -10,35 +10,62 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import uuid
-
-from senlin.drivers import heat_v1 as heat
 from senlin.profiles import base
+from senlin.profiles.os.heat import composite
 
 __type_name__ = 'os.heat.resource'
 
 
-class ResourceProfile(base.ProfileBase):
+class ResourceProfile(base.Profile):
     '''
     Profile for an OpenStack Heat resource.
     When this profile is used, the whole cluster is Heat stack, composed
     of resources initialzed from this profile.
     '''
-    def __init__(self, name, type_name=__type_name__, **kwargs):
-        super(ResourceProfile, self).__init__(name, type_name, kwargs)
 
-    def do_create(self):
+    KEYS = (
+        TYPE, PROPERTIES,
+    ) = (
+        'type', 'properties',
+    )
+
+    # Resource types with an 'availability_zone' property
+    ZONED_TYPES = (
+        'OS::Nova::Server', 'OS::Cinder::Volume',
+    )
+
+    def __init__(self, type_name, name, **kwargs):
+        super(ResourceProfile, self).__init__(type_name, name, **kwargs)
+
+        self.resource_type = self.spec.get(self.TYPE)
+        self.properties = self.spec.get(self.PROPERTIES, {})
+
+    def get_resource(self, placement=None):
         '''
         A resource is represented as a YAML snippet that can be composed
-        into a Heat stack.
+        into a Heat stack. Resources that can be put in an availability
+        zone go to the zone in the placement of the node, if any.
         '''
-        return tmpl 
+        properties = self.properties
+        zone = (placement or {}).get('zone')
+        if zone and self.resource_type in self.ZONED_TYPES:
+            properties = dict(properties, availability_zone=zone)
+
+        return {
+            'type': self.resource_type,
+            'properties': properties,
+        }
+
+    def do_create(self, obj):
+        placement = (obj.data or {}).get('placement')
+        return composite.create(obj, self.get_resource(placement))
 
-    def do_delete(self, id):
-        return True 
+    def do_delete(self, obj):
+        return composite.delete(obj)
 
-    def do_update(self, ):
-        self.status = self.UPDATING
-        # TODO: do update
-        self.status = self.ACTIVE
-        return tmpl
+    def do_update(self, obj, new_profile):
+        placement = (obj.data or {}).get('placement')
+        new_resource = new_profile.get_resource(placement)
+        if new_resource == self.get_resource(placement):
+            return True
+        return composite.update(obj, new_resource)
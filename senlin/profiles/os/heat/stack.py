@@ -10,14 +10,46 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import hashlib
+
+from oslo.config import cfg
+from oslo.serialization import jsonutils
 import six
 
+from senlin.common import cache
 from senlin.common import context
 from senlin.common import exception
+from senlin.common.i18n import _
+from senlin.drivers import base as drivers
+from senlin.engine import clients
 from senlin.profiles import base
+from senlin.profiles.os.heat import poller
 
 __PROFILE_TYPE__ = 'os.heat.stack'
 
+# Keys of the templates validated recently
+_validation_cache = None
+
+
+def _get_validation_cache():
+    global _validation_cache
+
+    if _validation_cache is None:
+        _validation_cache = cache.LRUCache(
+            cfg.CONF.template_validation_cache_size)
+    return _validation_cache
+
+
+def _validation_key(project, kwargs):
+    '''
+    Hash of what the validation result depends on. The project is part of
+    it as parameter constraints may refer to project resources.
+    '''
+    content = [project, kwargs['template'], kwargs['parameters'],
+               kwargs['environment']]
+    return hashlib.sha256(jsonutils.dumps(content,
+                                          sort_keys=True)).hexdigest()
+
 
 class StackProfile(base.Profile):
     '''
@@ -49,20 +81,29 @@ class StackProfile(base.Profile):
 
     def heat(self, obj):
         '''
-        Construct heat client using the combined context.
+        Construct heat client using the combined context. The stack goes
+        to the region in the placement of the node, if any.
         '''
         if self.hc:
             return self.hc
 
-        ctx = obj.context
+        ctx = obj.context.to_dict()
         if self.profile_context:
             ctx.update(self.profile_context)
+        placement = (obj.data or {}).get('placement') or {}
+        if placement.get('region'):
+            ctx['region_name'] = placement['region']
         self.stack_context = context.RequestContext.from_dict(ctx)
-        self.hc = self.stack_context.clients.heat()
+        # Clients are shared by all profiles using the same credentials
+        self.hc = drivers.heat(self.stack_context)
+        return self.hc
 
     def do_validate(self, obj):
         '''
         Validate if the spec has provided reasonable info for stack creation.
+
+        Successful validations are remembered, so that the same template
+        and parameters are only sent to Heat once.
         '''
         kwargs = {
             'stack_name': obj.name,
@@ -73,32 +114,42 @@ class StackProfile(base.Profile):
             # 'files':
             'environment': {}
         }
+        hc = self.heat(obj)
+        key = _validation_key(self.stack_context.tenant_id, kwargs)
+        if _get_validation_cache().get(key):
+            return True
+
         try:
-            self.heat().stacks.validate(**kwargs)
+            hc.stacks.validate(**kwargs)
         except Exception as ex:
             msg = _('Failed validate stack template due to '
                     '"%s"') % six.text_type(ex)
             raise exception.ProfileValidationFailed(message=msg)
 
+        _get_validation_cache().put(key, True)
         return True
 
-    def _check_action_complete(self, obj, action):
-        stack = self.heat(obj).stacks.get(stack_id=self.stack_id)
-        if stack.action == action:
-            if stack.status == 'IN_PROGRESS':
-                return False
+    def _wait_for_action(self, obj, action):
+        '''
+        Wait for the stack operation to finish, using the stack poller
+        shared by all nodes of the engine.
+        '''
+        hc = self.heat(obj)
+        stack = poller.wait(clients.cache_key(self.stack_context), hc,
+                            self.stack_id)
+        if stack is None:
+            if action == 'DELETE':
+                return True
+            raise exception.NodeStatusError(status='%s_FAILED' % action,
+                                            reason=_('Stack not found'))
 
+        if stack.action == action:
             if stack.status == 'COMPLETE':
                 return True
 
-            if stack.status == 'FAILED':
-                raise exception.NodeStatusError(
-                    status=stack.stack_status,
-                    reason=stack.stack_status_reason)
-            else:
-                raise exception.NodeStatusError(
-                    status=stack.stack_status,
-                    reason=stack.stack_status_reason)
+            raise exception.NodeStatusError(
+                status=stack.stack_status,
+                reason=stack.stack_status_reason)
         else:
             msg = _('Node action mismatch detected: expected=%(expected)s '
                     'actual=%(actual)s') % dict(expected=action,
@@ -106,6 +157,18 @@ class StackProfile(base.Profile):
             raise exception.NodeStatusError(status=stack.stack_status,
                                             reason=msg)
 
+    def _get_parameters(self, obj):
+        '''
+        The parameters of the stack of a node. Templates taking an
+        'availability_zone' parameter get the zone in the placement of the
+        node, if any.
+        '''
+        zone = ((obj.data or {}).get('placement') or {}).get('zone')
+        declared = self.template.get('parameters') or {}
+        if zone and 'availability_zone' in declared:
+            return dict(self.parameters, availability_zone=zone)
+        return self.parameters
+
     def do_create(self, obj):
         '''
         Create a stack using the given profile.
@@ -115,7 +178,7 @@ class StackProfile(base.Profile):
             'template': self.template,
             'timeout_mins': self.timeout,
             'disable_rollback': self.disable_rollback,
-            'parameters': self.parameters,
+            'parameters': self._get_parameters(obj),
             # 'files':
             'environment': {}
         }
@@ -124,9 +187,8 @@ class StackProfile(base.Profile):
         self.stack_id = stack['stack']['id']
 
         # Wait for action to complete/fail
-        while not self._check_action_complete(obj, 'CREATE'):
-            yield
-        return True
+        self._wait_for_action(obj, 'CREATE')
+        return self.stack_id
 
     def do_delete(self, obj):
         self.stack_id = obj.physical_id
@@ -142,8 +204,7 @@ class StackProfile(base.Profile):
             raise ex
 
         # Wait for action to complete/fail
-        while not self._check_action_complete(obj, 'DELETE'):
-            yield
+        self._wait_for_action(obj, 'DELETE')
 
         return True
 
@@ -156,22 +217,43 @@ class StackProfile(base.Profile):
         if not self.stack_id:
             return True
 
-        # TODO(anyone): Check if template differs
-        # TODO(anyone): Check if params differs
-        fields = {
-            'stack_id': self.stack_id,
-            'parameters': new_profile.params,
-            'template': new_profile.template,
-            'timeout_mins': new_profile.timeout,
-            'disable_rollback': new_profile.disable_rollback,
-            #'files': self.stack.t.files,
-            'environment': {},
-        }
+        fields = self._get_update_fields(new_profile)
+        if not fields:
+            # Nothing the stack depends on has changed
+            return True
 
+        # Only changed fields are sent, the rest of the stack is kept
+        fields['stack_id'] = self.stack_id
+        fields['existing'] = True
         self.heat(obj).stacks.update(**fields)
 
         # Wait for action to complete/fail
-        while not self._check_action_complete(obj, 'UPDATE'):
-            yield
+        self._wait_for_action(obj, 'UPDATE')
 
         return True
+
+    def _get_update_fields(self, new_profile):
+        '''
+        Compare the spec of this profile with the new one and return the
+        stack fields to update, an empty dict if there is none.
+        '''
+        fields = {}
+        if new_profile.template != self.template:
+            fields['template'] = new_profile.template
+        if new_profile.timeout != self.timeout:
+            fields['timeout_mins'] = new_profile.timeout
+        if new_profile.disable_rollback != self.disable_rollback:
+            fields['disable_rollback'] = new_profile.disable_rollback
+
+        new_params = new_profile.parameters
+        params = dict((k, v) for k, v in new_params.items()
+                      if k not in self.parameters or
+                      self.parameters[k] != v)
+        if params:
+            fields['parameters'] = params
+        removed = [k for k in self.parameters if k not in new_params]
+        if removed:
+            # Let Heat use the template defaults of removed parameters
+            fields['clear_parameters'] = removed
+
+        return fields
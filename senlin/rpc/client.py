@@ -190,6 +190,22 @@ class EngineClient(object):
                           self.make_msg('delete_cluster',
                                         cluster_identity=cluster_identity))
 
+    def trigger_policy(self, ctxt, cluster_id, policy_id,
+                       action='CLUSTER_SCALE_UP'):
+        """
+        Ask a policy attached to a cluster to start an action, which is
+        ignored while the policy is in cooldown.
+
+        :param ctxt: RPC context.
+        :param cluster_id: ID of the cluster.
+        :param policy_id: ID of the policy attached to the cluster.
+        :param action: the cluster action to start.
+        """
+        return self.call(ctxt, self.make_msg('trigger_policy',
+                                             cluster_id=cluster_id,
+                                             policy_id=policy_id,
+                                             action=action))
+
     def list_cluster_members(self, ctxt, cluster_identity, nested_depth=0):
         """
         List the members belonging to a cluster.
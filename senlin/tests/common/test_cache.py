@@ -0,0 +1,76 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+from senlin.common import cache
+from senlin.tests.common import base
+
+
+class LRUCacheTest(base.SenlinTestCase):
+
+    def test_get_put(self):
+        c = cache.LRUCache(2)
+        c.put('a', 1)
+
+        self.assertEqual(1, c.get('a'))
+        self.assertIsNone(c.get('b'))
+        self.assertEqual('x', c.get('b', 'x'))
+        self.assertEqual({'hits': 1, 'misses': 2, 'size': 1, 'maxsize': 2},
+                         c.info())
+
+    def test_size_bound(self):
+        c = cache.LRUCache(3)
+        for i in range(10):
+            c.put(i, i)
+
+        self.assertEqual(3, len(c))
+        self.assertEqual([7, 8, 9], [k for k in range(10) if k in c])
+
+    def test_eviction_order(self):
+        c = cache.LRUCache(3)
+        c.put('a', 1)
+        c.put('b', 2)
+        c.put('c', 3)
+        # 'a' becomes the most recently used entry, 'b' the least
+        c.get('a')
+        c.put('d', 4)
+
+        self.assertNotIn('b', c)
+        self.assertEqual(['a', 'c', 'd'], sorted(k for k in 'abcd' if k in c))
+
+        # Replacing an entry refreshes it as well
+        c.put('c', 30)
+        c.put('e', 5)
+        self.assertNotIn('a', c)
+        self.assertEqual(30, c.get('c'))
+
+    def test_ttl(self):
+        now = self.patch('time.time', return_value=1000.0)
+        c = cache.LRUCache(2, ttl=10)
+        c.put('a', 1)
+
+        now.return_value = 1009.0
+        self.assertEqual(1, c.get('a'))
+        now.return_value = 1010.0
+        self.assertIsNone(c.get('a'))
+        self.assertNotIn('a', c)
+        self.assertEqual(1, c.info()['misses'])
+
+    def test_pop_clear(self):
+        c = cache.LRUCache(2)
+        c.put('a', 1)
+        c.put('b', 2)
+
+        self.assertEqual(1, c.pop('a'))
+        self.assertIsNone(c.pop('a'))
+        c.clear()
+        self.assertEqual(0, len(c))
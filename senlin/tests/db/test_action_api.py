@@ -276,6 +276,66 @@ class DBAPIActionTest(base.SenlinTestCase):
         self.assertEqual(action.owner, 'worker1')
         self.assertEqual(action.status, db_api.ACTION_RUNNING)
 
+    def test_action_start_work_on_claimed(self):
+        action = _create_action(self.ctx)
+        db_api.action_start_work_on(self.ctx, action.id, 'worker1')
+
+        res = db_api.action_start_work_on(self.ctx, action.id, 'worker2')
+        self.assertIsNone(res)
+
+        action = db_api.action_get(self.ctx, action.id)
+        self.assertEqual('worker1', action.owner)
+
+    def test_action_mark_retrying(self):
+        action = _create_action(self.ctx)
+
+        retries = db_api.action_mark_retrying(self.ctx, action.id)
+        self.assertEqual(1, retries)
+        retries = db_api.action_mark_retrying(self.ctx, action.id, 'Again')
+        self.assertEqual(2, retries)
+
+        action = db_api.action_get(self.ctx, action.id)
+        self.assertEqual(2, action.retries)
+        self.assertEqual('Again', action.status_reason)
+
+    def test_action_mark_cancelled(self):
+        id_of = self._check_action_add_dependency_depended_list()
+        db_api.action_mark_succeeded(self.ctx, id_of['action_002'])
+
+        cancelled = db_api.action_mark_cancelled(self.ctx,
+                                                 id_of['action_001'])
+        self.assertEqual(3, len(cancelled))
+        self.assertNotIn(id_of['action_002'], cancelled)
+
+        for id in [id_of['action_001'],
+                   id_of['action_003'],
+                   id_of['action_004']]:
+            action = db_api.action_get(self.ctx, id)
+            self.assertEqual(db_api.ACTION_CANCELED, action.status)
+            self.assertEqual('cancel', action.control)
+
+        action = db_api.action_get(self.ctx, id_of['action_002'])
+        self.assertEqual(db_api.ACTION_SUCCEEDED, action.status)
+
+    def test_action_mark_cancelled_dependent(self):
+        id_of = self._check_action_add_dependency_dependent_list()
+
+        cancelled = db_api.action_mark_cancelled(self.ctx,
+                                                 id_of['action_002'])
+        self.assertEqual(set([id_of['action_001'], id_of['action_002']]),
+                         set(cancelled))
+
+        action = db_api.action_get(self.ctx, id_of['action_003'])
+        self.assertEqual(db_api.ACTION_WAITING, action.status)
+
+    def test_action_mark_cancelled_not_found(self):
+        self.assertRaises(exception.NotFound, db_api.action_mark_cancelled,
+                          self.ctx, 'BogusID')
+
+    def test_action_mark_retrying_not_found(self):
+        self.assertRaises(exception.NotFound, db_api.action_mark_retrying,
+                          self.ctx, 'BogusID')
+
     def test_action_delete(self):
         action = _create_action(self.ctx)
         self.assertIsNotNone(action)
@@ -284,3 +344,39 @@ class DBAPIActionTest(base.SenlinTestCase):
 
         self.assertRaises(exception.NotFound, db_api.action_get,
                           self.ctx, action_id)
+
+    def test_action_reclaim_orphans(self):
+        db_api.service_create(self.ctx, 'engine1')
+        specs = [
+            {'name': 'action_001', 'owner': 'engine1', 'status': 'RUNNING'},
+            {'name': 'action_002', 'owner': 'engine1', 'status': 'RUNNING'},
+            {'name': 'action_003', 'owner': 'engine1',
+             'status': 'SUCCEEDED'},
+            {'name': 'action_004', 'owner': 'engine2', 'status': 'RUNNING'},
+        ]
+
+        id_of = {}
+        for spec in specs:
+            action = _create_action(self.ctx,
+                                    action=shared.sample_action,
+                                    **spec)
+            id_of[spec['name']] = action.id
+
+        reclaimed = db_api.action_reclaim_orphans(self.ctx, ['engine1'],
+                                                  db_api.ACTION_READY)
+
+        self.assertEqual(2, len(reclaimed))
+        for name in ['action_001', 'action_002']:
+            self.assertIn(id_of[name], reclaimed)
+            action = db_api.action_get(self.ctx, id_of[name])
+            self.assertIsNone(action.owner)
+            self.assertEqual(db_api.ACTION_READY, action.status)
+
+        action = db_api.action_get(self.ctx, id_of['action_003'])
+        self.assertEqual('engine1', action.owner)
+        self.assertEqual(db_api.ACTION_SUCCEEDED, action.status)
+        action = db_api.action_get(self.ctx, id_of['action_004'])
+        self.assertEqual('engine2', action.owner)
+        self.assertEqual(db_api.ACTION_RUNNING, action.status)
+
+        self.assertIsNone(db_api.service_get(self.ctx, 'engine1'))
@@ -70,6 +70,31 @@ class DBAPIClusterTest(base.SenlinTestCase):
         self.assertRaises(exception.NotFound,
                           db_api.node_get, self.ctx, node.id)
 
+    def test_cluster_delete_cascade(self):
+        cluster = shared.create_cluster(self.ctx, self.profile)
+        nodes = [shared.create_node(self.ctx, cluster, self.profile)
+                 for i in range(3)]
+        policy = shared.create_policy(self.ctx)
+        db_api.cluster_attach_policy(self.ctx, cluster.id, policy.id,
+                                     {'enabled': True})
+        db_api.cluster_lock_create(cluster.id, UUID1)
+        other = shared.create_cluster(self.ctx, self.profile)
+        other_node = shared.create_node(self.ctx, other, self.profile)
+
+        db_api.cluster_delete(self.ctx, cluster.id)
+
+        for node in nodes:
+            self.assertRaises(exception.NotFound, db_api.node_get,
+                              self.ctx, node.id)
+        self.assertEqual([], db_api.cluster_get_policies(self.ctx,
+                                                         cluster.id))
+        # The lock is gone, so the cluster can be locked again
+        self.assertIsNone(db_api.cluster_lock_create(cluster.id, UUID2))
+
+        # Other clusters are left alone
+        self.assertEqual(other_node.id,
+                         db_api.node_get(self.ctx, other_node.id).id)
+
     def test_cluster_update(self):
         cluster = shared.create_cluster(self.ctx, self.profile)
         values = {
@@ -88,6 +113,81 @@ class DBAPIClusterTest(base.SenlinTestCase):
         self.assertRaises(exception.NotFound, db_api.cluster_update, self.ctx,
                           UUID2, values)
 
+    def test_cluster_increment(self):
+        cluster = shared.create_cluster(self.ctx, self.profile, size=2,
+                                        next_index=2)
+        cluster = db_api.cluster_increment(self.ctx, cluster.id, size=3,
+                                           next_index=3)
+        self.assertEqual(5, cluster.size)
+        self.assertEqual(5, cluster.next_index)
+
+        cluster = db_api.cluster_increment(self.ctx, cluster.id, size=-1)
+        self.assertEqual(4, cluster.size)
+        self.assertEqual(5, cluster.next_index)
+        self.assertEqual(2, cluster.version)
+
+        self.assertRaises(exception.NotFound, db_api.cluster_increment,
+                          self.ctx, UUID2, size=1)
+
+    def test_cluster_update_version(self):
+        cluster = shared.create_cluster(self.ctx, self.profile)
+        self.assertEqual(0, cluster.version)
+
+        cluster = db_api.cluster_update(self.ctx, cluster.id,
+                                        {'status': 'ACTIVE'}, version=0)
+        self.assertEqual(1, cluster.version)
+
+        # An update made against an old version is rejected
+        self.assertRaises(exception.ConcurrentUpdate, db_api.cluster_update,
+                          self.ctx, cluster.id, {'status': 'ERROR'},
+                          version=0)
+        cluster = db_api.cluster_get(self.ctx, cluster.id)
+        self.assertEqual('ACTIVE', cluster.status)
+
+        # Updates without a version always go through
+        cluster = db_api.cluster_update(self.ctx, cluster.id,
+                                        {'status': 'ERROR'})
+        self.assertEqual('ERROR', cluster.status)
+        self.assertEqual(2, cluster.version)
+
+    def test_cluster_update_data(self):
+        cluster = shared.create_cluster(self.ctx, self.profile,
+                                        data={'a': 1})
+        other_ctx = utils.dummy_context()
+        calls = []
+
+        def update(data):
+            calls.append(dict(data))
+            if len(calls) == 1:
+                # Another party changes the cluster in the meantime
+                db_api.cluster_update(other_ctx, cluster.id,
+                                      {'data': {'a': 1, 'b': 2}})
+            data['c'] = 3
+
+        data = db_api.cluster_update_data(self.ctx, cluster.id, update)
+        self.assertEqual({'a': 1, 'b': 2, 'c': 3}, data)
+        self.assertEqual([{'a': 1}, {'a': 1, 'b': 2}], calls)
+        cluster = db_api.cluster_get(self.ctx, cluster.id)
+        self.assertEqual({'a': 1, 'b': 2, 'c': 3}, cluster.data)
+
+    def test_cluster_update_data_stale_session(self):
+        cluster = shared.create_cluster(self.ctx, self.profile,
+                                        data={'a': 1})
+        # Another party changes the data after the cluster was loaded in
+        # this context's session, then this context refreshes the version
+        # only, as cluster_increment() does
+        db_api.cluster_update(utils.dummy_context(), cluster.id,
+                              {'data': {'a': 1, 'b': 2}})
+        db_api.cluster_increment(self.ctx, cluster.id, size=1)
+
+        def update(data):
+            data['c'] = 3
+
+        data = db_api.cluster_update_data(self.ctx, cluster.id, update)
+        self.assertEqual({'a': 1, 'b': 2, 'c': 3}, data)
+        cluster = db_api.cluster_get(utils.dummy_context(), cluster.id)
+        self.assertEqual({'a': 1, 'b': 2, 'c': 3}, cluster.data)
+
     def test_cluster_get_returns_a_cluster(self):
         cluster = shared.create_cluster(self.ctx, self.profile)
         ret_cluster = db_api.cluster_get(self.ctx, cluster.id,
@@ -96,6 +196,17 @@ class DBAPIClusterTest(base.SenlinTestCase):
         self.assertEqual(cluster.id, ret_cluster.id)
         self.assertEqual('db_test_cluster_name', ret_cluster.name)
 
+    def test_cluster_get_stale_ok(self):
+        cluster = shared.create_cluster(self.ctx, self.profile)
+        # The context has written the cluster, so it reads it back from the
+        # primary database
+        self.assertIs(self.ctx.session, db_api._reader_session(self.ctx))
+        ret_cluster = db_api.cluster_get(self.ctx, cluster.id, stale_ok=True)
+        self.assertEqual(cluster.id, ret_cluster.id)
+
+        ctx = utils.dummy_context()
+        self.assertIsNot(ctx.session, db_api._reader_session(ctx))
+
     def test_cluster_get_returns_none_if_cluster_does_not_exist(self):
         cluster = db_api.cluster_get(self.ctx, UUID1, show_deleted=False)
         self.assertIsNone(cluster)
@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 import six
 
 from senlin.common import exception
@@ -97,3 +99,40 @@ class DBAPIClusterPolicyTest(base.SenlinTestCase):
         msg = _('Failed disabling policy "BOGUS" on cluster '
                 '"%s"') % self.cluster.id
         self.assertEqual(msg, six.text_type(exc))
+
+    def test_policy_mark_triggered(self):
+        data = parser.parse_policy(shared.sample_policy)
+        policy = db_api.policy_create(self.ctx, data)
+        db_api.cluster_attach_policy(self.ctx, self.cluster.id, policy.id,
+                                     {'enabled': True, 'cooldown': 60})
+        binding = db_api.cluster_get_policy(self.ctx, self.cluster.id,
+                                            policy.id)
+        self.assertIsNone(binding.last_op)
+
+        t1 = datetime.datetime(2015, 1, 1, 10, 0, 0)
+        t2 = t1 + datetime.timedelta(seconds=30)
+        t3 = t1 + datetime.timedelta(seconds=90)
+
+        res = db_api.cluster_mark_policy_triggered(
+            self.ctx, self.cluster.id, policy.id, t1,
+            since=t1 - datetime.timedelta(seconds=60))
+        self.assertTrue(res)
+
+        # Still in cooldown
+        res = db_api.cluster_mark_policy_triggered(
+            self.ctx, self.cluster.id, policy.id, t2,
+            since=t2 - datetime.timedelta(seconds=60))
+        self.assertFalse(res)
+
+        res = db_api.cluster_mark_policy_triggered(
+            self.ctx, self.cluster.id, policy.id, t3,
+            since=t3 - datetime.timedelta(seconds=60))
+        self.assertTrue(res)
+
+        binding = db_api.cluster_get_policy(self.ctx, self.cluster.id,
+                                            policy.id)
+        self.assertEqual(t3, binding.last_op)
+
+        self.assertIsNone(db_api.cluster_get_policy(self.ctx,
+                                                    self.cluster.id,
+                                                    'BOGUS'))
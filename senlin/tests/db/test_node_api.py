@@ -10,6 +10,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
 import json
 
 from senlin.common import exception
@@ -118,3 +119,110 @@ class DBAPINodeTest(base.SenlinTestCase):
                                   status_reason='a' * 1024)
         ret_node = db_api.node_get(self.ctx, node.id)
         self.assertEqual('a' * 255, ret_node.status_reason)
+
+    def _create_aged_nodes(self):
+        nodes = []
+        for i, (status, zone) in enumerate([('ACTIVE', 'az1'),
+                                            ('ERROR', 'az1'),
+                                            ('ACTIVE', 'az1'),
+                                            ('ACTIVE', 'az2')]):
+            created = datetime.datetime(2015, 1, 1, 0, 0, i)
+            node = shared.create_node(self.ctx, self.cluster, self.profile,
+                                      name='node%s' % i, status=status,
+                                      created_time=created,
+                                      data={'placement': {'zone': zone}})
+            nodes.append(node.id)
+        return nodes
+
+    def test_node_get_victims(self):
+        nodes = self._create_aged_nodes()
+
+        res = db_api.node_get_victims(self.ctx, self.cluster.id, count=2)
+        self.assertEqual(nodes[:2], res)
+
+        res = db_api.node_get_victims(self.ctx, self.cluster.id, count=2,
+                                      criteria='youngest_first')
+        self.assertEqual([nodes[3], nodes[2]], res)
+
+        res = db_api.node_get_victims(self.ctx, self.cluster.id, count=2,
+                                      criteria='youngest_first',
+                                      statuses=['ERROR'])
+        self.assertEqual([nodes[1], nodes[3]], res)
+
+        res = db_api.node_get_victims(self.ctx, self.cluster.id,
+                                      filters={'status': ['ERROR']})
+        self.assertEqual([nodes[1]], res)
+
+    def test_node_get_victims_random(self):
+        nodes = self._create_aged_nodes()
+
+        res = db_api.node_get_victims(self.ctx, self.cluster.id, count=3,
+                                      criteria='random')
+        self.assertEqual(3, len(set(res)))
+        self.assertTrue(set(res).issubset(set(nodes)))
+
+        res = db_api.node_get_victims(self.ctx, self.cluster.id, count=2,
+                                      criteria='random', statuses=['ERROR'])
+        self.assertEqual(nodes[1], res[0])
+        self.assertEqual(2, len(set(res)))
+
+        res = db_api.node_get_victims(self.ctx, self.cluster.id, count=10,
+                                      criteria='random')
+        self.assertEqual(set(nodes), set(res))
+
+    def test_node_get_zones(self):
+        nodes = self._create_aged_nodes()
+        shared.create_node(self.ctx, self.cluster, self.profile)
+
+        zones = db_api.node_get_zones(self.ctx, self.cluster.id)
+        self.assertEqual(5, len(zones))
+        self.assertEqual('az1', zones[nodes[0]])
+        self.assertEqual('az2', zones[nodes[3]])
+        self.assertEqual(1, list(zones.values()).count(None))
+
+    def test_node_get_zones_by_ids(self):
+        nodes = self._create_aged_nodes()
+        node = shared.create_node(self.ctx, self.cluster, self.profile,
+                                  data={'placement': {'region': 'r1'}})
+
+        zones = db_api.node_get_zones(self.ctx,
+                                      node_ids=[nodes[3], node.id])
+        self.assertEqual({nodes[3]: 'az2', node.id: 'r1'}, zones)
+
+    def test_node_delete(self):
+        node = shared.create_node(self.ctx, self.cluster, self.profile)
+        db_api.node_lock_create(node.id, shared.UUID2)
+
+        db_api.node_delete(self.ctx, node.id)
+
+        self.assertRaises(exception.NotFound, db_api.node_get, self.ctx,
+                          node.id)
+        self.assertIsNone(db_api.node_lock_create(node.id, shared.UUID3))
+        self.assertRaises(exception.NotFound, db_api.node_delete, self.ctx,
+                          node.id)
+
+    def test_transaction(self):
+        with db_api.transaction(self.ctx):
+            node1 = shared.create_node(self.ctx, self.cluster, self.profile,
+                                       name='node1')
+            node2 = shared.create_node(self.ctx, self.cluster, self.profile,
+                                       name='node2')
+
+        self.assertIsNotNone(db_api.node_get(self.ctx, node1.id))
+        self.assertIsNotNone(db_api.node_get(self.ctx, node2.id))
+
+    def test_transaction_rollback(self):
+        def create_nodes():
+            with db_api.transaction(self.ctx):
+                shared.create_node(self.ctx, self.cluster, self.profile,
+                                   name='node1')
+                with db_api.transaction(self.ctx):
+                    shared.create_node(self.ctx, self.cluster, self.profile,
+                                       name='node2')
+                raise exception.Error('boom')
+
+        self.assertRaises(exception.Error, create_nodes)
+        self.assertIsNone(db_api.node_get_by_name_and_cluster(
+            self.ctx, 'node1', self.cluster.id))
+        self.assertIsNone(db_api.node_get_by_name_and_cluster(
+            self.ctx, 'node2', self.cluster.id))
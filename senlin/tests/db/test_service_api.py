@@ -0,0 +1,77 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import datetime
+
+from oslo.utils import timeutils
+
+from senlin.common import exception
+from senlin.db.sqlalchemy import api as db_api
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+UUID1 = shared.UUID1
+UUID2 = shared.UUID2
+
+
+class DBAPIServiceTest(base.SenlinTestCase):
+    def setUp(self):
+        super(DBAPIServiceTest, self).setUp()
+        self.ctx = utils.dummy_context()
+
+    def _age_service(self, service_id, seconds):
+        # service_update always refreshes the heartbeat, bypass it here
+        service = db_api.service_get(self.ctx, service_id)
+        old_time = timeutils.utcnow() - datetime.timedelta(seconds=seconds)
+        service.update({'updated_time': old_time})
+        service.save(self.ctx.session)
+        return old_time
+
+    def test_service_create(self):
+        service = db_api.service_create(self.ctx, UUID1, host='host1',
+                                        binary='senlin-engine',
+                                        topic='senlin-engine')
+
+        self.assertIsNotNone(service)
+        self.assertEqual(UUID1, service.id)
+        self.assertEqual('host1', service.host)
+        self.assertEqual('senlin-engine', service.binary)
+        self.assertEqual('senlin-engine', service.topic)
+        self.assertIsNotNone(service.created_time)
+        self.assertEqual(service.created_time, service.updated_time)
+
+    def test_service_update(self):
+        db_api.service_create(self.ctx, UUID1)
+        old_time = self._age_service(UUID1, 60)
+
+        service = db_api.service_update(self.ctx, UUID1)
+        self.assertTrue(service.updated_time > old_time)
+
+    def test_service_update_not_found(self):
+        self.assertRaises(exception.NotFound, db_api.service_update,
+                          self.ctx, UUID1)
+
+    def test_service_delete(self):
+        db_api.service_create(self.ctx, UUID1)
+        db_api.service_delete(self.ctx, UUID1)
+
+        self.assertIsNone(db_api.service_get(self.ctx, UUID1))
+
+    def test_service_get_all_expired(self):
+        db_api.service_create(self.ctx, UUID1)
+        db_api.service_create(self.ctx, UUID2)
+        self._age_service(UUID1, 60)
+
+        services = db_api.service_get_all_expired(self.ctx, 30)
+        self.assertEqual(1, len(services))
+        self.assertEqual(UUID1, services[0].id)
+        self.assertEqual(2, len(db_api.service_get_all(self.ctx)))
@@ -0,0 +1,94 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from senlin.db.sqlalchemy import api as db_api
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+UUID1 = shared.UUID1
+UUID2 = shared.UUID2
+UUID3 = shared.UUID3
+
+
+class DBAPIShardTest(base.SenlinTestCase):
+    def setUp(self):
+        super(DBAPIShardTest, self).setUp()
+        self.ctx = utils.dummy_context()
+
+    def _owners(self):
+        return dict((s.id, s.engine_id)
+                    for s in db_api.shard_get_all(self.ctx))
+
+    def test_shard_rebalance(self):
+        owned = db_api.shard_rebalance(self.ctx, [UUID1, UUID2], 8)
+
+        self.assertEqual(4, len(owned[UUID1]))
+        self.assertEqual(4, len(owned[UUID2]))
+        self.assertEqual(range(8), sorted(owned[UUID1] + owned[UUID2]))
+        self.assertEqual(UUID1, db_api.shard_get(self.ctx,
+                                                 owned[UUID1][0]).engine_id)
+
+    def test_shard_rebalance_engine_join(self):
+        db_api.shard_rebalance(self.ctx, [UUID1, UUID2], 9)
+        before = self._owners()
+
+        owned = db_api.shard_rebalance(self.ctx, [UUID1, UUID2, UUID3], 9)
+        after = self._owners()
+
+        self.assertEqual(3, len(owned[UUID3]))
+        # Only the shards taken by the new engine have moved
+        moved = [s for s in after if after[s] != before[s]]
+        self.assertEqual(sorted(owned[UUID3]), sorted(moved))
+
+    def test_shard_rebalance_engine_leave(self):
+        db_api.shard_rebalance(self.ctx, [UUID1, UUID2, UUID3], 9)
+        before = self._owners()
+
+        owned = db_api.shard_rebalance(self.ctx, [UUID1, UUID2], 9)
+        after = self._owners()
+
+        self.assertNotIn(UUID3, owned)
+        self.assertEqual(9, len(owned[UUID1]) + len(owned[UUID2]))
+        for shard_id, engine_id in before.items():
+            if engine_id != UUID3:
+                self.assertEqual(engine_id, after[shard_id])
+
+    def test_shard_rebalance_no_engine(self):
+        db_api.shard_rebalance(self.ctx, [UUID1], 4)
+
+        owned = db_api.shard_rebalance(self.ctx, [], 4)
+
+        self.assertEqual({}, owned)
+        self.assertEqual([None] * 4, self._owners().values())
+
+    def test_shard_rebalance_resize(self):
+        db_api.shard_rebalance(self.ctx, [UUID1, UUID2], 8)
+
+        owned = db_api.shard_rebalance(self.ctx, [UUID1, UUID2], 4)
+
+        self.assertEqual(4, len(db_api.shard_get_all(self.ctx)))
+        self.assertEqual(2, len(owned[UUID1]))
+        self.assertEqual(2, len(owned[UUID2]))
+
+    def test_shard_rebalance_seeded_concurrently(self):
+        db_api.shard_rebalance(self.ctx, [UUID1], 4)
+        # Another engine creates the shards after this one looked for them
+        session = db_api.get_session()
+        self.patchobject(session, 'query', return_value=[])
+        self.patchobject(db_api, 'get_session', return_value=session)
+
+        owned = db_api.shard_rebalance(self.ctx, [UUID1, UUID2], 4)
+
+        self.assertEqual(4, len(db_api.shard_get_all(self.ctx)))
+        self.assertEqual(2, len(owned[UUID1]))
+        self.assertEqual(2, len(owned[UUID2]))
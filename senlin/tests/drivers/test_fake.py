@@ -0,0 +1,37 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from senlin.drivers import fake
+from senlin.tests.common import base
+
+
+class FakePoolManagerTest(base.SenlinTestCase):
+    def setUp(self):
+        super(FakePoolManagerTest, self).setUp()
+        self.pools = fake.FakePoolManager()
+
+    def test_update_members(self):
+        add = [{'node_id': 'N1', 'address': '10.0.0.1', 'protocol_port': 80},
+               {'node_id': 'N2', 'address': '10.0.0.2', 'protocol_port': 80}]
+
+        added = self.pools.update_members('P1', add=add)
+
+        self.assertEqual(['N1', 'N2'], sorted(added))
+        self.assertEqual({added['N1']: ('10.0.0.1', 80),
+                          added['N2']: ('10.0.0.2', 80)},
+                         self.pools.pools['P1'])
+
+        self.pools.update_members('P1', remove=[added['N1']])
+
+        self.assertEqual([added['N2']], list(self.pools.pools['P1']))
+        # Each call is one reconfiguration of the pool
+        self.assertEqual({'P1': 2}, self.pools.updates)
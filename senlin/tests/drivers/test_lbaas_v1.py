@@ -0,0 +1,52 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+from neutronclient.common import exceptions as neutron_exc
+
+from senlin.drivers import lbaas_v1
+from senlin.tests.common import base
+from senlin.tests.common import utils
+
+
+class DriverLBaaSV1Test(base.SenlinTestCase):
+    def setUp(self):
+        super(DriverLBaaSV1Test, self).setUp()
+        self.nc = mock.Mock()
+        self.patch('senlin.engine.clients.neutron', return_value=self.nc)
+        self.driver = lbaas_v1.DriverLBaaSV1(utils.dummy_context())
+
+    def test_add_members(self):
+        self.nc.create_member.return_value = {
+            'members': [{'id': 'M1'}, {'id': 'M2'}]}
+        add = [{'node_id': 'N1', 'address': '10.0.0.1', 'protocol_port': 80},
+               {'node_id': 'N2', 'address': '10.0.0.2', 'protocol_port': 80}]
+
+        added = self.driver.update_members('P1', add=add)
+
+        self.assertEqual({'N1': 'M1', 'N2': 'M2'}, added)
+        # All members are created with one request
+        self.nc.create_member.assert_called_once_with({'members': [
+            {'pool_id': 'P1', 'address': '10.0.0.1', 'protocol_port': 80},
+            {'pool_id': 'P1', 'address': '10.0.0.2', 'protocol_port': 80},
+        ]})
+        self.assertEqual(0, self.nc.delete_member.call_count)
+
+    def test_remove_members(self):
+        self.nc.delete_member.side_effect = [None, neutron_exc.NotFound()]
+
+        added = self.driver.update_members('P1', remove=['M1', 'M2'])
+
+        self.assertEqual({}, added)
+        self.assertEqual([mock.call('M1'), mock.call('M2')],
+                         self.nc.delete_member.call_args_list)
+        self.assertEqual(0, self.nc.create_member.call_count)
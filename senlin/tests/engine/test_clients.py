@@ -0,0 +1,105 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+from oslo.config import cfg
+
+from senlin.engine import clients
+from senlin.tests.common import base
+from senlin.tests.common import utils
+
+
+class ClientsTest(base.SenlinTestCase):
+    def setUp(self):
+        super(ClientsTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.patchobject(clients, '_cache', None)
+        self.session_class = self.patch('keystoneclient.session.Session')
+        self.session = self.session_class.return_value
+        self.heat_client = self.patch('heatclient.client.Client')
+        self.neutron_client = self.patch(
+            'neutronclient.v2_0.client.Client')
+        self.token = self.patch('keystoneclient.auth.identity.v2.Token')
+
+    def _token_context(self, lifetime):
+        expires = datetime.datetime.utcnow() + datetime.timedelta(
+            seconds=lifetime)
+        self.token.return_value.get_access.return_value.expires = expires
+        return utils.dummy_context(password=None)
+
+    def test_heat_session(self):
+        cfg.CONF.set_override('endpoint_type', 'internalURL',
+                              group='clients_heat')
+
+        hc = clients.heat(self.ctx)
+
+        self.assertIs(self.heat_client.return_value, hc)
+        self.heat_client.assert_called_once_with(
+            '1', session=self.session, service_type='orchestration',
+            interface='internalURL', region_name=self.ctx.region_name)
+        # The client is cached
+        self.assertIs(hc, clients.heat(self.ctx))
+        self.assertEqual(1, self.heat_client.call_count)
+
+    def test_options_per_service(self):
+        cfg.CONF.set_override('insecure', True, group='clients_heat')
+        cfg.CONF.set_override('ca_file', '/etc/neutron-ca.pem',
+                              group='clients_neutron')
+
+        clients.heat(self.ctx)
+        clients.neutron(self.ctx)
+
+        verify = [c[1]['verify'] for c in self.session_class.call_args_list]
+        self.assertEqual([False, '/etc/neutron-ca.pem'], verify)
+        # One client of each service for the same credentials
+        self.assertEqual(1, self.heat_client.call_count)
+        self.assertEqual(1, self.neutron_client.call_count)
+
+    def test_neutron_session(self):
+        cfg.CONF.set_override('endpoint_type', 'internalURL',
+                              group='clients_neutron')
+
+        nc = clients.neutron(self.ctx)
+
+        self.assertIs(self.neutron_client.return_value, nc)
+        self.neutron_client.assert_called_once_with(
+            session=self.session, service_type='network',
+            endpoint_type='internalURL', region_name=self.ctx.region_name)
+
+    def test_client_per_credentials(self):
+        # A profile with credentials of its own, on behalf of the same user
+        profile_ctx = utils.dummy_context(password='profile-password')
+
+        hc = clients.heat(self.ctx)
+
+        self.assertIsNot(hc, clients.heat(profile_ctx))
+        self.assertNotEqual(clients.cache_key(self.ctx),
+                            clients.cache_key(profile_ctx))
+        self.assertEqual(2, self.heat_client.call_count)
+
+    def test_token_client_cached_until_expiry(self):
+        ctx = self._token_context(3600)
+
+        hc = clients.heat(ctx)
+
+        self.assertIs(hc, clients.heat(ctx))
+        self.assertEqual(1, self.heat_client.call_count)
+
+    def test_token_client_not_cached_past_expiry(self):
+        ctx = self._token_context(10)
+
+        clients.heat(ctx)
+        clients.heat(ctx)
+
+        # The token is about to expire, the client is not kept
+        self.assertEqual(2, self.heat_client.call_count)
@@ -0,0 +1,342 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from senlin.common import exception
+from senlin.db.sqlalchemy import api as db_api
+from senlin.engine import action as action_mod
+from senlin.engine import scheduler
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+
+class FakeCluster(object):
+    '''The parts of an engine cluster used by the cluster actions.'''
+
+    ACTIVE = 'ACTIVE'
+    ERROR = 'ERROR'
+    UPDATING = 'UPDATING'
+
+    def __init__(self, record, node_ids=None):
+        self.id = record.id
+        self.name = record.name
+        self.size = record.size
+        self.profile_id = record.profile_id
+        self.node_ids = node_ids or []
+        self.status = None
+
+    def get_nodes(self):
+        return self.node_ids
+
+    def set_status(self, status, reason=None):
+        self.status = status
+
+    def do_update(self, context, new_profile_id):
+        return True
+
+
+class ClusterActionResizeTest(base.SenlinTestCase):
+    def setUp(self):
+        super(ClusterActionResizeTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.profile = shared.create_profile(self.ctx)
+        self.record = shared.create_cluster(self.ctx, self.profile, size=3,
+                                            next_index=3)
+        self.node_ids = [
+            shared.create_node(self.ctx, self.record, self.profile,
+                               name='node-%s' % i, index=i).id
+            for i in range(3)]
+        self.cluster = FakeCluster(self.record, self.node_ids)
+
+        # Node profiles are not exercised here
+        self.patch('senlin.profiles.base.load')
+        self.failed = set()
+
+        def execute(node_action):
+            if node_action.target in self.failed:
+                return node_action.RES_ERROR
+            return node_action.RES_OK
+
+        self.execute = self.patchobject(action_mod.NodeAction, 'execute',
+                                        autospec=True, side_effect=execute)
+
+    def _action(self, name, **inputs):
+        action = action_mod.Action(self.ctx, name, target=self.record.id,
+                                   inputs=inputs)
+        action.store()
+        action.start_time = scheduler.wallclock()
+        return action
+
+    def _node_actions(self):
+        return sorted((c[0][0].action, c[0][0].target)
+                      for c in self.execute.call_args_list)
+
+    def _cluster(self):
+        return db_api.cluster_get(self.ctx, self.record.id)
+
+    def _assert_unlocked(self):
+        self.assertIsNone(db_api.cluster_lock_create(self.record.id,
+                                                     shared.UUID3))
+
+    def test_scale_up(self):
+        action = self._action('CLUSTER_SCALE_UP', count=2)
+
+        res = action.do_scale_up(self.cluster)
+
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual('ACTIVE', self.cluster.status)
+        created = self._node_actions()
+        self.assertEqual(['NODE_CREATE', 'NODE_CREATE'],
+                         [a for a, t in created])
+        indexes = sorted(db_api.node_get(self.ctx, t).index
+                         for a, t in created)
+        self.assertEqual([3, 4], indexes)
+        cluster = self._cluster()
+        self.assertEqual(5, cluster.size)
+        self.assertEqual(5, cluster.next_index)
+        self._assert_unlocked()
+
+    def test_scale_up_partial_failure(self):
+        def execute(node_action):
+            node = db_api.node_get(self.ctx, node_action.target)
+            if node.index == 4:
+                return node_action.RES_ERROR
+            return node_action.RES_OK
+
+        self.execute.side_effect = execute
+        action = self._action('CLUSTER_SCALE_UP', count=2)
+
+        res = action.do_scale_up(self.cluster)
+
+        self.assertEqual(action.RES_ERROR, res)
+        # The node never created is not left as a member
+        members = db_api.node_get_all_by_cluster(self.ctx, self.record.id)
+        indexes = sorted(n.index for n in members.values())
+        self.assertEqual([0, 1, 2, 3], indexes)
+        self.assertEqual(4, self._cluster().size)
+        self._assert_unlocked()
+
+    def test_scale_down(self):
+        action = self._action('CLUSTER_SCALE_DOWN', count=2)
+
+        res = action.do_scale_down(self.cluster)
+
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual([('NODE_DELETE', n) for n in
+                          sorted(self.node_ids[1:])], self._node_actions())
+        self.assertEqual(1, self._cluster().size)
+        self._assert_unlocked()
+
+    def test_scale_down_victims_known_to_policies(self):
+        action = self._action('CLUSTER_SCALE_DOWN', count=2)
+        self.patch('senlin.db.api.cluster_get', return_value=self.cluster)
+        checked = []
+
+        def policy_check(cluster_id, phase):
+            checked.append((phase, sorted(action.inputs.get('nodes'))))
+            return True
+
+        self.patchobject(action, 'policy_check', side_effect=policy_check)
+
+        res = action.execute()
+
+        self.assertEqual(action.RES_OK, res)
+        victims = sorted(self.node_ids[1:])
+        self.assertEqual([('BEFORE', victims), ('AFTER', victims)], checked)
+        self.assertEqual([('NODE_DELETE', n) for n in victims],
+                         self._node_actions())
+
+    def test_scale_down_victim_gone(self):
+        action = self._action('CLUSTER_SCALE_DOWN',
+                              nodes=self.node_ids[1:])
+        # Removed by another action before this one locked the cluster
+        self.cluster.node_ids = self.node_ids[:2]
+
+        res = action.do_scale_down(self.cluster)
+
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual([('NODE_DELETE', self.node_ids[1])],
+                         self._node_actions())
+
+    def test_add_nodes(self):
+        other = shared.create_cluster(self.ctx, self.profile)
+        node = shared.create_node(self.ctx, other, self.profile)
+        action = self._action('CLUSTER_ADD_NODES', nodes=[node.id])
+
+        res = action.do_add_nodes(self.cluster)
+
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual([('NODE_JOIN_CLUSTER', node.id)],
+                         self._node_actions())
+        self.assertEqual({'cluster_id': self.record.id},
+                         self.execute.call_args[0][0].inputs)
+        # Joining nodes are counted when they move, not by the action
+        self.assertEqual(3, self._cluster().size)
+        self._assert_unlocked()
+
+    def test_del_nodes(self):
+        action = self._action('CLUSTER_DEL_NODES',
+                              nodes=self.node_ids[:2])
+
+        res = action.do_del_nodes(self.cluster)
+
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual([('NODE_LEAVE_CLUSTER', n) for n in
+                          sorted(self.node_ids[:2])], self._node_actions())
+        self.assertEqual(3, self._cluster().size)
+        self._assert_unlocked()
+
+    def test_del_nodes_by_count(self):
+        action = self._action('CLUSTER_DEL_NODES', count=1)
+
+        res = action.do_del_nodes(self.cluster)
+
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual([('NODE_LEAVE_CLUSTER', self.node_ids[-1])],
+                         self._node_actions())
+
+    def test_resize_partial_failure(self):
+        self.failed.add(self.node_ids[2])
+        action = self._action('CLUSTER_SCALE_DOWN', count=2)
+
+        res = action.do_scale_down(self.cluster)
+
+        self.assertEqual(action.RES_ERROR, res)
+        self.assertEqual('ERROR', self.cluster.status)
+        # Only the node actually deleted is counted
+        self.assertEqual(2, self._cluster().size)
+        self._assert_unlocked()
+
+    def test_resize_cluster_locked(self):
+        db_api.cluster_lock_create(self.record.id, shared.UUID1)
+        action = self._action('CLUSTER_SCALE_UP', count=1)
+
+        res = action.do_scale_up(self.cluster)
+
+        self.assertEqual(action.RES_CANCEL, res)
+        self.assertEqual(0, self.execute.call_count)
+        # Nothing is allocated for the nodes of a scaling not run
+        self.assertEqual(3, self._cluster().next_index)
+        self.assertEqual(3, len(db_api.node_get_all_by_cluster(
+            self.ctx, self.record.id)))
+
+    def test_resize_releases_lock_on_error(self):
+        self.patchobject(action_mod.ClusterAction, '_run_node_actions',
+                         side_effect=exception.Error('boom'))
+        action = self._action('CLUSTER_SCALE_DOWN', count=1)
+
+        self.assertRaises(exception.Error, action.do_scale_down,
+                          self.cluster)
+
+        self._assert_unlocked()
+
+
+class ClusterActionUpdateTest(base.SenlinTestCase):
+    def setUp(self):
+        super(ClusterActionUpdateTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.profile = shared.create_profile(self.ctx)
+        self.record = shared.create_cluster(self.ctx, self.profile)
+        self.cluster = FakeCluster(self.record, ['N1', 'N2', 'N3'])
+
+        self.action = action_mod.Action(self.ctx, 'CLUSTER_UPDATE',
+                                        target=self.record.id)
+        self.action.store()
+        self.start = self.patch('senlin.engine.dispatcher.start_action')
+        self.reschedule = self.patch('senlin.engine.scheduler.reschedule')
+        self.wait = self.patchobject(self.action, '_wait_update_batch',
+                                     return_value=self.action.RES_OK)
+
+    def _plan(self, batches, pause_time):
+        self.patchobject(self.action, '_get_update_plan',
+                         return_value=(batches, pause_time))
+
+    def _started(self):
+        return [c[0][2] for c in self.start.call_args_list]
+
+    def test_update_plan_without_policy(self):
+        self.patchobject(self.action, '_get_policy', return_value=None)
+
+        batches, pause_time = self.action._get_update_plan(
+            self.cluster, ['N1', 'N2', 'N3'])
+
+        self.assertEqual([['N1', 'N2', 'N3']], batches)
+        self.assertEqual(0, pause_time)
+
+    def test_update_plan_with_policy(self):
+        policy = mock.Mock(pause_time=5)
+        policy.enforce.return_value = [['N1', 'N2'], ['N3']]
+        self.patchobject(self.action, '_get_policy', return_value=policy)
+
+        batches, pause_time = self.action._get_update_plan(
+            self.cluster, ['N1', 'N2', 'N3'])
+
+        self.assertEqual([['N1', 'N2'], ['N3']], batches)
+        self.assertEqual(5, pause_time)
+        policy.enforce.assert_called_once_with(
+            self.record.id, self.action, nodes=['N1', 'N2', 'N3'])
+
+    def test_update_batches(self):
+        self._plan([['N1', 'N2'], ['N3']], 0)
+
+        res = self.action.do_update(self.cluster, 'NEW_PROFILE')
+
+        self.assertEqual(self.action.RES_OK, res)
+        self.assertEqual(['N1', 'N2', 'N3'], self._started())
+        self.assertEqual(2, self.wait.call_count)
+        self.assertEqual(0, self.reschedule.call_count)
+        self.assertEqual('ACTIVE', self.cluster.status)
+
+        # The node actions are stored READY for the dispatcher to run them
+        for c in self.start.call_args_list:
+            record = db_api.action_get(self.ctx, c[0][1])
+            self.assertEqual('NODE_UPDATE', record.action)
+            self.assertEqual('READY', record.status)
+            self.assertEqual({'new_profile_id': 'NEW_PROFILE'},
+                             record.inputs)
+
+    def test_update_empty_cluster(self):
+        self.cluster.node_ids = []
+        self.patchobject(self.action, '_get_policy', return_value=None)
+
+        res = self.action.do_update(self.cluster, 'NEW_PROFILE')
+
+        self.assertEqual(self.action.RES_OK, res)
+        self.assertEqual([], self._started())
+        # There is nothing to wait for
+        self.assertEqual(0, self.wait.call_count)
+        self.assertEqual('ACTIVE', self.cluster.status)
+
+    def test_update_pause_between_batches(self):
+        self._plan([['N1'], ['N2'], ['N3']], 5)
+
+        res = self.action.do_update(self.cluster, 'NEW_PROFILE')
+
+        self.assertEqual(self.action.RES_OK, res)
+        # No pause after the last batch
+        self.assertEqual([mock.call(self.action, sleep_time=5)] * 2,
+                         self.reschedule.call_args_list)
+
+    def test_update_batch_failed(self):
+        self._plan([['N1'], ['N2'], ['N3']], 5)
+        self.wait.return_value = self.action.RES_TIMEOUT
+
+        res = self.action.do_update(self.cluster, 'NEW_PROFILE')
+
+        self.assertEqual(self.action.RES_TIMEOUT, res)
+        self.assertEqual(['N1'], self._started())
+        self.assertEqual(0, self.reschedule.call_count)
+        # The prepared actions of the next batch are dropped
+        self.assertEqual(1, len([a for a in db_api.action_get_all(self.ctx)
+                                 if a.action == 'NODE_UPDATE']))
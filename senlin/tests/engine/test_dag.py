@@ -0,0 +1,137 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+import eventlet
+
+from senlin.common import exception
+from senlin.engine import dag
+from senlin.tests.common import base
+
+
+def _graph(edges, nodes=()):
+    graph = dag.Graph()
+    for node in nodes:
+        graph.add_node(node)
+    for requirer, required in edges:
+        graph.add_edge(requirer, required)
+    return graph
+
+
+class GraphTest(base.SenlinTestCase):
+
+    def test_toposort(self):
+        graph = _graph([('b', 'a'), ('c', 'a'), ('d', 'b'), ('d', 'c')])
+
+        order = graph.toposort()
+
+        self.assertEqual('a', order[0])
+        self.assertEqual('d', order[-1])
+        self.assertEqual(['a'], graph.roots())
+        self.assertEqual(set(['b', 'c', 'd']), graph.descendants('a'))
+
+    def test_cycle(self):
+        graph = _graph([('b', 'a'), ('c', 'b'), ('a', 'c'), ('d', 'a')],
+                       nodes=['e'])
+
+        ex = self.assertRaises(exception.CircularDependency, graph.toposort)
+        for node in 'abc':
+            self.assertIn(node, str(ex))
+
+    def test_self_cycle(self):
+        graph = _graph([('a', 'a')])
+
+        self.assertRaises(exception.CircularDependency, graph.toposort)
+        # The executor fails before running anything
+        self.assertRaises(exception.CircularDependency, dag.DAGExecutor,
+                          graph, lambda n: 'OK')
+
+
+class DAGExecutorTest(base.SenlinTestCase):
+    def setUp(self):
+        super(DAGExecutorTest, self).setUp()
+        self.ran = []
+        self.results = {}
+
+    def _run(self, node):
+        self.ran.append(node)
+        eventlet.sleep(0)
+        result = self.results.get(node, 'OK')
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def test_execute(self):
+        graph = _graph([('b', 'a'), ('c', 'b')])
+
+        status = dag.execute(graph, self._run)
+
+        self.assertEqual(['a', 'b', 'c'], self.ran)
+        self.assertEqual(dict((n, 'SUCCEEDED') for n in 'abc'), status)
+
+    def test_parallelism_bound(self):
+        graph = _graph([], nodes=range(6))
+        running = [0]
+        peak = [0]
+
+        def run(node):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            for i in range(3):
+                eventlet.sleep(0)
+            running[0] -= 1
+            return 'OK'
+
+        status = dag.execute(graph, run, max_workers=2)
+
+        self.assertEqual(2, peak[0])
+        self.assertEqual(['SUCCEEDED'] * 6, list(status.values()))
+
+    def test_failure_propagation(self):
+        graph = _graph([('b', 'a'), ('c', 'b'), ('e', 'd')], nodes=['f'])
+        self.results['a'] = 'ERROR'
+        self.results['d'] = 'CANCEL'
+        self.results['f'] = Exception('boom')
+
+        status = dag.execute(graph, self._run)
+
+        self.assertEqual(['a', 'd', 'f'], sorted(self.ran))
+        self.assertEqual({'a': 'FAILED', 'b': 'FAILED', 'c': 'FAILED',
+                          'd': 'CANCELLED', 'e': 'CANCELLED',
+                          'f': 'FAILED'}, status)
+
+    def test_cancelled(self):
+        graph = _graph([('b', 'a'), ('c', 'b')])
+
+        status = dag.execute(graph, self._run,
+                             cancelled=lambda: bool(self.ran))
+
+        self.assertEqual(['a'], self.ran)
+        self.assertEqual({'a': 'SUCCEEDED', 'b': 'CANCELLED',
+                          'c': 'CANCELLED'}, status)
+
+    def test_critical_path(self):
+        graph = _graph([('b', 'a'), ('c', 'a'), ('d', 'b'), ('d', 'c')],
+                       nodes=['e'])
+        executor = dag.DAGExecutor(graph, self._run)
+        durations = {'a': 1, 'b': 5, 'c': 2, 'd': 1}
+        for node, duration in durations.items():
+            executor.start_time[node] = 100
+            executor.end_time[node] = 100 + duration
+
+        # 'e' hasn't been run
+        self.assertEqual((7, ['a', 'b', 'd']), executor.critical_path())
+
+    def test_critical_path_nothing_run(self):
+        executor = dag.DAGExecutor(_graph([('b', 'a')]), self._run)
+
+        self.assertEqual((0, []), executor.critical_path())
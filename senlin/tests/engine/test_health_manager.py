@@ -0,0 +1,191 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+import mock
+from oslo.config import cfg
+
+from senlin.db.sqlalchemy import api as db_api
+from senlin.engine import health_manager
+from senlin.engine import sharding
+from senlin.policies import base as policies
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+CHECK_TYPE = 'stack_status_polling'
+
+
+class TimerWheelTest(base.SenlinTestCase):
+
+    def test_advance(self):
+        wheel = health_manager.TimerWheel(4, 1)
+        wheel.schedule('a', 1)
+        wheel.schedule('b', 6)
+        wheel.schedule('c', 0.2)
+        wheel.schedule('d', 4)
+
+        due = [wheel.advance() for i in range(8)]
+
+        # 'b' is due after more than one turn of the wheel
+        self.assertEqual([['a', 'c'], [], [], ['d'], [], ['b'], [], []], due)
+
+    def test_schedule_from_cursor(self):
+        wheel = health_manager.TimerWheel(4, 0.5)
+        wheel.advance()
+        wheel.advance()
+        wheel.schedule('a', 1)
+
+        self.assertEqual([[], ['a']], [wheel.advance(), wheel.advance()])
+
+
+class HealthManagerTest(base.SenlinTestCase):
+    def setUp(self):
+        super(HealthManagerTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.profile = shared.create_profile(self.ctx)
+        self.cluster = shared.create_cluster(self.ctx, self.profile)
+        self.node_ids = [
+            shared.create_node(self.ctx, self.cluster, self.profile,
+                               name='node-%s' % i, physical_id='S%s' % i).id
+            for i in range(3)]
+
+        self.spawn = self.patch('eventlet.spawn')
+        # No jitter, the checks are due exactly every interval
+        self.patch('random.uniform', return_value=0)
+        self.start = self.patch('senlin.engine.dispatcher.start_action')
+
+        self.manager = health_manager.HealthManager()
+        self.healthy = dict((n, True) for n in self.node_ids)
+        self.checker = mock.Mock(side_effect=lambda checks: dict(
+            (c.node_id, self.healthy[c.node_id]) for c in checks))
+        self.manager.checkers[CHECK_TYPE] = self.checker
+
+    def _sync(self):
+        self.manager.sync_cluster(self.ctx, self.cluster.id, CHECK_TYPE, 10)
+
+    def _tick(self, ticks=1):
+        for i in range(ticks):
+            self.manager._queue(self.manager.wheel.advance())
+            self.manager.run_checks()
+
+    def _checked(self):
+        return sorted(c.node_id for call in self.checker.call_args_list
+                      for c in call[0][0])
+
+    def test_sync_cluster(self):
+        self._sync()
+
+        self.assertEqual(sorted(self.node_ids), sorted(self.manager.checks))
+        self.assertEqual(1, self.spawn.call_count)
+
+        # Nodes not in the cluster any more are not checked
+        db_api.node_migrate(self.ctx, self.node_ids[0], self.cluster.id,
+                            None)
+        self._sync()
+        self.assertEqual(sorted(self.node_ids[1:]),
+                         sorted(self.manager.checks))
+
+    def test_checks_batched(self):
+        cfg.CONF.set_override('health_check_batch_size', 2)
+        self._sync()
+
+        self._tick()
+
+        self.assertEqual(2, self.checker.call_count)
+        self.assertEqual([2, 1], [len(c[0][0])
+                                  for c in self.checker.call_args_list])
+
+        # The next checks are due an interval later
+        self.checker.reset_mock()
+        self._tick(9)
+        self.assertEqual(0, self.checker.call_count)
+        self._tick()
+        self.assertEqual(sorted(self.node_ids), self._checked())
+
+    def test_cluster_budget(self):
+        cfg.CONF.set_override('health_check_cluster_budget', 2)
+        self._sync()
+
+        self._tick()
+        self.assertEqual(2, len(self._checked()))
+
+        # The remaining check waits for the next tick
+        self._tick()
+        self.assertEqual(sorted(self.node_ids), self._checked())
+
+    def test_recover_when_turning_unhealthy(self):
+        self._sync()
+        self._tick()
+        self.assertEqual(0, self.start.call_count)
+
+        self.healthy[self.node_ids[0]] = False
+        self._tick(10)
+
+        self.assertEqual(1, self.start.call_count)
+        self.assertEqual(self.cluster.id, self.start.call_args[0][2])
+        node = db_api.node_get(self.ctx, self.node_ids[0])
+        self.assertEqual('ERROR', node.status)
+
+        # Still unhealthy, no new recovery
+        self._tick(10)
+        self.assertEqual(1, self.start.call_count)
+
+        self.healthy[self.node_ids[0]] = True
+        self._tick(10)
+        node = db_api.node_get(self.ctx, self.node_ids[0])
+        self.assertEqual('ACTIVE', node.status)
+
+    def test_suspend_cluster(self):
+        self._sync()
+        self.manager.suspend_cluster(self.cluster.id)
+
+        self._tick()
+        self.assertEqual(0, self.checker.call_count)
+
+        # Checks go on once the cluster is synchronized again
+        self._sync()
+        self._tick(10)
+        self.assertEqual(sorted(self.node_ids), self._checked())
+
+    def test_remove_cluster(self):
+        self._sync()
+
+        self.manager.remove_cluster(self.cluster.id)
+
+        self.assertEqual({}, self.manager.checks)
+        self._tick()
+        self.assertEqual(0, self.checker.call_count)
+
+    def test_load(self):
+        policy = shared.create_policy(self.ctx, type='HealthPolicy')
+        db_api.cluster_attach_policy(self.ctx, self.cluster.id, policy.id,
+                                     {'enabled': True})
+        self.patchobject(policies, 'load', return_value=mock.Mock(
+            check_type=CHECK_TYPE, interval=30, grace_period=0))
+        shard = sharding.shard_of(self.cluster.id)
+
+        self.manager.load(self.ctx, [shard + 1])
+        self.assertEqual({}, self.manager.checks)
+
+        self.manager.load(self.ctx, [shard])
+        self.assertEqual(sorted(self.node_ids), sorted(self.manager.checks))
+        self.assertEqual(30, self.manager.checks[self.node_ids[0]].interval)
+
+    def test_load_disabled(self):
+        policy = shared.create_policy(self.ctx, type='HealthPolicy')
+        db_api.cluster_attach_policy(self.ctx, self.cluster.id, policy.id,
+                                     {'enabled': False})
+
+        self.manager.load(self.ctx, [sharding.shard_of(self.cluster.id)])
+
+        self.assertEqual({}, self.manager.checks)
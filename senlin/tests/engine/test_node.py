@@ -0,0 +1,129 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from senlin.common import exception
+from senlin.db.sqlalchemy import api as db_api
+from senlin.engine import node as nodes
+from senlin.policies import placement_policy
+from senlin.profiles import base as profiles
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+
+class NodeZoneCountTest(base.SenlinTestCase):
+    def setUp(self):
+        super(NodeZoneCountTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.profile = shared.create_profile(self.ctx)
+        self.cluster = shared.create_cluster(
+            self.ctx, self.profile,
+            data={placement_policy.ZONE_COUNTS: {'AZ1': 1}})
+
+        # Node profiles are not exercised here
+        self.patch('senlin.profiles.base.load')
+        self.create = self.patchobject(profiles.Profile, 'create_object',
+                                       return_value='P2')
+        self.delete = self.patchobject(profiles.Profile, 'delete_object',
+                                       return_value=True)
+
+    def _node(self, cluster=None, physical_id=shared.UUID1, zone='AZ1'):
+        data = {'placement': {'zone': zone}} if zone else {}
+        record = shared.create_node(self.ctx, cluster or self.cluster,
+                                    self.profile, physical_id=physical_id,
+                                    data=data)
+        return nodes.Node.load(self.ctx, record.id)
+
+    def _counts(self, cluster_id=None):
+        cluster = db_api.cluster_get(self.ctx, cluster_id or self.cluster.id)
+        return cluster.data.get(placement_policy.ZONE_COUNTS)
+
+    def test_create(self):
+        node = self._node(physical_id='')
+
+        self.assertTrue(node.do_create())
+
+        self.assertEqual({'AZ1': 2}, self._counts())
+        self.assertEqual('P2', db_api.node_get(self.ctx, node.id).physical_id)
+
+    def test_create_failed(self):
+        self.create.return_value = None
+        node = self._node(physical_id='')
+
+        self.assertFalse(node.do_create())
+
+        self.assertEqual({'AZ1': 1}, self._counts())
+
+    def test_create_not_placed(self):
+        node = self._node(physical_id='', zone=None)
+
+        self.assertTrue(node.do_create())
+
+        self.assertEqual({'AZ1': 1}, self._counts())
+
+    def test_delete(self):
+        node = self._node()
+
+        self.assertTrue(node.do_delete())
+
+        self.assertEqual({'AZ1': 0}, self._counts())
+        self.assertRaises(exception.NotFound, db_api.node_get, self.ctx,
+                          node.id)
+
+    def test_delete_failed(self):
+        self.delete.return_value = False
+        node = self._node()
+
+        self.assertFalse(node.do_delete())
+
+        self.assertEqual({'AZ1': 1}, self._counts())
+        self.assertIsNotNone(db_api.node_get(self.ctx, node.id))
+
+    def test_recover(self):
+        node = self._node()
+
+        self.assertTrue(node.do_recover())
+
+        # The node is rebuilt in the zone it was counted in
+        self.assertEqual({'AZ1': 1}, self._counts())
+
+    def test_recover_failed(self):
+        self.create.return_value = None
+        node = self._node()
+
+        self.assertFalse(node.do_recover())
+
+        self.assertEqual({'AZ1': 0}, self._counts())
+        self.assertEqual('', db_api.node_get(self.ctx, node.id).physical_id)
+
+        # Counted again once a physical object is built
+        self.create.return_value = 'P2'
+        self.assertTrue(node.do_recover())
+        self.assertEqual({'AZ1': 1}, self._counts())
+
+    def test_join(self):
+        other = shared.create_cluster(self.ctx, self.profile)
+        node = self._node(cluster=other)
+
+        self.assertTrue(node.do_join(self.cluster.id))
+
+        self.assertEqual({'AZ1': 2}, self._counts())
+        self.assertEqual({'AZ1': 0}, self._counts(other.id))
+        self.assertEqual(self.cluster.id, node.cluster_id)
+
+    def test_leave(self):
+        node = self._node()
+
+        self.assertTrue(node.do_leave())
+
+        self.assertEqual({'AZ1': 0}, self._counts())
+        self.assertIsNone(db_api.node_get(self.ctx, node.id).cluster_id)
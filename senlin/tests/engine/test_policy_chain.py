@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+import mock
+from oslo.config import cfg
+
+from senlin.engine import policy_chain
+from senlin.tests.common import base
+from senlin.tests.common import utils
+
+
+class FakePolicy(object):
+    TARGET = [('BEFORE', 'CLUSTER_SCALE_UP'), ('AFTER', 'CLUSTER_SCALE_UP')]
+
+    def __init__(self, name):
+        self.name = name
+        self.context = None
+
+
+class OtherPolicy(FakePolicy):
+    TARGET = [('WHEN', 'CLUSTER_SCALE_UP')]
+
+
+class LevelKeyTest(base.SenlinTestCase):
+
+    def test_level_key(self):
+        levels = [None, 'DEBUG', 50, 'ERROR', '10', 'bogus', 'CRITICAL', 0]
+
+        ordered = sorted(levels, key=policy_chain._level_key)
+
+        # Level names come as 0 (CRITICAL) to 4 (DEBUG), unknown levels
+        # after DEBUG
+        self.assertEqual(['CRITICAL', 0, 'ERROR', 'DEBUG'], ordered[:4])
+        self.assertEqual(['10', 50], ordered[-2:])
+        self.assertEqual(set([None, 'bogus']), set(ordered[4:6]))
+
+    def test_chain_ordered_by_level(self):
+        p1, p2, p3 = FakePolicy('p1'), FakePolicy('p2'), FakePolicy('p3')
+
+        chain = policy_chain.PolicyChain('C1', [('DEBUG', p1), (0, p2),
+                                                ('WARNING', p3)])
+
+        self.assertEqual(['p2', 'p3', 'p1'],
+                         [p.name for p in chain.policies])
+        self.assertEqual(['p2', 'p3', 'p1'],
+                         [p.name for p in chain.get(None, 'BEFORE',
+                                                    'CLUSTER_SCALE_UP')])
+
+
+class PolicyChainFindTest(base.SenlinTestCase):
+    def setUp(self):
+        super(PolicyChainFindTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.fake = FakePolicy('fake')
+        self.other = OtherPolicy('other')
+        self.chain = policy_chain.PolicyChain('C1', [('DEBUG', self.fake),
+                                                     ('ERROR', self.other)])
+
+    def test_find(self):
+        policy = self.chain.find(self.ctx, 'CLUSTER_SCALE_UP', OtherPolicy)
+
+        self.assertEqual('other', policy.name)
+        # The policy found is bound to the caller's context
+        self.assertIs(self.ctx, policy.context)
+        self.assertIsNot(self.other, policy)
+        self.assertIsNone(self.other.context)
+
+    def test_find_phase_order(self):
+        # Both policies are FakePolicy instances, the one checked in an
+        # earlier phase wins over the more important one
+        policy = self.chain.find(self.ctx, 'CLUSTER_SCALE_UP', FakePolicy)
+
+        self.assertEqual('fake', policy.name)
+
+    def test_find_none(self):
+        self.assertIsNone(self.chain.find(self.ctx, 'CLUSTER_SCALE_DOWN',
+                                          FakePolicy))
+        self.assertIsNone(self.chain.find(self.ctx, 'CLUSTER_SCALE_UP',
+                                          mock.Mock))
+
+
+class GetChainTest(base.SenlinTestCase):
+    def setUp(self):
+        super(GetChainTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.patchobject(policy_chain, '_chains', None)
+        self.compile = self.patchobject(policy_chain.PolicyChain, 'compile',
+                                        side_effect=lambda c, i: object())
+        self.now = self.patch('time.time', return_value=1000.0)
+
+    def test_get_chain_cached(self):
+        chain = policy_chain.get_chain(self.ctx, 'C1')
+
+        self.assertIs(chain, policy_chain.get_chain(self.ctx, 'C1'))
+        self.assertEqual(1, self.compile.call_count)
+
+    def test_invalidate(self):
+        chain = policy_chain.get_chain(self.ctx, 'C1')
+        policy_chain.invalidate('C1')
+
+        self.assertIsNot(chain, policy_chain.get_chain(self.ctx, 'C1'))
+        self.assertEqual(2, self.compile.call_count)
+
+    def test_get_chain_expired(self):
+        chain = policy_chain.get_chain(self.ctx, 'C1')
+        self.now.return_value += cfg.CONF.object_cache_ttl
+
+        self.assertIsNot(chain, policy_chain.get_chain(self.ctx, 'C1'))
+        self.assertEqual(2, self.compile.call_count)
@@ -0,0 +1,114 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from senlin.common import exception
+from senlin.db.sqlalchemy import api as db_api
+from senlin.engine import action as action_mod
+from senlin.engine import scheduler
+from senlin.tests.common import base
+from senlin.tests.common import utils
+
+
+class ActionProcTest(base.SenlinTestCase):
+    def setUp(self):
+        super(ActionProcTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.action = action_mod.Action(self.ctx, 'CLUSTER_CREATE',
+                                        target='C1', status='READY')
+        self.action.store()
+        self.execute = self.patchobject(self.action, 'execute',
+                                        return_value=self.action.RES_OK)
+
+    def test_succeeded(self):
+        scheduler.ActionProc(self.ctx, self.action)(wait_time=None)
+
+        self.assertEqual(1, self.execute.call_count)
+        record = db_api.action_get(utils.dummy_context(), self.action.id)
+        self.assertEqual('SUCCEEDED', record.status)
+
+    def test_succeeded_changed_meanwhile(self):
+        mark = self.patch('senlin.db.api.action_mark_succeeded')
+        mark.side_effect = exception.ConcurrentUpdate(object='action',
+                                                      id=self.action.id,
+                                                      version=1)
+        get_status = self.patchobject(self.action, 'get_status',
+                                      side_effect=['READY', 'CANCELLED'])
+
+        # The conflict doesn't escape from the action thread
+        scheduler.ActionProc(self.ctx, self.action)(wait_time=None)
+
+        self.assertEqual(1, mark.call_count)
+        self.assertEqual(2, get_status.call_count)
+
+    def test_reclaimed_meanwhile(self):
+        tgm = mock.Mock(engine_id='E1')
+        db_api.action_start_work_on(self.ctx, self.action.id, 'E1')
+
+        def execute():
+            # A peer sweeps this engine and takes the action over
+            db_api.action_reclaim_orphans(self.ctx, ['E1'], 'READY')
+            db_api.action_start_work_on(self.ctx, self.action.id, 'E2')
+            return self.action.RES_OK
+
+        self.execute.side_effect = execute
+        scheduler.ActionProc(self.ctx, self.action, tgm)(wait_time=None)
+
+        # The result is dropped rather than written over the new owner's
+        record = db_api.action_get(self.ctx, self.action.id)
+        self.assertEqual('RUNNING', record.status)
+        self.assertEqual('E2', record.owner)
+
+
+class HeartbeatTest(base.SenlinTestCase):
+    def setUp(self):
+        super(HeartbeatTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.patch('senlin.common.context.get_admin_context',
+                   return_value=self.ctx)
+        self.tgm = scheduler.ThreadGroupManager()
+        self.addCleanup(self.tgm.stop_timers)
+        self.tgm.engine_id = 'E1'
+
+    def _create_action(self, owner):
+        action = action_mod.Action(self.ctx, 'CLUSTER_CREATE',
+                                   target='C1', status='READY')
+        action.store()
+        if owner is not None:
+            db_api.action_start_work_on(self.ctx, action.id, owner)
+        return action
+
+    def test_heartbeat_refreshes_record(self):
+        db_api.service_create(self.ctx, 'E1')
+        drop = self.patchobject(self.tgm, '_drop_reclaimed_actions')
+
+        self.tgm._heartbeat()
+
+        self.assertEqual(0, drop.call_count)
+        self.assertIsNotNone(db_api.service_get(self.ctx, 'E1'))
+
+    def test_heartbeat_after_swept(self):
+        owned = self._create_action('E1')
+        reclaimed = self._create_action('E2')
+        waiting = self._create_action(None)
+        threads = dict((a.id, mock.Mock()) for a in (owned, reclaimed))
+        self.tgm.threads.update(threads)
+        self.tgm.schedule_retry(self.ctx, owned, 10)
+        self.tgm.schedule_retry(self.ctx, waiting, 10)
+
+        self.tgm._heartbeat()
+
+        self.assertEqual(0, threads[owned.id].kill.call_count)
+        threads[reclaimed.id].kill.assert_called_once_with()
+        self.assertEqual([owned.id], [r[1] for r in self.tgm.retries])
+        self.assertIsNotNone(db_api.service_get(self.ctx, 'E1'))
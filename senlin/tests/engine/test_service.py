@@ -0,0 +1,100 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+import mock
+from oslo.config import cfg
+from oslo import messaging
+
+from senlin.common import cache
+from senlin.db.sqlalchemy import api as db_api
+from senlin.engine import action as actions
+from senlin.engine import cooldown
+from senlin.engine import service
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+
+class TriggerPolicyTest(base.SenlinTestCase):
+    def setUp(self):
+        super(TriggerPolicyTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        profile = shared.create_profile(self.ctx)
+        self.cluster = shared.create_cluster(self.ctx, profile)
+        self.policy = shared.create_policy(self.ctx)
+        db_api.cluster_attach_policy(self.ctx, self.cluster.id,
+                                     self.policy.id,
+                                     {'enabled': True, 'cooldown': 60})
+        self.patchobject(cooldown, '_ledger', None)
+        self.start = self.patch('senlin.engine.dispatcher.start_action')
+        self.eng = service.EngineService('host-a', 'topic-a')
+
+    def _trigger(self, action='CLUSTER_SCALE_UP'):
+        return self.eng.trigger_policy(self.ctx, self.cluster.id,
+                                       self.policy.id, action=action)
+
+    def _last_op(self):
+        return db_api.cluster_get_policy(utils.dummy_context(),
+                                         self.cluster.id,
+                                         self.policy.id).last_op
+
+    def test_trigger(self):
+        action_id = self._trigger('CLUSTER_SCALE_DOWN')
+
+        action = db_api.action_get(self.ctx, action_id)
+        self.assertEqual('CLUSTER_SCALE_DOWN', action.action)
+        self.assertEqual('READY', action.status)
+        self.start.assert_called_once_with(self.ctx, action_id,
+                                           self.cluster.id)
+        self.assertIsNotNone(self._last_op())
+
+        # In cooldown
+        self.assertIsNone(self._trigger())
+        self.assertEqual(1, self.start.call_count)
+
+    def test_trigger_action_not_supported(self):
+        self.assertRaises(messaging.rpc.dispatcher.ExpectedException,
+                          self._trigger, 'CLUSTER_DELETE')
+
+        self.assertEqual(0, self.start.call_count)
+        # The cooldown is not started
+        self.assertIsNone(self._last_op())
+
+    def test_trigger_action_not_created(self):
+        store = self.patchobject(actions.Action, 'store',
+                                 side_effect=Exception('boom'))
+
+        self.assertRaises(Exception, self._trigger)
+
+        self.assertEqual(0, self.start.call_count)
+        self.assertIsNone(self._last_op())
+
+        # The next trigger is not turned down
+        store.side_effect = None
+        self._trigger()
+        self.assertEqual(1, self.start.call_count)
+
+    def test_cooldown_ended_elsewhere(self):
+        clock = self.patchobject(cache, 'time', mock.Mock())
+        clock.time.return_value = 1000
+        self._trigger()
+
+        # Another engine ends the cooldown
+        db_api.cluster_mark_policy_triggered(self.ctx, self.cluster.id,
+                                             self.policy.id, None)
+        self.assertIsNone(self._trigger())
+
+        # Seen once the entry of the ledger has expired
+        clock.time.return_value += cfg.CONF.object_cache_ttl
+        self.assertIsNotNone(self._trigger())
+        self.assertEqual(2, self.start.call_count)
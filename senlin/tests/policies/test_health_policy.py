@@ -0,0 +1,46 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+from senlin.policies import health_policy
+from senlin.tests.common import base
+from senlin.tests.common import utils
+
+
+class HealthPolicyTest(base.SenlinTestCase):
+    def setUp(self):
+        super(HealthPolicyTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.manager = self.patch(
+            'senlin.engine.health_manager.get_manager').return_value
+        spec = {'interval': 30, 'grace_period': 60}
+        self.policy = health_policy.HealthPolicy('HealthPolicy', 'test',
+                                                 spec=spec, context=self.ctx)
+
+    def test_defaults(self):
+        policy = health_policy.HealthPolicy('HealthPolicy', 'test')
+        self.assertEqual('stack_status_polling', policy.check_type)
+        self.assertEqual(60, policy.interval)
+
+    def test_attach(self):
+        self.assertTrue(self.policy.attach('C1'))
+        self.manager.sync_cluster.assert_called_once_with(
+            self.ctx, 'C1', 'stack_status_polling', 30, 60)
+
+    def test_detach(self):
+        self.assertTrue(self.policy.detach('C1'))
+        self.manager.remove_cluster.assert_called_once_with('C1')
+
+    def test_post_op(self):
+        self.assertTrue(self.policy.post_op('C1', 'CLUSTER_SCALE_UP'))
+        self.manager.sync_cluster.assert_called_once_with(
+            self.ctx, 'C1', 'stack_status_polling', 30, 60)
@@ -0,0 +1,107 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from oslo.config import cfg
+
+from senlin.db.sqlalchemy import api as db_api
+from senlin.drivers import fake
+from senlin.policies import lb_policy
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+
+class LoadBalancingPolicyTest(base.SenlinTestCase):
+    def setUp(self):
+        super(LoadBalancingPolicyTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        cfg.CONF.set_override('cloud_backend', 'fake')
+        self.pools = fake.FakePoolManager()
+        self.patchobject(fake, '_pool_manager', self.pools)
+
+        self.profile = shared.create_profile(self.ctx)
+        self.cluster = shared.create_cluster(self.ctx, self.profile)
+        self.node_ids = [self._node(i) for i in range(3)]
+
+        spec = {'pools': ['P1', 'P2'], 'protocol_port': 8080}
+        self.policy = lb_policy.LoadBalancingPolicy(
+            'LoadBalancingPolicy', 'test', spec=spec, context=self.ctx)
+
+    def _node(self, index):
+        return shared.create_node(self.ctx, self.cluster, self.profile,
+                                  name='node-%s' % index, index=index,
+                                  data={'address': '10.0.0.%s' % index}).id
+
+    def _members(self):
+        cluster = db_api.cluster_get(self.ctx, self.cluster.id)
+        members = cluster.data.get(lb_policy.LoadBalancingPolicy.MEMBERS)
+        return dict((pool_id, sorted(m)) for pool_id, m in members.items())
+
+    def test_scale_up(self):
+        self.assertTrue(self.policy.post_op(self.cluster.id,
+                                            'CLUSTER_SCALE_UP'))
+        self.node_ids.append(self._node(3))
+        self.node_ids.append(self._node(4))
+
+        self.assertTrue(self.policy.post_op(self.cluster.id,
+                                            'CLUSTER_SCALE_UP'))
+
+        # One update of each pool per action
+        self.assertEqual({'P1': 2, 'P2': 2}, self.pools.updates)
+        self.assertEqual({'P1': sorted(self.node_ids),
+                          'P2': sorted(self.node_ids)}, self._members())
+        addresses = sorted(a for a, port in self.pools.pools['P1'].values())
+        self.assertEqual(['10.0.0.%s' % i for i in range(5)], addresses)
+
+    def test_nothing_changed(self):
+        self.policy.post_op(self.cluster.id, 'CLUSTER_SCALE_UP')
+
+        self.policy.post_op(self.cluster.id, 'CLUSTER_SCALE_UP')
+
+        self.assertEqual({'P1': 1, 'P2': 1}, self.pools.updates)
+
+    def test_scale_down(self):
+        self.policy.post_op(self.cluster.id, 'CLUSTER_SCALE_UP')
+        victims = self.node_ids[1:]
+
+        self.assertTrue(self.policy.pre_op(self.cluster.id,
+                                           'CLUSTER_SCALE_DOWN',
+                                           inputs={'nodes': victims}))
+
+        # The victims are out of the pools before they are deleted
+        self.assertEqual({'P1': 2, 'P2': 2}, self.pools.updates)
+        self.assertEqual({'P1': self.node_ids[:1], 'P2': self.node_ids[:1]},
+                         self._members())
+        self.assertEqual(1, len(self.pools.pools['P1']))
+
+        # Nothing is left to change once they are gone
+        for node_id in victims:
+            db_api.node_delete(self.ctx, node_id)
+        self.policy.post_op(self.cluster.id, 'CLUSTER_SCALE_DOWN')
+        self.assertEqual({'P1': 2, 'P2': 2}, self.pools.updates)
+
+    def test_pre_op_other_actions(self):
+        self.assertTrue(self.policy.pre_op(self.cluster.id,
+                                           'CLUSTER_SCALE_UP',
+                                           inputs={'nodes': self.node_ids}))
+
+        self.assertEqual({}, self.pools.updates)
+
+    def test_node_without_address(self):
+        db_api.node_update(self.ctx, self.node_ids[0], {'data': {}})
+        self.patch('senlin.drivers.fake.FakeStackManager.get',
+                   side_effect=lambda stack_id: object())
+
+        self.policy.post_op(self.cluster.id, 'CLUSTER_SCALE_UP')
+
+        self.assertEqual({'P1': sorted(self.node_ids[1:]),
+                          'P2': sorted(self.node_ids[1:])}, self._members())
@@ -0,0 +1,63 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+from oslo.config import cfg
+
+from senlin.db.sqlalchemy import api as db_api
+from senlin.policies import base as policy_base
+from senlin.policies import scaling_policy
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+
+class PolicyCacheTest(base.SenlinTestCase):
+    def setUp(self):
+        super(PolicyCacheTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.patchobject(policy_base, '_cache', None)
+        self.policy = shared.create_policy(self.ctx)
+        self.policy_get = self.patch('senlin.db.api.policy_get',
+                                     side_effect=db_api.policy_get)
+
+    def _load(self):
+        return scaling_policy.ScalingPolicy.load(self.ctx, self.policy.id)
+
+    def test_load_cached(self):
+        policy = self._load()
+        self.assertIsNot(policy, self._load())
+        self.assertEqual(1, self.policy_get.call_count)
+        self.assertEqual(1, policy_base.cache_info()['hits'])
+
+    def test_invalidate_on_update(self):
+        policy = self._load()
+        policy.cooldown = 20
+        policy.store()
+
+        self.assertEqual(20, self._load().cooldown)
+        self.assertEqual(2, self.policy_get.call_count)
+
+    def test_invalidate_on_delete(self):
+        self._load()
+        scaling_policy.ScalingPolicy.delete(self.ctx, self.policy.id)
+
+        self.assertEqual(0, policy_base.cache_info()['size'])
+
+    def test_expired(self):
+        now = self.patch('time.time', return_value=1000.0)
+        self._load()
+
+        now.return_value = 1000.0 + cfg.CONF.object_cache_ttl
+        self._load()
+
+        self.assertEqual(2, self.policy_get.call_count)
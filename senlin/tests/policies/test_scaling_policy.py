@@ -0,0 +1,66 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from senlin.common import senlin_consts as consts
+from senlin.policies import scaling_policy
+from senlin.tests.common import base
+
+UP = mock.Mock(action=consts.CLUSTER_SCALE_UP)
+DOWN = mock.Mock(action=consts.CLUSTER_SCALE_DOWN)
+
+
+class ScalingPolicyTest(base.SenlinTestCase):
+
+    def _policy(self, adjustment_type, number, min_size=None,
+                max_size=None):
+        spec = {
+            'adjustment_type': adjustment_type,
+            'adjustment_number': number,
+            'min_size': min_size,
+            'max_size': max_size,
+        }
+        return scaling_policy.ScalingPolicy('ScalingPolicy', 'test-policy',
+                                            spec=spec)
+
+    def test_exact_capacity(self):
+        policy = self._policy('EXACT_CAPACITY', 5)
+        self.assertEqual(3, policy.enforce('C1', UP, size=2))
+        self.assertEqual(3, policy.enforce('C1', DOWN, size=8))
+
+    def test_exact_capacity_wrong_direction(self):
+        policy = self._policy('EXACT_CAPACITY', 5)
+        # Scaling never moves away from the target capacity
+        self.assertEqual(0, policy.enforce('C1', UP, size=8))
+        self.assertEqual(0, policy.enforce('C1', DOWN, size=2))
+        self.assertEqual(0, policy.enforce('C1', UP, size=5))
+
+    def test_change_in_capacity(self):
+        policy = self._policy('CHANGE_IN_CAPACITY', 2)
+        self.assertEqual(2, policy.enforce('C1', UP, size=4))
+        self.assertEqual(2, policy.enforce('C1', DOWN, size=4))
+
+    def test_change_in_percentage(self):
+        policy = self._policy('CHANGE_IN_PERCENTAGE', 50)
+        self.assertEqual(5, policy.enforce('C1', UP, size=10))
+        self.assertEqual(5, policy.enforce('C1', DOWN, size=10))
+        # At least one node is changed
+        self.assertEqual(1, policy.enforce('C1', UP, size=1))
+
+    def test_size_limits(self):
+        policy = self._policy('CHANGE_IN_CAPACITY', 4, min_size=2,
+                              max_size=6)
+        self.assertEqual(2, policy.enforce('C1', UP, size=4))
+        self.assertEqual(2, policy.enforce('C1', DOWN, size=4))
+        self.assertEqual(0, policy.enforce('C1', UP, size=7))
+        self.assertEqual(0, policy.enforce('C1', DOWN, size=1))
@@ -0,0 +1,53 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+from senlin.policies import update_policy
+from senlin.tests.common import base
+
+
+class UpdatePolicyTest(base.SenlinTestCase):
+
+    def _policy(self, **spec):
+        return update_policy.UpdatePolicy('UpdatePolicy', 'test-policy',
+                                          spec=spec)
+
+    def test_batch_size_default(self):
+        self.assertEqual(10, self._policy().get_batch_size(10))
+
+    def test_batch_size_max_batch_size(self):
+        policy = self._policy(max_batch_size=3)
+        self.assertEqual(3, policy.get_batch_size(10))
+        self.assertEqual(2, policy.get_batch_size(2))
+
+    def test_batch_size_min_in_service(self):
+        policy = self._policy(min_in_service=8)
+        self.assertEqual(2, policy.get_batch_size(10))
+
+    def test_batch_size_both(self):
+        policy = self._policy(max_batch_size=4, min_in_service=5)
+        self.assertEqual(4, policy.get_batch_size(10))
+        self.assertEqual(2, policy.get_batch_size(7))
+
+    def test_batch_size_at_least_one(self):
+        policy = self._policy(min_in_service=10)
+        self.assertEqual(1, policy.get_batch_size(10))
+        self.assertEqual(1, policy.get_batch_size(3))
+
+    def test_enforce(self):
+        policy = self._policy(max_batch_size=2, pause_time=30)
+        nodes = ['N1', 'N2', 'N3', 'N4', 'N5']
+
+        batches = policy.enforce('C1', None, nodes=nodes)
+
+        self.assertEqual([['N1', 'N2'], ['N3', 'N4'], ['N5']], batches)
+        self.assertEqual(30, policy.pause_time)
@@ -0,0 +1,167 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+import mock
+
+from senlin.common import exception
+from senlin.db.sqlalchemy import api as db_api
+from senlin.profiles.os.heat import composite
+from senlin.tests.common import base
+from senlin.tests.common import utils
+from senlin.tests.db import shared
+
+
+class CompositeStackTest(base.SenlinTestCase):
+    def setUp(self):
+        super(CompositeStackTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        profile = shared.create_profile(self.ctx)
+        self.cluster = shared.create_cluster(self.ctx, profile)
+
+        self.hc = mock.Mock()
+        self.hc.stacks.create.return_value = {'stack': {'id': 'S1'}}
+        self.hc.stacks.template.return_value = {
+            'heat_template_version': composite.TEMPLATE_VERSION,
+            'resources': {'node-A': {'type': 'A'}},
+        }
+        self.patch('senlin.drivers.base.heat', return_value=self.hc)
+        self.wait = self.patch('senlin.profiles.os.heat.poller.wait',
+                               side_effect=self._wait)
+
+    def _wait(self, key, hc, stack_id):
+        # The stack completed the last operation requested
+        calls = [c[0] for c in self.hc.stacks.method_calls
+                 if c[0] in ('create', 'update', 'delete')]
+        return mock.Mock(action=calls[-1].upper(), status='COMPLETE')
+
+    def _stack(self):
+        return composite.CompositeStack(self.ctx, self.cluster.id,
+                                        self.cluster.id)
+
+    def _stack_id(self):
+        cluster = db_api.cluster_get(utils.dummy_context(), self.cluster.id)
+        return cluster.data.get(composite.STACK_ID)
+
+    def test_create_stack(self):
+        stack = self._stack()
+
+        stack._change({'node-B': {'type': 'B'}})
+
+        self.assertEqual('S1', stack.stack_id)
+        self.assertEqual('S1', self._stack_id())
+        self.assertEqual(0, self.hc.stacks.update.call_count)
+
+    def test_create_stack_claimed_meanwhile(self):
+        stack = self._stack()
+
+        def create(**kwargs):
+            # Another engine creates and claims the stack of the cluster
+            db_api.cluster_update(utils.dummy_context(), self.cluster.id,
+                                  {'data': {composite.STACK_ID: 'S0'}})
+            return {'stack': {'id': 'S1'}}
+
+        self.hc.stacks.create.side_effect = create
+
+        stack._change({'node-B': {'type': 'B'}})
+
+        self.assertEqual('S0', stack.stack_id)
+        self.assertEqual('S0', self._stack_id())
+        self.hc.stacks.delete.assert_called_once_with(stack_id='S1')
+        template = self.hc.stacks.update.call_args[1]['template']
+        self.assertEqual('S0', self.hc.stacks.update.call_args[1]['stack_id'])
+        self.assertEqual({'node-A': {'type': 'A'}, 'node-B': {'type': 'B'}},
+                         template['resources'])
+
+    def test_change_uses_stack_created_elsewhere(self):
+        stack = self._stack()
+        db_api.cluster_update(utils.dummy_context(), self.cluster.id,
+                              {'data': {composite.STACK_ID: 'S0'}})
+
+        stack._change({'node-B': None})
+
+        self.assertEqual(0, self.hc.stacks.create.call_count)
+        self.hc.stacks.update.assert_called_once_with(
+            stack_id='S0', template={
+                'heat_template_version': composite.TEMPLATE_VERSION,
+                'resources': {'node-A': {'type': 'A'}}})
+
+    def test_wait_skips_stale_status(self):
+        stack = self._stack()
+        stack.stack_id = 'S1'
+        # Heat has not started the update yet when the stack is first read
+        self.wait.side_effect = [
+            mock.Mock(action='CREATE', status='COMPLETE'),
+            mock.Mock(action='UPDATE', status='COMPLETE')]
+
+        stack._change({'node-B': {'type': 'B'}})
+
+        self.assertEqual(2, self.wait.call_count)
+
+    def test_wait_failed(self):
+        stack = self._stack()
+        stack.stack_id = 'S1'
+        self.wait.side_effect = [
+            mock.Mock(action='UPDATE', status='FAILED',
+                      stack_status='UPDATE_FAILED')]
+
+        self.assertRaises(exception.NodeStatusError, stack._change,
+                          {'node-B': {'type': 'B'}})
+
+    def test_last_resource_removed(self):
+        db_api.cluster_update(utils.dummy_context(), self.cluster.id,
+                              {'data': {composite.STACK_ID: 'S0'}})
+        stack = self._stack()
+
+        stack._change({'node-A': None})
+
+        self.hc.stacks.delete.assert_called_once_with(stack_id='S0')
+        self.assertEqual(0, self.hc.stacks.update.call_count)
+        self.assertIsNone(stack.stack_id)
+        # The cluster gets a new stack for its next member
+        self.assertIsNone(self._stack_id())
+
+    def test_release_keeps_other_claim(self):
+        db_api.cluster_update(utils.dummy_context(), self.cluster.id,
+                              {'data': {composite.STACK_ID: 'S9'}})
+
+        composite._release_stack_id(self.ctx, self.cluster.id, 'S0')
+
+        self.assertEqual('S9', self._stack_id())
+
+    def test_delete_cluster_stack(self):
+        db_api.cluster_update(utils.dummy_context(), self.cluster.id,
+                              {'data': {composite.STACK_ID: 'S0'}})
+
+        composite.delete_cluster_stack(self.ctx, self.cluster.id)
+
+        self.hc.stacks.delete.assert_called_once_with(stack_id='S0')
+        self.assertIsNone(self._stack_id())
+
+    def test_delete_cluster_without_stack(self):
+        composite.delete_cluster_stack(self.ctx, self.cluster.id)
+
+        self.assertEqual(0, self.hc.stacks.delete.call_count)
+
+    def test_idle_stack_dropped(self):
+        self.patch('eventlet.sleep')
+        self.addCleanup(composite._stacks.clear)
+        obj = mock.Mock(context=self.ctx, cluster_id=self.cluster.id,
+                        physical_id=None)
+        stack = composite._get_stack(obj)
+        self.assertIs(stack, composite._get_stack(obj))
+        stack.pending['node-B'] = {'type': 'B'}
+
+        stack._run()
+
+        self.assertNotIn(self.cluster.id, composite._stacks)
+        self.assertIsNot(stack, composite._get_stack(obj))
@@ -0,0 +1,126 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+import eventlet
+from eventlet import event
+import mock
+from oslo.config import cfg
+
+from senlin.profiles.os.heat import poller
+from senlin.tests.common import base
+
+
+def _stack(stack_id, status):
+    return mock.Mock(id=stack_id, status=status)
+
+
+class StackPollerTest(base.SenlinTestCase):
+    def setUp(self):
+        super(StackPollerTest, self).setUp()
+        self.poller = poller.StackPoller()
+        self.hc = mock.Mock()
+        self.stacks = {}
+        self.hc.stacks.list.side_effect = lambda filters, show_deleted: [
+            self.stacks[i] for i in filters['id'] if i in self.stacks]
+
+    def _add(self, stack_id, key='K1', hc=None):
+        # Register a waiter the way wait() does, without blocking
+        waiter = event.Event()
+        client, stacks = self.poller.groups.setdefault(key,
+                                                       (hc or self.hc, {}))
+        stacks.setdefault(stack_id, []).append(waiter)
+        return waiter
+
+    def test_poll_batches(self):
+        cfg.CONF.set_override('stack_poll_batch_size', 2)
+        stack_ids = ['S1', 'S2', 'S3', 'S4', 'S5']
+        waiters = dict((i, self._add(i)) for i in stack_ids)
+        self.stacks = {
+            'S1': _stack('S1', 'COMPLETE'),
+            'S2': _stack('S2', 'IN_PROGRESS'),
+            'S3': _stack('S3', 'FAILED'),
+            'S5': _stack('S5', 'IN_PROGRESS'),
+        }
+
+        done = self.poller.poll()
+
+        self.assertEqual(3, done)
+        batches = [c[1]['filters']['id']
+                   for c in self.hc.stacks.list.call_args_list]
+        self.assertEqual([2, 2, 1], [len(b) for b in batches])
+        self.assertEqual(sorted(waiters), sorted(sum(batches, [])))
+        self.assertIs(self.stacks['S1'], waiters['S1'].wait())
+        self.assertIs(self.stacks['S3'], waiters['S3'].wait())
+        # S4 is gone
+        self.assertIsNone(waiters['S4'].wait())
+        self.assertFalse(waiters['S2'].ready())
+        self.assertEqual(['S2', 'S5'],
+                         sorted(self.poller.groups['K1'][1]))
+
+    def test_poll_by_credentials(self):
+        other = mock.Mock()
+        other.stacks.list.return_value = [_stack('S2', 'COMPLETE')]
+        self._add('S1')
+        self._add('S2', key='K2', hc=other)
+        self.stacks = {'S1': _stack('S1', 'COMPLETE')}
+
+        self.assertEqual(2, self.poller.poll())
+
+        self.hc.stacks.list.assert_called_once_with(filters={'id': ['S1']},
+                                                    show_deleted=True)
+        other.stacks.list.assert_called_once_with(filters={'id': ['S2']},
+                                                  show_deleted=True)
+        self.assertEqual({}, self.poller.groups)
+
+    def test_poll_error(self):
+        waiter = self._add('S1')
+        self.hc.stacks.list.side_effect = Exception('boom')
+
+        self.assertEqual(0, self.poller.poll())
+
+        # Tried again on the next round
+        self.assertFalse(waiter.ready())
+        self.assertIn('S1', self.poller.groups['K1'][1])
+
+    def test_adaptive_interval(self):
+        self._add('S1')
+        sleep = self.patch('eventlet.sleep')
+        results = [0, 0, 0, 0, 0, 1, 0]
+
+        def poll():
+            if len(results) == 1:
+                self.poller.groups.clear()
+            return results.pop(0)
+
+        self.patchobject(self.poller, 'poll', side_effect=poll)
+
+        self.poller._run()
+
+        # Doubled while nothing changes, up to the maximum, and reset when
+        # a stack is done
+        self.assertEqual([2, 4, 8, 16, 30, 30, 2],
+                         [c[0][0] for c in sleep.call_args_list])
+        self.assertIsNone(self.poller.thread)
+
+    def test_wait_resets_interval(self):
+        self.patchobject(self.poller, '_run')
+        self.poller.interval = 30
+        self.stacks = {'S1': _stack('S1', 'COMPLETE')}
+
+        waiting = eventlet.spawn(self.poller.wait, 'K1', self.hc, 'S1')
+        eventlet.sleep(0)
+
+        self.assertEqual(cfg.CONF.stack_poll_interval, self.poller.interval)
+        self.assertIsNotNone(self.poller.thread)
+        self.poller.poll()
+        self.assertIs(self.stacks['S1'], waiting.wait())
@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from senlin.profiles.os.heat import resource
+from senlin.tests.common import base
+
+
+class ResourceProfilePlacementTest(base.SenlinTestCase):
+    def setUp(self):
+        super(ResourceProfilePlacementTest, self).setUp()
+        self.create = self.patch('senlin.profiles.os.heat.composite.create')
+        self.update = self.patch('senlin.profiles.os.heat.composite.update')
+
+    def _profile(self, resource_type, **properties):
+        spec = {'type': resource_type, 'properties': properties}
+        return resource.ResourceProfile('os.heat.resource', 'test-profile',
+                                        spec=spec)
+
+    def _node(self, zone):
+        return mock.Mock(data={'placement': {'zone': zone}})
+
+    def test_create_in_zone(self):
+        profile = self._profile('OS::Nova::Server', flavor='m1.small')
+        node = self._node('AZ1')
+
+        profile.do_create(node)
+
+        self.create.assert_called_once_with(node, {
+            'type': 'OS::Nova::Server',
+            'properties': {'flavor': 'm1.small', 'availability_zone': 'AZ1'},
+        })
+
+    def test_create_type_without_zone(self):
+        profile = self._profile('OS::Neutron::Port', network='N1')
+
+        profile.do_create(self._node('AZ1'))
+
+        self.assertEqual({'network': 'N1'},
+                         self.create.call_args[0][1]['properties'])
+
+    def test_update_keeps_zone(self):
+        profile = self._profile('OS::Nova::Server', flavor='m1.small')
+        new_profile = self._profile('OS::Nova::Server', flavor='m1.large')
+        node = self._node('AZ1')
+
+        profile.do_update(node, new_profile)
+
+        self.assertEqual({'flavor': 'm1.large', 'availability_zone': 'AZ1'},
+                         self.update.call_args[0][1]['properties'])
+
+    def test_update_same_resource(self):
+        profile = self._profile('OS::Nova::Server', flavor='m1.small')
+
+        self.assertTrue(profile.do_update(self._node('AZ1'), profile))
+
+        self.assertEqual(0, self.update.call_count)
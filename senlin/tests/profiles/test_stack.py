@@ -0,0 +1,184 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from senlin.common import exception
+from senlin.profiles.os.heat import stack
+from senlin.tests.common import base
+from senlin.tests.common import utils
+
+
+class StackProfilePlacementTest(base.SenlinTestCase):
+    def setUp(self):
+        super(StackProfilePlacementTest, self).setUp()
+        self.ctx = utils.dummy_context(region_name='R0')
+        self.heat = self.patch('senlin.drivers.base.heat')
+        self.heat.return_value.stacks.create.return_value = {
+            'stack': {'id': 'S1'}}
+        self.patch('senlin.profiles.os.heat.poller.wait',
+                   return_value=mock.Mock(action='CREATE',
+                                          status='COMPLETE'))
+
+    def _profile(self, parameters=None):
+        spec = {
+            'template': {'parameters': parameters or {}},
+            'parameters': {'flavor': 'm1.small'},
+        }
+        return stack.StackProfile('os.heat.stack', 'test-profile',
+                                  spec=spec)
+
+    def _node(self, placement=None):
+        data = {'placement': placement} if placement else {}
+        return mock.Mock(context=self.ctx, data=data)
+
+    def _created(self):
+        return self.heat.return_value.stacks.create.call_args[1]
+
+    def test_create_in_zone(self):
+        profile = self._profile({'availability_zone': {'type': 'string'}})
+
+        self.assertEqual('S1', profile.do_create(self._node({'zone': 'AZ1'})))
+
+        self.assertEqual({'flavor': 'm1.small', 'availability_zone': 'AZ1'},
+                         self._created()['parameters'])
+
+    def test_create_zone_not_a_parameter(self):
+        profile = self._profile()
+
+        profile.do_create(self._node({'zone': 'AZ1'}))
+
+        self.assertEqual({'flavor': 'm1.small'},
+                         self._created()['parameters'])
+
+    def test_create_in_region(self):
+        profile = self._profile()
+
+        profile.do_create(self._node({'region': 'R1'}))
+
+        self.assertEqual('R1', self.heat.call_args[0][0].region_name)
+
+    def test_create_not_placed(self):
+        profile = self._profile()
+
+        profile.do_create(self._node())
+
+        self.assertEqual('R0', self.heat.call_args[0][0].region_name)
+        self.assertEqual({'flavor': 'm1.small'},
+                         self._created()['parameters'])
+
+
+class StackProfileUpdateTest(base.SenlinTestCase):
+    def setUp(self):
+        super(StackProfileUpdateTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.hc = self.patch('senlin.drivers.base.heat').return_value
+        self.wait = self.patch('senlin.profiles.os.heat.poller.wait',
+                               return_value=mock.Mock(action='UPDATE',
+                                                      status='COMPLETE'))
+        self.node = mock.Mock(context=self.ctx, physical_id='S1', data={})
+
+    def _profile(self, **parameters):
+        spec = {
+            'template': {'resources': {}},
+            'parameters': parameters,
+        }
+        return stack.StackProfile('os.heat.stack', 'test-profile',
+                                  spec=spec)
+
+    def test_update_nothing_changed(self):
+        profile = self._profile(flavor='m1.small')
+        new_profile = self._profile(flavor='m1.small')
+
+        self.assertTrue(profile.do_update(self.node, new_profile))
+
+        self.assertEqual(0, self.hc.stacks.update.call_count)
+        self.assertEqual(0, self.wait.call_count)
+
+    def test_update_changed_parameters(self):
+        profile = self._profile(flavor='m1.small', image='cirros')
+        new_profile = self._profile(flavor='m1.large', image='cirros')
+
+        self.assertTrue(profile.do_update(self.node, new_profile))
+
+        # Only the changed parameter is sent, the others are kept by Heat
+        self.hc.stacks.update.assert_called_once_with(
+            stack_id='S1', existing=True, parameters={'flavor': 'm1.large'})
+
+    def test_update_removed_parameters(self):
+        profile = self._profile(flavor='m1.small', image='cirros')
+        new_profile = self._profile(flavor='m1.small')
+
+        self.assertTrue(profile.do_update(self.node, new_profile))
+
+        self.hc.stacks.update.assert_called_once_with(
+            stack_id='S1', existing=True, clear_parameters=['image'])
+
+
+class StackProfileValidateTest(base.SenlinTestCase):
+    def setUp(self):
+        super(StackProfileValidateTest, self).setUp()
+        self.patchobject(stack, '_validation_cache', None)
+        self.hc = self.patch('senlin.drivers.base.heat').return_value
+
+    def _validate(self, tenant_id='T1', template=None, **parameters):
+        spec = {
+            'template': template or {'resources': {}},
+            'parameters': parameters,
+        }
+        profile = stack.StackProfile('os.heat.stack', 'test-profile',
+                                     spec=spec)
+        ctx = utils.dummy_context(tenant_id=tenant_id)
+        return profile.do_validate(mock.Mock(context=ctx))
+
+    def test_validate_cached(self):
+        self.assertTrue(self._validate(flavor='m1.small'))
+        self.assertTrue(self._validate(flavor='m1.small'))
+
+        self.assertEqual(1, self.hc.stacks.validate.call_count)
+
+    def test_validate_per_project(self):
+        self._validate(tenant_id='T1')
+        self._validate(tenant_id='T2')
+
+        self.assertEqual(2, self.hc.stacks.validate.call_count)
+
+    def test_validate_per_template(self):
+        self._validate()
+        self._validate(template={'resources': {'R1': {'type': 'A'}}})
+
+        self.assertEqual(2, self.hc.stacks.validate.call_count)
+
+    def test_validate_per_parameters(self):
+        self._validate(flavor='m1.small')
+        self._validate(flavor='m1.large')
+
+        self.assertEqual(2, self.hc.stacks.validate.call_count)
+
+    def test_validation_key(self):
+        kwargs = {'template': {}, 'parameters': {}, 'environment': {}}
+        key = stack._validation_key('T1', kwargs)
+
+        self.assertEqual(key, stack._validation_key('T1', dict(kwargs)))
+        self.assertNotEqual(key, stack._validation_key('T2', kwargs))
+        for name in ('template', 'parameters', 'environment'):
+            changed = dict(kwargs)
+            changed[name] = {'key': 'value'}
+            self.assertNotEqual(key, stack._validation_key('T1', changed))
+
+    def test_validate_failure_not_cached(self):
+        self.hc.stacks.validate.side_effect = [Exception('boom'), None]
+
+        self.assertRaises(exception.ProfileValidationFailed, self._validate)
+        self.assertTrue(self._validate())
+
+        self.assertEqual(2, self.hc.stacks.validate.call_count)